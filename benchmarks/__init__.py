@@ -0,0 +1,6 @@
+"""离线编排基准测试
+
+本地假 Anthropic 流式服务 + 假 GitHub REST/GraphQL 服务 + gh 命令替身，
+用于在不访问外网的情况下测量编排开销（吞吐、端到端延迟、子进程数、峰值 RSS）。
+用法见 benchmarks/README.md。
+"""
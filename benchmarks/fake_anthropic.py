@@ -0,0 +1,161 @@
+"""假 Anthropic Messages API（SSE 流式），供 claude CLI 通过 ANTHROPIC_BASE_URL 访问
+
+- POST /v1/messages：stream=true 时按 message_start → content_block_* → message_delta → message_stop 输出，
+  否则返回完整 message JSON
+- POST /v1/messages/count_tokens：返回固定 token 数
+- 首 token 延迟、分块间隔、分块数、并发/速率上限均可配置；超限返回 429 + retry-after
+"""
+
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler
+from typing import Any
+
+from benchmarks.fake_server import FakeServer, Limits, send_json
+
+# 同一份回复同时满足 observer（should_trigger）、personal-scan（selected_issues）与普通评审 agent 的解析
+DEFAULT_RESPONSE = """## Summary
+Benchmark response from the fake Anthropic server.
+
+## Key Findings
+- Orchestration overhead is measured, model latency is simulated.
+
+```yaml
+summary: "benchmark"
+should_trigger: false
+reason: "benchmark run"
+analysis: "benchmark run"
+selected_issues: []
+reasoning: "benchmark run"
+```
+"""
+
+
+@dataclass
+class StreamProfile:
+    """流式回复的时序与内容
+
+    first_token_latency: message_start 之后到第一个文本分块的等待（秒）
+    chunk_delay: 相邻文本分块之间的等待（秒）
+    chunks: 回复文本切分的分块数
+    """
+
+    first_token_latency: float = 0.2
+    chunk_delay: float = 0.01
+    chunks: int = 8
+    text: str = DEFAULT_RESPONSE
+    input_tokens: int = 1200
+    output_tokens: int = 300
+
+    def split_text(self) -> list[str]:
+        count = max(1, min(self.chunks, len(self.text) or 1))
+        size = -(-len(self.text) // count)
+        return [self.text[i : i + size] for i in range(0, len(self.text), size)] or [""]
+
+
+class FakeAnthropicServer(FakeServer):
+    name = "fake-anthropic"
+
+    def __init__(self, profile: StreamProfile | None = None, limits: Limits | None = None, **kwargs: Any) -> None:
+        self.profile = profile or StreamProfile()
+        self._active = 0
+        self._max_active = 0
+        self._active_lock = threading.Lock()
+        super().__init__(limits=limits, **kwargs)
+
+    def _track(self, delta: int) -> None:
+        with self._active_lock:
+            self._active += delta
+            self._max_active = max(self._max_active, self._active)
+
+    def snapshot(self) -> dict[str, int]:
+        stats = super().snapshot()
+        with self._active_lock:
+            stats["max_active_streams"] = self._max_active
+        return stats
+
+    def handle(self, handler: BaseHTTPRequestHandler, method: str, path: str, body: Any) -> None:
+        route = path.split("?", 1)[0].rstrip("/")
+        if method != "POST" or not route.startswith("/v1/messages"):
+            send_json(handler, 404, {"type": "error", "error": {"type": "not_found_error", "message": path}})
+            return
+        payload = body if isinstance(body, dict) else {}
+        if route.endswith("/count_tokens"):
+            self.count("count_tokens")
+            send_json(handler, 200, {"input_tokens": self.profile.input_tokens})
+            return
+
+        self.count("messages")
+        model = str(payload.get("model") or "fake-model")
+        if not payload.get("stream"):
+            send_json(handler, 200, self._message(model, self.profile.text, self.profile.output_tokens))
+            return
+
+        self._track(1)
+        try:
+            self._stream(handler, model)
+        except (BrokenPipeError, ConnectionResetError):
+            self.count("client_disconnects")
+        finally:
+            self._track(-1)
+
+    def reject(self, handler: BaseHTTPRequestHandler, reason: str, retry_after: float) -> None:
+        send_json(
+            handler,
+            429,
+            {"type": "error", "error": {"type": "rate_limit_error", "message": "fake rate limit"}},
+            headers={"retry-after": f"{max(1, round(retry_after))}"},
+        )
+
+    def _message(self, model: str, text: str, output_tokens: int) -> dict[str, Any]:
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": text}] if text else [],
+            "stop_reason": "end_turn" if text else None,
+            "stop_sequence": None,
+            "usage": {"input_tokens": self.profile.input_tokens, "output_tokens": output_tokens},
+        }
+
+    def _stream(self, handler: BaseHTTPRequestHandler, model: str) -> None:
+        profile = self.profile
+        handler.close_connection = True
+        handler.send_response(200)
+        handler.send_header("content-type", "text/event-stream")
+        handler.send_header("cache-control", "no-cache")
+        handler.send_header("connection", "close")
+        handler.end_headers()
+
+        def event(kind: str, data: dict[str, Any]) -> None:
+            handler.wfile.write(f"event: {kind}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode())
+            handler.wfile.flush()
+
+        event("message_start", {"type": "message_start", "message": self._message(model, "", 1)})
+        event(
+            "content_block_start",
+            {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+        )
+        if profile.first_token_latency > 0:
+            time.sleep(profile.first_token_latency)
+        for i, piece in enumerate(profile.split_text()):
+            if i and profile.chunk_delay > 0:
+                time.sleep(profile.chunk_delay)
+            event(
+                "content_block_delta",
+                {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}},
+            )
+        event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        event(
+            "message_delta",
+            {
+                "type": "message_delta",
+                "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                "usage": {"output_tokens": profile.output_tokens},
+            },
+        )
+        event("message_stop", {"type": "message_stop"})
@@ -0,0 +1,262 @@
+"""假 GitHub REST/GraphQL 服务
+
+覆盖 issuelab 实际用到的接口（经 benchmarks/bin/gh 替身或 GITHUB_API_URL 访问）：
+- Issue 读取 / 关闭、评论列表 / 创建 / 编辑 / 删除、标签增删
+- repository_dispatch、workflow_dispatch、App installation 与 installation token
+- POST /graphql（仅支持 repository.issue 查询）
+
+任意仓库的任意 Issue 编号首次访问时按确定性内容生成。超出速率限制时按 GitHub 主限流的方式
+返回 403 + x-ratelimit-* 头；超出并发上限时返回 429 + retry-after（二级限流）。
+"""
+
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler
+from typing import Any
+from urllib.parse import unquote
+
+from benchmarks.fake_server import FakeServer, Limits, send_json
+
+BOT_LOGIN = "issuelab-bench[bot]"
+
+
+@dataclass
+class IssueProfile:
+    """生成 Issue 的规模：正文字符数与已有评论数"""
+
+    body_chars: int = 2000
+    comments: int = 3
+    comment_chars: int = 400
+
+
+def _filler(prefix: str, chars: int) -> str:
+    sentence = f"{prefix} benchmark content for orchestration overhead measurement. "
+    return (sentence * (chars // len(sentence) + 1))[:chars]
+
+
+class FakeGitHubServer(FakeServer):
+    name = "fake-github"
+
+    def __init__(self, issues: IssueProfile | None = None, limits: Limits | None = None, **kwargs: Any) -> None:
+        self.issue_profile = issues or IssueProfile()
+        self._lock = threading.Lock()
+        self._issues: dict[tuple[str, int], dict[str, Any]] = {}
+        self._comments: dict[tuple[str, int], list[dict[str, Any]]] = {}
+        self._next_comment_id = 1000
+        self.dispatches: list[dict[str, Any]] = []
+        super().__init__(limits=limits, **kwargs)
+
+    # ---- 状态 ----
+
+    def _new_comment(self, repo: str, number: int, body: str, login: str) -> dict[str, Any]:
+        self._next_comment_id += 1
+        comment_id = self._next_comment_id
+        return {
+            "id": comment_id,
+            "body": body,
+            "user": {"login": login},
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "html_url": f"https://github.com/{repo}/issues/{number}#issuecomment-{comment_id}",
+        }
+
+    def issue(self, repo: str, number: int) -> dict[str, Any]:
+        """返回（必要时生成）Issue；调用方需持有 self._lock"""
+        key = (repo, number)
+        if key not in self._issues:
+            profile = self.issue_profile
+            self._issues[key] = {
+                "number": number,
+                "title": f"Benchmark issue #{number}",
+                "body": _filler(f"Issue {number}", profile.body_chars),
+                "state": "open",
+                "labels": [{"name": "bench"}],
+                "user": {"login": "bench-author"},
+                "html_url": f"https://github.com/{repo}/issues/{number}",
+            }
+            self._comments[key] = [
+                self._new_comment(repo, number, _filler(f"Comment {i}", profile.comment_chars), f"bench-user-{i}")
+                for i in range(profile.comments)
+            ]
+        return self._issues[key]
+
+    def comments(self, repo: str, number: int) -> list[dict[str, Any]]:
+        with self._lock:
+            self.issue(repo, number)
+            return list(self._comments[(repo, number)])
+
+    def _find_comment(self, repo: str, comment_id: int) -> tuple[tuple[str, int], int] | None:
+        for key, items in self._comments.items():
+            if key[0] != repo:
+                continue
+            for index, item in enumerate(items):
+                if item["id"] == comment_id:
+                    return key, index
+        return None
+
+    # ---- 路由 ----
+
+    def reject(self, handler: BaseHTTPRequestHandler, reason: str, retry_after: float) -> None:
+        limits = self.limits
+        if reason == "rate":
+            send_json(
+                handler,
+                403,
+                {"message": "API rate limit exceeded", "documentation_url": "https://docs.github.com/rest"},
+                headers={
+                    "x-ratelimit-limit": str(limits.rate_limit),
+                    "x-ratelimit-remaining": "0",
+                    "x-ratelimit-reset": str(int(time.time() + retry_after)),
+                },
+            )
+            return
+        send_json(
+            handler,
+            429,
+            {"message": "You have exceeded a secondary rate limit"},
+            headers={"retry-after": f"{max(1, round(retry_after))}"},
+        )
+
+    def handle(self, handler: BaseHTTPRequestHandler, method: str, path: str, body: Any) -> None:
+        route = unquote(path.split("?", 1)[0]).rstrip("/")
+        payload = body if isinstance(body, dict) else {}
+        self.count(f"{method} {self._route_name(route)}")
+
+        if route == "/graphql" and method == "POST":
+            send_json(handler, 200, self._graphql(payload))
+            return
+
+        match = re.fullmatch(r"/app/installations/(\d+)/access_tokens", route)
+        if match and method == "POST":
+            send_json(handler, 201, {"token": f"ghs_bench_{match.group(1)}", "expires_at": "2099-01-01T00:00:00Z"})
+            return
+
+        match = re.fullmatch(r"/repos/([^/]+/[^/]+)(/.*)?", route)
+        if not match:
+            send_json(handler, 404, {"message": "Not Found"})
+            return
+        repo, rest = match.group(1), match.group(2) or ""
+        self._repo_route(handler, method, repo, rest, payload)
+
+    @staticmethod
+    def _route_name(route: str) -> str:
+        name = re.sub(r"^/repos/[^/]+/[^/]+", "/repos/:repo", route)
+        name = re.sub(r"/\d+", "/:n", name)
+        return re.sub(r"/labels/[^/]+$", "/labels/:name", name)
+
+    def _repo_route(self, handler: BaseHTTPRequestHandler, method: str, repo: str, rest: str, payload: dict) -> None:
+        if rest == "" and method == "GET":
+            send_json(handler, 200, {"full_name": repo, "fork": False, "default_branch": "main"})
+            return
+        if rest == "/installation" and method == "GET":
+            send_json(handler, 200, {"id": zlib.crc32(repo.encode()) % 1_000_000 + 1})
+            return
+        if rest == "/dispatches" and method == "POST":
+            with self._lock:
+                self.dispatches.append({"repo": repo, "kind": "repository_dispatch", **payload})
+            send_json(handler, 204, None)
+            return
+        match = re.fullmatch(r"/actions/workflows/([^/]+)/dispatches", rest)
+        if match and method == "POST":
+            with self._lock:
+                self.dispatches.append(
+                    {"repo": repo, "kind": "workflow_dispatch", "workflow": match.group(1), **payload}
+                )
+            send_json(handler, 204, None)
+            return
+
+        match = re.fullmatch(r"/issues/comments/(\d+)", rest)
+        if match:
+            self._comment_route(handler, method, repo, int(match.group(1)), payload)
+            return
+
+        match = re.fullmatch(r"/issues/(\d+)(/comments|/labels(?:/[^/]+)?)?", rest)
+        if not match:
+            send_json(handler, 404, {"message": "Not Found"})
+            return
+        number, sub = int(match.group(1)), match.group(2) or ""
+        with self._lock:
+            issue = self.issue(repo, number)
+            if sub == "" and method == "GET":
+                send_json(handler, 200, {**issue, "comments": len(self._comments[(repo, number)])})
+            elif sub == "" and method == "PATCH":
+                issue.update({key: payload[key] for key in ("state", "title", "body") if key in payload})
+                send_json(handler, 200, issue)
+            elif sub == "/comments" and method == "GET":
+                send_json(handler, 200, self._comments[(repo, number)])
+            elif sub == "/comments" and method == "POST":
+                comment = self._new_comment(repo, number, str(payload.get("body", "")), BOT_LOGIN)
+                self._comments[(repo, number)].append(comment)
+                send_json(handler, 201, comment)
+            elif sub == "/labels" and method == "POST":
+                names = {label["name"] for label in issue["labels"]}
+                for name in payload.get("labels", []):
+                    if name not in names:
+                        issue["labels"].append({"name": name})
+                send_json(handler, 200, issue["labels"])
+            elif sub.startswith("/labels/") and method == "DELETE":
+                name = sub[len("/labels/") :]
+                issue["labels"] = [label for label in issue["labels"] if label["name"] != name]
+                send_json(handler, 200, issue["labels"])
+            else:
+                send_json(handler, 404, {"message": "Not Found"})
+
+    def _comment_route(self, handler: BaseHTTPRequestHandler, method: str, repo: str, comment_id: int, payload: dict):
+        with self._lock:
+            found = self._find_comment(repo, comment_id)
+            if found is None:
+                send_json(handler, 404, {"message": "Not Found"})
+                return
+            key, index = found
+            comment = self._comments[key][index]
+            if method == "GET":
+                send_json(handler, 200, comment)
+            elif method == "PATCH":
+                comment["body"] = str(payload.get("body", comment["body"]))
+                send_json(handler, 200, comment)
+            elif method == "DELETE":
+                del self._comments[key][index]
+                send_json(handler, 204, None)
+            else:
+                send_json(handler, 404, {"message": "Not Found"})
+
+    def _graphql(self, payload: dict) -> dict[str, Any]:
+        query = str(payload.get("query", ""))
+        variables = payload.get("variables") or {}
+        if "issue(" not in query:
+            return {"data": {}}
+        owner = variables.get("owner") or "bench"
+        name = variables.get("name") or variables.get("repo") or "IssueLab"
+        number = variables.get("number")
+        if number is None:
+            literal = re.search(r"issue\(\s*number:\s*(\d+)", query)
+            number = int(literal.group(1)) if literal else 1
+        repo = f"{owner}/{name}"
+        with self._lock:
+            issue = self.issue(repo, int(number))
+            comments = list(self._comments[(repo, int(number))])
+        return {
+            "data": {
+                "repository": {
+                    "issue": {
+                        "number": issue["number"],
+                        "title": issue["title"],
+                        "body": issue["body"],
+                        "state": issue["state"].upper(),
+                        "labels": {"nodes": issue["labels"]},
+                        "comments": {
+                            "nodes": [
+                                {
+                                    "author": {"login": c["user"]["login"]},
+                                    "body": c["body"],
+                                    "createdAt": c["created_at"],
+                                }
+                                for c in comments
+                            ]
+                        },
+                    }
+                }
+            }
+        }
@@ -0,0 +1,179 @@
+"""假服务公共部分：后台线程 HTTP 服务、可配置延迟与限流、请求计数（仅依赖标准库）"""
+
+import json
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+@dataclass
+class Limits:
+    """延迟与限流配置
+
+    latency: 每个请求在处理前的固定等待（秒）
+    rate_limit: 每个 rate_window 秒内允许的请求数（0 = 不限）
+    max_concurrency: 同时处理的请求数上限（0 = 不限），超出时直接返回限流响应
+    """
+
+    latency: float = 0.0
+    rate_limit: int = 0
+    rate_window: float = 60.0
+    max_concurrency: int = 0
+
+
+class _RateLimiter:
+    """固定窗口限流 + 并发上限"""
+
+    def __init__(self, limits: Limits) -> None:
+        self.limits = limits
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._inflight = 0
+
+    def acquire(self) -> tuple[str, float] | None:
+        """放行返回 None（之后必须调用 release()）；拒绝返回 (原因 "rate" / "concurrency", 建议等待秒数)"""
+        limits = self.limits
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= limits.rate_window:
+                self._window_start = now
+                self._window_count = 0
+            if limits.rate_limit and self._window_count >= limits.rate_limit:
+                return "rate", max(0.0, limits.rate_window - (now - self._window_start))
+            if limits.max_concurrency and self._inflight >= limits.max_concurrency:
+                return "concurrency", 1.0
+            self._window_count += 1
+            self._inflight += 1
+            return None
+
+    def release(self) -> None:
+        with self._lock:
+            self._inflight -= 1
+
+
+class FakeServer:
+    """在后台线程运行的 ThreadingHTTPServer；子类实现 handle(handler, method, path, body)"""
+
+    name = "fake"
+
+    def __init__(self, limits: Limits | None = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.limits = limits or Limits()
+        self.stats: Counter[str] = Counter()
+        self._stats_lock = threading.Lock()
+        self._limiter = _RateLimiter(self.limits)
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name=f"{self.name}-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "FakeServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def count(self, key: str, value: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += value
+
+    def snapshot(self) -> dict[str, int]:
+        with self._stats_lock:
+            return dict(self.stats)
+
+    # ---- 子类扩展点 ----
+
+    def handle(self, handler: BaseHTTPRequestHandler, method: str, path: str, body: Any) -> None:
+        raise NotImplementedError
+
+    def reject(self, handler: BaseHTTPRequestHandler, reason: str, retry_after: float) -> None:
+        """限流响应（默认 429 + retry-after）"""
+        send_json(
+            handler, 429, {"error": f"{reason} limited"}, headers={"retry-after": f"{max(1, round(retry_after))}"}
+        )
+
+    # ---- 内部 ----
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        length = int(handler.headers.get("content-length") or 0)
+        raw = handler.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else None
+        except ValueError:
+            body = None
+
+        self.count("requests")
+        rejected = self._limiter.acquire()
+        if rejected is not None:
+            self.count("rate_limited")
+            self.reject(handler, *rejected)
+            return
+        try:
+            if self.limits.latency > 0:
+                time.sleep(self.limits.latency)
+            self.handle(handler, method, handler.path, body)
+        finally:
+            self._limiter.release()
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                return
+
+            def do_GET(self) -> None:  # noqa: N802
+                server._dispatch(self, "GET")
+
+            def do_POST(self) -> None:  # noqa: N802
+                server._dispatch(self, "POST")
+
+            def do_PATCH(self) -> None:  # noqa: N802
+                server._dispatch(self, "PATCH")
+
+            def do_PUT(self) -> None:  # noqa: N802
+                server._dispatch(self, "PUT")
+
+            def do_DELETE(self) -> None:  # noqa: N802
+                server._dispatch(self, "DELETE")
+
+            def do_HEAD(self) -> None:  # noqa: N802
+                self.send_response(200)
+                self.send_header("content-length", "0")
+                self.end_headers()
+
+        return Handler
+
+
+def send_json(
+    handler: BaseHTTPRequestHandler, status: int, payload: Any, headers: dict[str, str] | None = None
+) -> None:
+    data = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    handler.send_response(status)
+    handler.send_header("content-type", "application/json; charset=utf-8")
+    handler.send_header("content-length", str(len(data)))
+    for key, value in (headers or {}).items():
+        handler.send_header(key, value)
+    handler.end_headers()
+    if data:
+        handler.wfile.write(data)
@@ -0,0 +1,525 @@
+"""编排基准测试入口
+
+    python -m benchmarks.run --agents 1,3 --issues 1,4
+    python -m benchmarks.run --scenarios dispatch --agents 1,10,50 --issues 20 --output report.json
+    python -m benchmarks.run --baseline report.json --max-regression 0.2   # 回归检查，超出阈值退出码 1
+
+每个 (场景, agent 数, issue 数) 组合在独立子进程中运行，父进程启动本地假 Anthropic / 假 GitHub 服务，
+子进程通过 ANTHROPIC_BASE_URL、GITHUB_API_URL 与 PATH 中的 gh 替身访问它们，全程离线。
+报告吞吐（issues/min）、端到端延迟 p50/p99、子进程数与峰值 RSS。
+
+场景：
+- agents：每个 Issue 走 execute 的完整路径（读取 Issue → 写上下文 → run_agents_command(post=True)）
+- observe-batch：handle_observe_batch，agent 数即 max_parallel
+- personal-scan：agent 数个个人 agent 并发执行 handle_personal_scan，各自扫描全部 Issue
+- dispatch：dispatch_mentions 向 agent 数个注册用户仓库分发（含 App token 交换）
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks.fake_anthropic import FakeAnthropicServer, StreamProfile
+from benchmarks.fake_github import FakeGitHubServer, IssueProfile
+from benchmarks.fake_server import Limits
+
+ROOT = Path(__file__).resolve().parent.parent
+SHIM_DIR = Path(__file__).resolve().parent / "bin"
+if str(ROOT / "src") not in sys.path:
+    sys.path.insert(0, str(ROOT / "src"))
+
+SCENARIOS = ("agents", "observe-batch", "personal-scan", "dispatch")
+BENCH_REPO = "bench/IssueLab"
+
+# agents 场景按顺序取前 N 个；personal-scan 超出时循环使用
+DEFAULT_AGENT_POOL = (
+    "moderator",
+    "reviewer_a",
+    "reviewer_b",
+    "summarizer",
+    "gqy20",
+    "gqy22",
+    "daiduo2",
+    "zhang2023-byte",
+    "rojasraleena-svg",
+)
+PERSONAL_AGENT_POOL = ("gqy20", "gqy22", "daiduo2", "zhang2023-byte", "rojasraleena-svg")
+
+# 对比基线时检查的指标：(字段, 越大越好)
+REGRESSION_METRICS = (("issues_per_min", True), ("p50_seconds", False), ("p99_seconds", False))
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="IssueLab 编排基准测试（离线）")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"逗号分隔，可选: {', '.join(SCENARIOS)}")
+    parser.add_argument("--agents", type=_int_list, default=[1, 3], help="agent 数量序列，如 1,3,5")
+    parser.add_argument("--issues", type=_int_list, default=[1, 4], help="issue 数量序列，如 1,4,16")
+    parser.add_argument("--issue-concurrency", type=int, default=1, help="agents/dispatch 场景并发处理的 Issue 数")
+    parser.add_argument("--repeat", type=int, default=1, help="每个组合重复运行次数（样本合并）")
+    parser.add_argument("--timeout", type=float, default=900, help="单个组合的超时（秒）")
+
+    llm = parser.add_argument_group("fake Anthropic")
+    llm.add_argument("--first-token-latency", type=float, default=0.2)
+    llm.add_argument("--chunk-delay", type=float, default=0.01)
+    llm.add_argument("--chunks", type=int, default=8)
+    llm.add_argument("--llm-latency", type=float, default=0.0, help="请求处理前的固定延迟（秒）")
+    llm.add_argument("--llm-rate-limit", type=int, default=0, help="每个窗口允许的请求数（0 = 不限）")
+    llm.add_argument("--llm-rate-window", type=float, default=60.0)
+    llm.add_argument("--llm-max-concurrency", type=int, default=0, help="并发流上限，超出返回 429（0 = 不限）")
+
+    gh = parser.add_argument_group("fake GitHub")
+    gh.add_argument("--github-latency", type=float, default=0.02)
+    gh.add_argument("--github-rate-limit", type=int, default=0, help="每个窗口允许的请求数，超出返回 403（0 = 不限）")
+    gh.add_argument("--github-rate-window", type=float, default=60.0)
+    gh.add_argument("--github-max-concurrency", type=int, default=0, help="并发上限，超出返回 429（0 = 不限）")
+    gh.add_argument("--issue-body-chars", type=int, default=2000)
+    gh.add_argument("--issue-comments", type=int, default=3)
+
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="传给子进程的额外环境变量")
+    parser.add_argument("--output", help="报告 JSON 输出路径")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出到 stdout")
+    parser.add_argument("--baseline", help="基线报告 JSON，用于回归检查")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="允许的相对退化比例（默认 0.2）")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    return parser
+
+
+# ---- 子进程（worker） ----
+
+
+class _SubprocessCounter:
+    """统计本进程启动的子进程（asyncio / anyio 的子进程最终都经过 subprocess.Popen）"""
+
+    def __init__(self) -> None:
+        self.by_program: dict[str, int] = {}
+        self._original = subprocess.Popen.__init__
+
+    def install(self) -> None:
+        counter = self
+        original = self._original
+
+        def counting_init(popen_self: subprocess.Popen, args: Any, *rest: Any, **kwargs: Any) -> None:
+            program = args[0] if isinstance(args, list | tuple) and args else str(args).split(" ", 1)[0]
+            name = os.path.basename(str(program))
+            counter.by_program[name] = counter.by_program.get(name, 0) + 1
+            original(popen_self, args, *rest, **kwargs)
+
+        subprocess.Popen.__init__ = counting_init  # type: ignore[method-assign]
+
+    @property
+    def total(self) -> int:
+        return sum(self.by_program.values())
+
+
+def _timed_map(func: Any, items: list[Any], concurrency: int) -> list[float]:
+    """对每个元素执行 func 并返回各自耗时（秒）"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def timed(item: Any) -> float:
+        started = time.perf_counter()
+        func(item)
+        return time.perf_counter() - started
+
+    if concurrency <= 1:
+        return [timed(item) for item in items]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(timed, items))
+
+
+def _scenario_agents(spec: dict[str, Any]) -> list[float]:
+    from issuelab.__main__ import _prepare_issue_execution_context
+    from issuelab.commands.common import run_agents_command
+
+    agents = spec["agent_names"]
+
+    def one_issue(issue_number: int) -> None:
+        _, _, context, _, comment_count = _prepare_issue_execution_context(issue_number)
+        run_agents_command(issue_number, agents, context, comment_count, post=True)
+
+    return _timed_map(one_issue, spec["issue_numbers"], spec["issue_concurrency"])
+
+
+def _scenario_observe_batch(spec: dict[str, Any]) -> list[float]:
+    from argparse import Namespace
+
+    from issuelab.agents import observer
+    from issuelab.commands.observer import handle_observe_batch
+
+    # 每个 Issue 的端到端延迟 = 批次开始到该 Issue 的 observer 完成
+    finished: list[float] = []
+    original = observer.run_observer
+
+    async def timed_run_observer(*args: Any, **kwargs: Any) -> dict:
+        try:
+            return await original(*args, **kwargs)
+        finally:
+            finished.append(time.perf_counter())
+
+    observer.run_observer = timed_run_observer
+    started = time.perf_counter()
+    issues = ",".join(str(n) for n in spec["issue_numbers"])
+    handle_observe_batch(Namespace(issues=issues, max_parallel=spec["agents"], auto_trigger=False))
+    return [end - started for end in finished]
+
+
+def _scenario_personal_scan(spec: dict[str, Any]) -> list[float]:
+    from argparse import Namespace
+
+    from issuelab.commands.personal import handle_personal_scan
+
+    issues = ",".join(str(n) for n in spec["issue_numbers"])
+
+    def one_agent(agent_name: str) -> None:
+        handle_personal_scan(Namespace(agent=agent_name, issues=issues, repo=BENCH_REPO, max_replies=3))
+
+    return _timed_map(one_agent, spec["agent_names"], len(spec["agent_names"]))
+
+
+def _write_bench_registry(agents_dir: Path, count: int) -> list[str]:
+    import yaml
+
+    usernames = []
+    for i in range(count):
+        username = f"bench-user-{i}"
+        user_dir = agents_dir / username
+        user_dir.mkdir(parents=True, exist_ok=True)
+        config = {
+            "name": username,
+            "owner": username,
+            "repository": f"{username}/IssueLab",
+            "branch": "main",
+            "enabled": True,
+            "dispatch_mode": "workflow_dispatch" if i % 2 else "repository_dispatch",
+        }
+        (user_dir / "agent.yml").write_text(yaml.safe_dump(config), encoding="utf-8")
+        usernames.append(username)
+    return usernames
+
+
+def _bench_private_key() -> str:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+
+def _scenario_dispatch(spec: dict[str, Any]) -> list[float]:
+    import contextlib
+    import io
+
+    from issuelab.cli.dispatch import dispatch_mentions
+
+    agents_dir = Path(spec["workdir"]) / "bench_registry"
+    mentions = _write_bench_registry(agents_dir, spec["agents"])
+    private_key = _bench_private_key()
+
+    def one_issue(issue_number: int) -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = dispatch_mentions(
+                mentions=mentions,
+                agents_dir=agents_dir,
+                source_repo=BENCH_REPO,
+                issue_number=issue_number,
+                issue_title=f"Benchmark issue #{issue_number}",
+                issue_body="benchmark",
+                app_id="1",
+                app_private_key=private_key,
+            )
+        if result["failed_agents"]:
+            raise RuntimeError(f"dispatch failed: {result['failed_agents']}")
+
+    return _timed_map(one_issue, spec["issue_numbers"], spec["issue_concurrency"])
+
+
+_SCENARIO_FUNCS = {
+    "agents": _scenario_agents,
+    "observe-batch": _scenario_observe_batch,
+    "personal-scan": _scenario_personal_scan,
+    "dispatch": _scenario_dispatch,
+}
+
+
+def run_worker(spec: dict[str, Any]) -> dict[str, Any]:
+    """在当前进程运行一个组合，返回测量结果"""
+    import contextlib
+    import resource
+
+    from issuelab.agents.run_stats import percentile
+
+    counter = _SubprocessCounter()
+    counter.install()
+    started = time.perf_counter()
+    # 被测命令的输出不混入 worker 的结果行
+    with contextlib.redirect_stdout(sys.stderr):
+        latencies = _SCENARIO_FUNCS[spec["scenario"]](spec)
+    wall = time.perf_counter() - started
+
+    issues_done = len(spec["issue_numbers"]) * (len(spec["agent_names"]) if spec["scenario"] == "personal-scan" else 1)
+    return {
+        "wall_seconds": round(wall, 3),
+        "issues_processed": issues_done,
+        "issues_per_min": round(issues_done / wall * 60, 2) if wall > 0 else 0.0,
+        "latencies": [round(value, 4) for value in latencies],
+        "p50_seconds": round(percentile(latencies, 50), 3),
+        "p99_seconds": round(percentile(latencies, 99), 3),
+        "subprocesses": counter.total,
+        "subprocesses_by_program": counter.by_program,
+        # Linux 上 ru_maxrss 单位为 KB
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_child_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+# ---- 父进程 ----
+
+
+def _worker_env(args: argparse.Namespace, llm_url: str, github_url: str) -> dict[str, str]:
+    env = os.environ.copy()
+    env.update(
+        {
+            "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT / "src"), str(ROOT), env.get("PYTHONPATH")])),
+            "PATH": os.pathsep.join([str(SHIM_DIR), env.get("PATH", "")]),
+            "ANTHROPIC_BASE_URL": llm_url,
+            "ANTHROPIC_AUTH_TOKEN": "sk-bench",
+            "ANTHROPIC_API_KEY": "sk-bench",
+            "ANTHROPIC_MODEL": "bench-model",
+            "CLAUDE_CODE_DISABLE_NONESSENTIAL_TRAFFIC": "1",
+            "DISABLE_TELEMETRY": "1",
+            "ISSUELAB_BENCH_GITHUB_URL": github_url,
+            "GITHUB_API_URL": github_url,
+            "GITHUB_REPOSITORY": BENCH_REPO,
+            "GITHUB_TOKEN": "ghs_bench",
+            "ISSUELAB_LINK_CHECK": "0",
+            "LOG_LEVEL": env.get("LOG_LEVEL", "WARNING"),
+        }
+    )
+    for key in ("GITHUB_OUTPUT", "LOG_FILE", "PAT_TOKEN", "GH_TOKEN", "ANTHROPIC_API_TOKEN"):
+        env.pop(key, None)
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+def _agent_names(scenario: str, count: int) -> list[str]:
+    if scenario == "agents":
+        if count > len(DEFAULT_AGENT_POOL):
+            raise ValueError(f"agents 场景最多 {len(DEFAULT_AGENT_POOL)} 个 agent")
+        return list(DEFAULT_AGENT_POOL[:count])
+    if scenario == "personal-scan":
+        return [PERSONAL_AGENT_POOL[i % len(PERSONAL_AGENT_POOL)] for i in range(count)]
+    return []
+
+
+def run_case(args: argparse.Namespace, scenario: str, agents: int, issues: int) -> dict[str, Any]:
+    """启动假服务，在独立子进程中运行一个组合"""
+    profile = StreamProfile(
+        first_token_latency=args.first_token_latency, chunk_delay=args.chunk_delay, chunks=args.chunks
+    )
+    llm_limits = Limits(
+        latency=args.llm_latency,
+        rate_limit=args.llm_rate_limit,
+        rate_window=args.llm_rate_window,
+        max_concurrency=args.llm_max_concurrency,
+    )
+    github_limits = Limits(
+        latency=args.github_latency,
+        rate_limit=args.github_rate_limit,
+        rate_window=args.github_rate_window,
+        max_concurrency=args.github_max_concurrency,
+    )
+    issue_profile = IssueProfile(body_chars=args.issue_body_chars, comments=args.issue_comments)
+    row: dict[str, Any] = {"scenario": scenario, "agents": agents, "issues": issues}
+
+    workdir = tempfile.mkdtemp(prefix="issuelab-bench-")
+    try:
+        # handle_personal_scan 按相对路径读取 agents/<name>/agent.yml
+        os.symlink(ROOT / "agents", Path(workdir) / "agents")
+        with (
+            FakeAnthropicServer(profile=profile, limits=llm_limits) as llm,
+            FakeGitHubServer(issues=issue_profile, limits=github_limits) as github,
+        ):
+            spec = {
+                "scenario": scenario,
+                "agents": agents,
+                "agent_names": _agent_names(scenario, agents),
+                "issue_numbers": list(range(1, issues + 1)),
+                "issue_concurrency": max(1, args.issue_concurrency),
+                "workdir": workdir,
+            }
+            try:
+                proc = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.run", "--worker", json.dumps(spec)],
+                    cwd=workdir,
+                    env=_worker_env(args, llm.url, github.url),
+                    capture_output=True,
+                    text=True,
+                    timeout=args.timeout,
+                )
+            except subprocess.TimeoutExpired:
+                row["error"] = f"timeout after {args.timeout}s"
+                return row
+            result = _last_json_line(proc.stdout)
+            if proc.returncode != 0 or result is None:
+                row["error"] = (proc.stderr.strip().splitlines() or [f"exit code {proc.returncode}"])[-1][:300]
+                return row
+            row.update(result)
+            row["llm_requests"] = llm.snapshot()
+            row["github_requests"] = github.snapshot()
+            return row
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _last_json_line(output: str) -> dict[str, Any] | None:
+    for line in reversed(output.strip().splitlines()):
+        try:
+            value = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def merge_repeats(rows: list[dict[str, Any]]) -> dict[str, Any]:
+    """合并同一组合的多次运行：延迟样本合并后重算分位数，其余取均值 / 最大值"""
+    from issuelab.agents.run_stats import percentile
+
+    ok = [row for row in rows if "error" not in row]
+    if not ok:
+        return rows[-1]
+    merged = dict(ok[-1])
+    latencies = [value for row in ok for value in row["latencies"]]
+    merged["latencies"] = latencies
+    merged["p50_seconds"] = round(percentile(latencies, 50), 3)
+    merged["p99_seconds"] = round(percentile(latencies, 99), 3)
+    merged["issues_per_min"] = round(sum(row["issues_per_min"] for row in ok) / len(ok), 2)
+    merged["wall_seconds"] = round(sum(row["wall_seconds"] for row in ok) / len(ok), 3)
+    merged["peak_rss_mb"] = max(row["peak_rss_mb"] for row in ok)
+    merged["peak_child_rss_mb"] = max(row["peak_child_rss_mb"] for row in ok)
+    merged["runs"] = len(ok)
+    return merged
+
+
+def compare_to_baseline(rows: list[dict[str, Any]], baseline: list[dict[str, Any]], tolerance: float) -> list[str]:
+    """返回超出容忍度的退化描述"""
+    indexed = {(row["scenario"], row["agents"], row["issues"]): row for row in baseline if "error" not in row}
+    regressions = []
+    for row in rows:
+        base = indexed.get((row["scenario"], row["agents"], row["issues"]))
+        if base is None or "error" in row:
+            continue
+        for metric, higher_is_better in REGRESSION_METRICS:
+            old, new = float(base.get(metric) or 0), float(row.get(metric) or 0)
+            if old <= 0:
+                continue
+            change = (old - new) / old if higher_is_better else (new - old) / old
+            if change > tolerance:
+                regressions.append(
+                    f"{row['scenario']} agents={row['agents']} issues={row['issues']}: "
+                    f"{metric} {old:g} -> {new:g} ({change:+.0%})"
+                )
+    return regressions
+
+
+def format_table(rows: list[dict[str, Any]]) -> str:
+    headers = (
+        "scenario",
+        "agents",
+        "issues",
+        "issues/min",
+        "p50 s",
+        "p99 s",
+        "subproc",
+        "rss MB",
+        "child MB",
+        "llm req",
+        "gh req",
+    )
+    lines = [headers]
+    for row in rows:
+        if "error" in row:
+            lines.append((row["scenario"], str(row["agents"]), str(row["issues"]), f"ERROR: {row['error']}"))
+            continue
+        lines.append(
+            (
+                row["scenario"],
+                str(row["agents"]),
+                str(row["issues"]),
+                f"{row['issues_per_min']:.1f}",
+                f"{row['p50_seconds']:.2f}",
+                f"{row['p99_seconds']:.2f}",
+                str(row["subprocesses"]),
+                f"{row['peak_rss_mb']:.0f}",
+                f"{row['peak_child_rss_mb']:.0f}",
+                str(row["llm_requests"].get("messages", 0)),
+                str(row["github_requests"].get("requests", 0)),
+            )
+        )
+    widths = [max(len(line[i]) for line in lines if i < len(line)) for i in range(len(headers))]
+    return "\n".join(
+        "  ".join(cell.ljust(widths[i]) if i < len(line) - 1 else cell for i, cell in enumerate(line)) for line in lines
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.worker:
+        result = run_worker(json.loads(args.worker))
+        print(json.dumps(result, ensure_ascii=False))
+        return 0
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = sorted(set(scenarios) - set(SCENARIOS))
+    if unknown:
+        print(f"[ERROR] 未知场景: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    if "agents" in scenarios and not shutil.which("claude"):
+        print("[WARNING] 未找到 claude CLI，依赖模型调用的场景将失败", file=sys.stderr)
+
+    rows = []
+    for scenario in scenarios:
+        for agents in args.agents:
+            for issues in args.issues:
+                print(f"[RUN] {scenario} agents={agents} issues={issues}", file=sys.stderr)
+                rows.append(
+                    merge_repeats([run_case(args, scenario, agents, issues) for _ in range(max(1, args.repeat))])
+                )
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args) | {"worker": None},
+        "results": rows,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report, ensure_ascii=False, indent=2) if args.json else format_table(rows))
+
+    failed = any("error" in row for row in rows)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_to_baseline(rows, json.load(f).get("results", []), args.max_regression)
+        for line in regressions:
+            print(f"[REGRESSION] {line}", file=sys.stderr)
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ from __future__ import annotations
 import argparse
 import asyncio
 import json
+import sys
 from pathlib import Path
 from typing import Any
 
@@ -222,4 +223,7 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+    from issuelab.profiling import run_profiled
+
+    raise SystemExit(run_profiled("daily_issue_health_agent_report", main))
@@ -11,6 +11,7 @@ import argparse
 import json
 import re
 import subprocess
+import sys
 import time
 from collections import Counter, defaultdict
 from dataclasses import dataclass
@@ -390,4 +391,7 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+    from issuelab.profiling import run_profiled
+
+    raise SystemExit(run_profiled("daily_issue_health_report", main))
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Wrapper for exporting agent span traces to Chrome trace / Perfetto format.
+
+Lightweight wrapper that calls the core logic from issuelab.cli.trace_export.
+Only needs the standard library, so it can run on a trace artifact without installing the package.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to path for direct script execution
+if __name__ == "__main__":
+    src_path = Path(__file__).parent.parent / "src"
+    if src_path.exists():
+        sys.path.insert(0, str(src_path))
+
+    from issuelab.cli.trace_export import main
+    from issuelab.profiling import run_profiled
+
+    sys.exit(run_profiled("export_trace", main))
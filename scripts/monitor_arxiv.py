@@ -24,6 +24,7 @@ import re
 import sys
 import time
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Any
 
 import feedparser
@@ -442,6 +443,7 @@ def main(argv: list[str] | None = None) -> int:
 
 
 if __name__ == "__main__":
-    import os
+    sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+    from issuelab.profiling import run_profiled
 
-    sys.exit(main())
+    sys.exit(run_profiled("monitor_arxiv", main))
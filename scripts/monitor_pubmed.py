@@ -28,6 +28,7 @@ import time
 import urllib.parse
 import urllib.request
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Any
 
 from github import Github
@@ -785,4 +786,7 @@ def main(argv: list[str] | None = None) -> int:
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+    from issuelab.profiling import run_profiled
+
+    sys.exit(run_profiled("monitor_pubmed", main))
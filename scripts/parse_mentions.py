@@ -16,5 +16,6 @@ if __name__ == "__main__":
         sys.path.insert(0, str(src_path))
 
     from issuelab.cli.mentions import main
+    from issuelab.profiling import run_profiled
 
-    sys.exit(main())
+    sys.exit(run_profiled("parse_mentions", main))
@@ -156,4 +156,7 @@ def main(argv: list[str] | None = None) -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+    from issuelab.profiling import run_profiled
+
+    raise SystemExit(run_profiled("prepare_mcp_env", main))
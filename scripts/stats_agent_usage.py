@@ -3,12 +3,27 @@
 统计 GitHub Actions 中 Agent 的使用情况
 收集: 运行轮数、工具调用次数、成本等
 
+数据来源（按优先级）:
+    1. artifact 中的 usage.jsonl（执行器每次运行写入的结构化用量记录，并发下载）
+    2. artifact 中的 .log 文件（正则解析 [Stats] 行，兜底）
+    3. job 日志（正则解析，兜底）
+
 使用方法:
     uv run python scripts/stats_agent_usage.py
+    uv run python scripts/stats_agent_usage.py --local < logs/usage.jsonl   # 或本地日志
+
+本地用量仓库（SQLite，默认 .issuelab/usage.db，按 run 增量导入，已导入的 run 不再下载）:
+    uv run python scripts/stats_agent_usage.py ingest --limit 200
+    uv run python scripts/stats_agent_usage.py ingest --file logs/usage.jsonl
+    uv run python scripts/stats_agent_usage.py query durations --since 7d
+    uv run python scripts/stats_agent_usage.py query cost-per-issue --since 2026-10-01 --until 2026-10-08
+    uv run python scripts/stats_agent_usage.py query tokens-per-turn
+    uv run python scripts/stats_agent_usage.py query failure-rate --since 30d --json
 
 注意: 需要安装 gh CLI 并登录
 """
 
+import argparse
 import asyncio
 import json
 import os
@@ -16,8 +31,20 @@ import re
 import subprocess
 import sys
 import tempfile
+from collections.abc import Awaitable
+from pathlib import Path
 from typing import Any
 
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from issuelab.agents.usage import (  # noqa: E402
+    USAGE_FILE_NAME,
+    aggregate_usage_records,
+    empty_usage_stats,
+    parse_usage_records,
+)
+from issuelab.agents.usage_store import UsageStore, parse_time_bound  # noqa: E402
+
 
 def run_cmd(cmd: list[str], timeout: int = 60) -> tuple[int, str, str]:
     """执行 shell 命令"""
@@ -28,7 +55,15 @@ def run_cmd(cmd: list[str], timeout: int = 60) -> tuple[int, str, str]:
 def get_workflow_runs(limit: int = 50) -> list[dict]:
     """获取最近的 workflow runs"""
     code, stdout, _ = run_cmd(
-        ["gh", "run", "list", "--limit", str(limit), "--json", "number,name,status,conclusion,startedAt,workflowName"]
+        [
+            "gh",
+            "run",
+            "list",
+            "--limit",
+            str(limit),
+            "--json",
+            "databaseId,number,name,status,conclusion,startedAt,workflowName",
+        ]
     )
     if code != 0:
         print(f"Error getting runs: {stdout}")
@@ -36,6 +71,11 @@ def get_workflow_runs(limit: int = 50) -> list[dict]:
     return json.loads(stdout)
 
 
+def get_run_id(run: dict) -> str:
+    """API 使用的 run id（databaseId；旧输出没有时退回 number）"""
+    return str(run.get("databaseId") or run["number"])
+
+
 def get_workflow_jobs(run_id: str) -> list[dict]:
     """获取 workflow run 的所有 jobs"""
     repo = os.getenv("GITHUB_REPOSITORY", "gqy20/IssueLab")
@@ -215,75 +255,110 @@ def parse_usage_from_log(log: str) -> dict[str, Any]:
     return stats
 
 
-def download_and_parse_artifacts(run_id: str) -> dict:
-    """下载并解析 artifacts 中的日志"""
-    stats = {
-        "runs_found": 0,
+def _empty_agent_stats() -> dict[str, Any]:
+    return {
+        "runs": 0,
         "cost_usd": 0.0,
         "total_turns": 0,
         "total_tool_calls": 0,
-        "total_input_tokens": 0,
-        "total_output_tokens": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
         "total_tokens": 0,
-        "agents": {},
     }
 
-    artifacts = get_run_artifacts(run_id)
-    if not artifacts:
-        return stats
 
-    # 创建临时目录
-    with tempfile.TemporaryDirectory() as tmpdir:
-        artifact_dir = os.path.join(tmpdir, "artifacts")
-        os.makedirs(artifact_dir, exist_ok=True)
+def merge_stats(total: dict, part: dict) -> None:
+    """将 part 的统计累加到 total"""
+    total["runs_found"] += part["runs_found"]
+    total["cost_usd"] += part["cost_usd"]
+    total["total_turns"] += part["total_turns"]
+    total["total_tool_calls"] += part["total_tool_calls"]
+    total["total_input_tokens"] += part.get("total_input_tokens", 0)
+    total["total_output_tokens"] += part.get("total_output_tokens", 0)
+    total["total_tokens"] += part.get("total_tokens", 0)
+    for agent, agent_stats in part["agents"].items():
+        target = total["agents"].setdefault(agent, _empty_agent_stats())
+        for k, v in agent_stats.items():
+            target[k] += v
+
+
+def download_run_artifacts(run_id: str, artifact_dir: str, semaphore: asyncio.Semaphore) -> list[Awaitable[str]]:
+    """为 run 中每个日志类 artifact 创建并发下载任务（各自下载到独立子目录）"""
+
+    async def _download(name: str) -> str:
+        target = os.path.join(artifact_dir, name)
+        async with semaphore:
+            await asyncio.to_thread(run_cmd, ["gh", "run", "download", run_id, "--name", name, "--dir", target], 300)
+        return target
+
+    return [
+        _download(str(artifact.get("name", "")))
+        for artifact in get_run_artifacts(run_id)
+        if "log" in str(artifact.get("name", "")).lower()
+    ]
 
-        for artifact in artifacts:
-            artifact_name = artifact.get("name", "")
-            artifact_id = str(artifact.get("id", ""))
 
-            # 只处理 agent 日志类型的 artifact
-            if "log" not in artifact_name.lower():
-                continue
+def read_artifact_files(directories: list[str]) -> tuple[list[dict], dict]:
+    """读取已下载的 artifact：优先 usage.jsonl 结构化记录，没有时才用正则解析 .log"""
+    records: list[dict] = []
+    log_files: list[str] = []
+    for directory in directories:
+        for root, _dirs, files in os.walk(directory):
+            for filename in files:
+                filepath = os.path.join(root, filename)
+                if filename == USAGE_FILE_NAME:
+                    with open(filepath, encoding="utf-8", errors="ignore") as f:
+                        records.extend(parse_usage_records(f.read()))
+                elif filename.endswith(".log"):
+                    log_files.append(filepath)
+
+    fallback = empty_usage_stats()
+    if records:
+        return records, fallback
+
+    for filepath in log_files:
+        try:
+            with open(filepath, encoding="utf-8", errors="ignore") as f:
+                merge_stats(fallback, parse_usage_from_log(f.read()))
+        except Exception as e:
+            print(f"  Warning: Failed to parse {filepath}: {e}")
+    return records, fallback
+
+
+def parse_job_logs(run_id: str) -> dict:
+    """没有 artifact 时的兜底：从 agent 相关 job 的日志中正则解析"""
+    stats = empty_usage_stats()
+    for job in get_workflow_jobs(run_id):
+        job_name = job.get("name", "")
+        if job.get("status") != "completed" or job.get("conclusion") != "success":
+            continue
+        # 只分析 agent 相关的 jobs
+        if not any(
+            keyword in job_name.lower() for keyword in ["agent", "moderator", "reviewer", "observer", "summarizer"]
+        ):
+            continue
+        logs = get_job_logs(run_id, job_name)
+        if logs:
+            merge_stats(stats, parse_usage_from_log(logs))
+    return stats
 
-            # 下载 artifact
-            run_cmd(["gh", "run", "download", artifact_id, "--dir", artifact_dir])
-
-            # 解析下载的文件
-            for root, _dirs, files in os.walk(artifact_dir):
-                for filename in files:
-                    if filename.endswith(".log"):
-                        filepath = os.path.join(root, filename)
-                        try:
-                            with open(filepath, encoding="utf-8", errors="ignore") as f:
-                                content = f.read()
-
-                            parsed = parse_usage_from_log(content)
-                            stats["runs_found"] += parsed["runs_found"]
-                            stats["cost_usd"] += parsed["cost_usd"]
-                            stats["total_turns"] += parsed["total_turns"]
-                            stats["total_tool_calls"] += parsed["total_tool_calls"]
-                            stats["total_input_tokens"] += parsed.get("total_input_tokens", 0)
-                            stats["total_output_tokens"] += parsed.get("total_output_tokens", 0)
-                            stats["total_tokens"] += parsed.get("total_tokens", 0)
-
-                            for agent, agent_stats in parsed["agents"].items():
-                                if agent not in stats["agents"]:
-                                    stats["agents"][agent] = {
-                                        "runs": 0,
-                                        "cost_usd": 0.0,
-                                        "total_turns": 0,
-                                        "total_tool_calls": 0,
-                                        "input_tokens": 0,
-                                        "output_tokens": 0,
-                                        "total_tokens": 0,
-                                    }
-                                for k, v in agent_stats.items():
-                                    stats["agents"][agent][k] += v
-
-                        except Exception as e:
-                            print(f"  Warning: Failed to parse {filepath}: {e}")
 
-    return stats
+async def collect_run_usage(run: dict, tmpdir: str, semaphore: asyncio.Semaphore) -> tuple[str, list[dict], dict]:
+    """收集单个 run 的用量：返回 (来源, 结构化记录, 正则兜底统计)"""
+    run_id = get_run_id(run)
+    artifact_dir = os.path.join(tmpdir, run_id)
+    downloads = await asyncio.to_thread(download_run_artifacts, run_id, artifact_dir, semaphore)
+    directories = await asyncio.gather(*downloads) if downloads else []
+    if directories:
+        records, fallback = await asyncio.to_thread(read_artifact_files, list(directories))
+        if records:
+            return "records", records, fallback
+        if fallback["runs_found"] > 0:
+            return "artifact-logs", records, fallback
+
+    async with semaphore:
+        stats = await asyncio.to_thread(parse_job_logs, run_id)
+    return "job-logs", [], stats
 
 
 async def main():
@@ -296,114 +371,47 @@ async def main():
     runs = get_workflow_runs(50)
     print(f"     找到 {len(runs)} 个 runs")
 
-    # 2. 分析日志中的使用统计
+    # 2. 并发下载 artifacts，优先解析结构化用量记录（usage.jsonl），日志正则仅作兜底
     print("\n[2/3] 分析 Agent 使用统计...")
 
     total_stats = {
-        "runs_found": 0,
-        "cost_usd": 0.0,
-        "total_turns": 0,
-        "total_tool_calls": 0,
-        "total_input_tokens": 0,
-        "total_output_tokens": 0,
-        "total_tokens": 0,
-        "agents": {},
+        **empty_usage_stats(),
         "workflows_analyzed": 0,
         "artifacts_analyzed": 0,
+        "usage_records": 0,
     }
 
-    # 分析每个 run
-    for run in runs:
-        run_id = str(run["number"])
-        run_name = run["name"]
-        run_status = run["status"]
+    completed_runs = [run for run in runs if run["status"] == "completed"]
+    concurrency = max(1, int(os.getenv("ISSUELAB_STATS_CONCURRENCY", "8")))
+    semaphore = asyncio.Semaphore(concurrency)
+    all_records: list[dict] = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        collected = await asyncio.gather(
+            *(collect_run_usage(run, tmpdir, semaphore) for run in completed_runs), return_exceptions=True
+        )
 
-        # 只分析完成的 runs
-        if run_status != "completed":
+    for run, outcome in zip(completed_runs, collected, strict=True):
+        run_label = f"{run['name']} #{run['number']}"
+        if isinstance(outcome, BaseException):
+            print(f"  [{run_label}] Warning: 收集失败: {outcome}")
             continue
-
-        # 首先尝试从 artifacts 解析
-        artifact_stats = download_and_parse_artifacts(run_id)
-
-        if artifact_stats["runs_found"] > 0:
+        source, records, fallback = outcome
+        if source == "records":
             total_stats["workflows_analyzed"] += 1
             total_stats["artifacts_analyzed"] += 1
-            total_stats["runs_found"] += artifact_stats["runs_found"]
-            total_stats["cost_usd"] += artifact_stats["cost_usd"]
-            total_stats["total_turns"] += artifact_stats["total_turns"]
-            total_stats["total_tool_calls"] += artifact_stats["total_tool_calls"]
-            total_stats["total_input_tokens"] += artifact_stats.get("total_input_tokens", 0)
-            total_stats["total_output_tokens"] += artifact_stats.get("total_output_tokens", 0)
-            total_stats["total_tokens"] += artifact_stats.get("total_tokens", 0)
-
-            for agent, agent_stats in artifact_stats["agents"].items():
-                if agent not in total_stats["agents"]:
-                    total_stats["agents"][agent] = {
-                        "runs": 0,
-                        "cost_usd": 0.0,
-                        "total_turns": 0,
-                        "total_tool_calls": 0,
-                        "input_tokens": 0,
-                        "output_tokens": 0,
-                        "total_tokens": 0,
-                    }
-                for k, v in agent_stats.items():
-                    total_stats["agents"][agent][k] += v
-
-            print(f"  [{run_name} #{run_id}] +{artifact_stats['runs_found']} runs, ${artifact_stats['cost_usd']:.4f}")
-            continue
-
-        # 如果没有 artifact，从 job logs 解析
-        jobs = get_workflow_jobs(run_id)
-        run_has_stats = False
-
-        for job in jobs:
-            job_name = job.get("name", "")
-            job_status = job.get("status", "")
-            job_conclusion = job.get("conclusion", "")
-
-            if job_status != "completed" or job_conclusion != "success":
-                continue
-
-            # 只分析 agent 相关的 jobs
-            if not any(
-                keyword in job_name.lower() for keyword in ["agent", "moderator", "reviewer", "observer", "summarizer"]
-            ):
-                continue
-
-            logs = get_job_logs(run_id, job_name)
-            if not logs:
-                continue
+            all_records.extend(records)
+            print(f"  [{run_label}] +{len(records)} 条用量记录")
+        elif fallback["runs_found"] > 0:
+            total_stats["workflows_analyzed"] += 1
+            if source == "artifact-logs":
+                total_stats["artifacts_analyzed"] += 1
+            merge_stats(total_stats, fallback)
+            print(f"  [{run_label}] 从日志解析（兜底）+{fallback['runs_found']} runs, ${fallback['cost_usd']:.4f}")
 
-            parsed = parse_usage_from_log(logs)
-            if parsed["runs_found"] > 0:
-                run_has_stats = True
-                total_stats["workflows_analyzed"] += 1
-
-                for agent, agent_stats in parsed["agents"].items():
-                    if agent not in total_stats["agents"]:
-                        total_stats["agents"][agent] = {
-                            "runs": 0,
-                            "cost_usd": 0.0,
-                            "total_turns": 0,
-                            "total_tool_calls": 0,
-                            "input_tokens": 0,
-                            "output_tokens": 0,
-                            "total_tokens": 0,
-                        }
-                    for k, v in agent_stats.items():
-                        total_stats["agents"][agent][k] += v
-
-                total_stats["runs_found"] += parsed["runs_found"]
-                total_stats["cost_usd"] += parsed["cost_usd"]
-                total_stats["total_turns"] += parsed["total_turns"]
-                total_stats["total_tool_calls"] += parsed["total_tool_calls"]
-                total_stats["total_input_tokens"] += parsed.get("total_input_tokens", 0)
-                total_stats["total_output_tokens"] += parsed.get("total_output_tokens", 0)
-                total_stats["total_tokens"] += parsed.get("total_tokens", 0)
-
-        if run_has_stats:
-            print(f"  [{run_name} #{run_id}] 从日志解析完成")
+    if all_records:
+        record_stats = aggregate_usage_records(all_records)
+        total_stats["usage_records"] = record_stats["runs_found"]
+        merge_stats(total_stats, record_stats)
 
     # 3. 输出统计结果
     print("\n[3/3] 统计结果:")
@@ -412,6 +420,7 @@ async def main():
     print("\n分析时间范围: 最近 50 个 workflow runs")
     print(f"分析的工作流数: {total_stats['workflows_analyzed']}")
     print(f"解析的 artifacts 数: {total_stats['artifacts_analyzed']}")
+    print(f"结构化用量记录数: {total_stats['usage_records']}")
 
     if total_stats["runs_found"] == 0:
         print("\n注意: 未找到 Agent 使用统计。")
@@ -424,32 +433,7 @@ async def main():
         print("  - 在用户仓库中运行此脚本")
         print("  - 查看 Actions 页面中的 Debug 日志")
 
-    print("\n总使用量 (当前仓库):")
-    print(f"  - Agent 运行次数: {total_stats['runs_found']}")
-    print(f"  - 总成本: ${total_stats['cost_usd']:.4f}")
-    print(f"  - 总对话轮数: {total_stats['total_turns']}")
-    print(f"  - 总工具调用次数: {total_stats['total_tool_calls']}")
-    print(f"  - 输入Token: {total_stats['total_input_tokens']}")
-    print(f"  - 输出Token: {total_stats['total_output_tokens']}")
-    print(f"  - 总Token: {total_stats['total_tokens']}")
-
-    if total_stats["agents"]:
-        print("\n按 Agent 统计:")
-        print(
-            f"{'Agent':<20} {'运行次数':>8} {'成本(USD)':>12} {'轮数':>8} {'工具调用':>8} "
-            f"{'输入Tok':>10} {'输出Tok':>10} {'总Tok':>10}"
-        )
-        print("-" * 60)
-
-        for agent in sorted(total_stats["agents"].keys()):
-            stats = total_stats["agents"][agent]
-            print(
-                f"{agent:<20} {stats['runs']:>8} ${stats['cost_usd']:>10.4f} {stats['total_turns']:>8} "
-                f"{stats['total_tool_calls']:>8} {stats['input_tokens']:>10} {stats['output_tokens']:>10} "
-                f"{stats['total_tokens']:>10}"
-            )
-
-    print("\n" + "=" * 60)
+    print_stats(total_stats, header=False)
 
     # 保存结果到 JSON
     output_file = "/tmp/agent_usage_stats.json"
@@ -458,32 +442,23 @@ async def main():
     print(f"\n详细结果已保存到: {output_file}")
 
 
-if __name__ == "__main__":
-    asyncio.run(main())
-
-
 def parse_local_input() -> dict:
-    """从 stdin 解析本地运行日志"""
-    log = sys.stdin.read()
-    if not log:
-        return {
-            "runs_found": 0,
-            "cost_usd": 0.0,
-            "total_turns": 0,
-            "total_tool_calls": 0,
-            "total_input_tokens": 0,
-            "total_output_tokens": 0,
-            "total_tokens": 0,
-            "agents": {},
-        }
-    return parse_usage_from_log(log)
+    """从 stdin 解析本地 usage.jsonl 或运行日志"""
+    text = sys.stdin.read()
+    if not text:
+        return empty_usage_stats()
+    records = parse_usage_records(text)
+    if records:
+        return aggregate_usage_records(records)
+    return parse_usage_from_log(text)
 
 
-def print_stats(stats: dict):
+def print_stats(stats: dict, header: bool = True):
     """打印统计结果"""
-    print("=" * 60)
-    print("Agent 使用统计结果")
-    print("=" * 60)
+    if header:
+        print("=" * 60)
+        print("Agent 使用统计结果")
+        print("=" * 60)
 
     print("\n总使用量:")
     print(f"  - Agent 运行次数: {stats['runs_found']}")
@@ -513,10 +488,144 @@ def print_stats(stats: dict):
     print("\n" + "=" * 60)
 
 
-if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "--local":
+def fallback_stats_to_records(run_id: str, stats: dict) -> list[dict]:
+    """正则兜底统计转为用量记录（每个 agent 一条汇总，无耗时信息；时间由 ingest_run 取 run 的开始时间）"""
+    return [
+        {
+            "record_id": f"{run_id}:{agent}:log",
+            "agent": agent,
+            "cost_usd": agent_stats["cost_usd"],
+            "num_turns": agent_stats["total_turns"],
+            "tool_calls": agent_stats["total_tool_calls"],
+            "input_tokens": agent_stats["input_tokens"],
+            "output_tokens": agent_stats["output_tokens"],
+            "total_tokens": agent_stats["total_tokens"],
+        }
+        for agent, agent_stats in stats["agents"].items()
+    ]
+
+
+async def ingest(limit: int, db_path: str | None) -> int:
+    """增量导入最近 limit 个 runs 到本地仓库（已导入的 run 跳过），返回新导入的 run 数"""
+    runs = [run for run in get_workflow_runs(limit) if run["status"] == "completed"]
+    with UsageStore(db_path) as store:
+        seen = store.ingested_run_ids()
+        pending = [run for run in runs if get_run_id(run) not in seen]
+        print(f"找到 {len(runs)} 个已完成 runs，其中 {len(runs) - len(pending)} 个已导入，{len(pending)} 个待导入")
+
+        concurrency = max(1, int(os.getenv("ISSUELAB_STATS_CONCURRENCY", "8")))
+        semaphore = asyncio.Semaphore(concurrency)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            collected = await asyncio.gather(
+                *(collect_run_usage(run, tmpdir, semaphore) for run in pending), return_exceptions=True
+            )
+
+        ingested = 0
+        for run, outcome in zip(pending, collected, strict=True):
+            run_id = get_run_id(run)
+            if isinstance(outcome, BaseException):
+                # 不标记为已导入，下次重试
+                print(f"  [{run['name']} #{run_id}] Warning: 收集失败: {outcome}")
+                continue
+            source, records, fallback = outcome
+            if source != "records":
+                records = fallback_stats_to_records(run_id, fallback)
+            added = store.ingest_run(
+                run_id, records, workflow=run.get("workflowName"), started_at=run.get("startedAt"), source=source
+            )
+            ingested += 1
+            print(f"  [{run['name']} #{run_id}] {source}: +{added} 条")
+    return ingested
+
+
+def ingest_files(paths: list[str], db_path: str | None) -> int:
+    """导入本地 usage.jsonl 文件（按 record_id 去重，可重复执行）"""
+    total = 0
+    with UsageStore(db_path) as store:
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                records = parse_usage_records(f.read())
+            added = store.ingest_run(f"file:{os.path.abspath(path)}", records, source="file")
+            print(f"  {path}: +{added} 条")
+            total += added
+    return total
+
+
+def _format_table(rows: list[dict]) -> str:
+    if not rows:
+        return "（无数据）"
+    columns = list(rows[0].keys())
+    cells = [[_format_cell(row.get(col)) for col in columns] for row in rows]
+    widths = [max(len(col), *(len(line[i]) for line in cells)) for i, col in enumerate(columns)]
+    lines = ["  ".join(col.ljust(widths[i]) for i, col in enumerate(columns))]
+    lines.append("  ".join("-" * width for width in widths))
+    lines.extend("  ".join(line[i].ljust(widths[i]) for i in range(len(columns))) for line in cells)
+    return "\n".join(line.rstrip() for line in lines)
+
+
+def _format_cell(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.4f}"
+    if isinstance(value, dict):
+        return ", ".join(f"{k}={v}" for k, v in value.items())
+    return str(value)
+
+
+QUERIES = {
+    "durations": UsageStore.duration_percentiles,
+    "cost-per-issue": UsageStore.cost_per_issue,
+    "tokens-per-turn": UsageStore.tokens_per_turn,
+    "failure-rate": UsageStore.failure_rate,
+}
+
+
+def run_query(name: str, since: str | None, until: str | None, db_path: str | None, as_json: bool) -> None:
+    with UsageStore(db_path) as store:
+        rows = QUERIES[name](store, parse_time_bound(since), parse_time_bound(until))
+    if as_json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+    else:
+        print(_format_table(rows))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="GitHub Actions Agent 使用统计")
+    parser.add_argument("--local", action="store_true", help="从 stdin 读取 usage.jsonl 或运行日志")
+    subparsers = parser.add_subparsers(dest="command")
+
+    ingest_parser = subparsers.add_parser("ingest", help="增量导入到本地用量仓库")
+    ingest_parser.add_argument("--limit", type=int, default=200, help="检查最近多少个 workflow runs")
+    ingest_parser.add_argument("--file", nargs="+", default=[], help="改为导入本地 usage.jsonl 文件")
+    ingest_parser.add_argument("--db", default=None, help="仓库路径（默认 ISSUELAB_USAGE_DB 或 .issuelab/usage.db）")
+
+    query_parser = subparsers.add_parser("query", help="查询本地用量仓库")
+    query_parser.add_argument("name", choices=sorted(QUERIES))
+    query_parser.add_argument("--since", default=None, help="起始时间：7d / 24h / 2w 或 ISO 日期")
+    query_parser.add_argument("--until", default=None, help="结束时间（不含）：格式同 --since")
+    query_parser.add_argument("--db", default=None, help="仓库路径（默认 ISSUELAB_USAGE_DB 或 .issuelab/usage.db）")
+    query_parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    return parser
+
+
+def cli() -> None:
+    """命令行入口：按子命令分派"""
+    args = build_parser().parse_args()
+    if args.local:
         # 本地模式：从 stdin 读取
         stats = parse_local_input()
         print_stats(stats)
+    elif args.command == "ingest":
+        if args.file:
+            ingest_files(args.file, args.db)
+        else:
+            asyncio.run(ingest(args.limit, args.db))
+    elif args.command == "query":
+        run_query(args.name, args.since, args.until, args.db, args.json)
     else:
         asyncio.run(main())
+
+
+if __name__ == "__main__":
+    from issuelab.profiling import run_profiled
+
+    run_profiled("stats_agent_usage", cli)
@@ -4,11 +4,9 @@ import argparse
 import json
 import os
 
-from issuelab.commands.core import handle_execute, handle_list_agents, handle_review
-from issuelab.commands.observer import handle_observe, handle_observe_batch
-from issuelab.commands.personal import handle_personal_reply, handle_personal_scan
 from issuelab.config import Config
 from issuelab.logging_config import get_logger, setup_logging
+from issuelab.profiling import profile_session
 from issuelab.tools.github import get_issue_info
 
 # 初始化日志
@@ -48,24 +46,42 @@ def _prepare_issue_execution_context(issue_number: int) -> tuple[dict, str, str,
     """Load issue info and write context file for agent execution commands."""
     print(f"[INFO] 正在获取 Issue #{issue_number} 信息...")
     issue_info = get_issue_info(issue_number, format_comments=True)
+    from issuelab.context_builder import build_issue_context_reference, comments_for_context
     from issuelab.tools.github import write_issue_context_file
 
     issue_file = write_issue_context_file(
         issue_number=issue_number,
         title=issue_info.get("title", ""),
         body=issue_info.get("body", ""),
-        comments=issue_info.get("comments", ""),
+        comments=comments_for_context(issue_info, trigger_comment=Config.get_trigger_comment()),
         comment_count=issue_info.get("comment_count", 0),
     )
-    context = f"**Issue 内容文件**: {issue_file}\n请使用 Read 工具读取该文件后再进行分析。"
+    context, inlined = build_issue_context_reference(issue_file)
     comments = issue_info.get("comments", "")
     comment_count = issue_info.get("comment_count", 0)
     print(f"[OK] 已获取: 标题={issue_info.get('title', '')[:30]}..., 评论数={comment_count}")
+    if inlined:
+        print("[INFO] Issue 上下文较小，已直接内联到 prompt（跳过 Read 工具轮次）")
     return issue_info, issue_file, context, comments, comment_count
 
 
-def main():
-    parser = argparse.ArgumentParser(description="Issue Lab Agent")
+class _EventArgumentParser(argparse.ArgumentParser):
+    """解析队列事件用：参数错误抛 ValueError，不退出常驻进程"""
+
+    def error(self, message: str):
+        raise ValueError(message)
+
+    def exit(self, status: int = 0, message: str | None = None):
+        raise ValueError(message or f"exit {status}")
+
+
+def build_parser(parser_class: type[argparse.ArgumentParser] = argparse.ArgumentParser) -> argparse.ArgumentParser:
+    parser = parser_class(description="Issue Lab Agent")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="剖析本次运行并写出报告到 .issuelab/profiles/（也可用 ISSUELAB_PROFILE=1 开启）",
+    )
     subparsers = parser.add_subparsers(dest="command", help="可用命令")
 
     execute_parser = subparsers.add_parser("execute", help="并行执行代理")
@@ -118,37 +134,122 @@ def main():
     )
     personal_reply_parser.add_argument("--post", action="store_true", help="自动发布回复到主仓库")
 
-    args = parser.parse_args()
+    serve_parser = subparsers.add_parser("serve", help="常驻 worker：从本地事件队列领取并执行事件")
+    serve_parser.add_argument(
+        "--queue", type=str, default=None, help="队列文件（默认 ISSUELAB_QUEUE_DB 或 .issuelab/queue.db）"
+    )
+    serve_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=os.environ.get("ISSUELAB_SERVE_CONCURRENCY", "2"),
+        help="同时执行的事件数（默认 2，可用 ISSUELAB_SERVE_CONCURRENCY 覆盖）",
+    )
+    serve_parser.add_argument("--poll-interval", type=float, default=0.5, help="队列轮询间隔秒数（默认 0.5）")
+    serve_parser.add_argument(
+        "--webhook-port",
+        type=int,
+        default=os.environ.get("ISSUELAB_WEBHOOK_PORT") or None,
+        help="启动 webhook 接收端的端口（默认不启动，可用 ISSUELAB_WEBHOOK_PORT 设置）",
+    )
+    serve_parser.add_argument(
+        "--webhook-host", type=str, default="127.0.0.1", help="webhook 监听地址（默认 127.0.0.1）"
+    )
+    serve_parser.add_argument("--once", action="store_true", help="处理完队列中现有事件后退出")
+    serve_parser.add_argument("--no-warm", action="store_true", help="跳过启动预热（注册表、SDK options）")
+    serve_parser.add_argument(
+        "--recover",
+        action="store_true",
+        help="启动时把已失效 worker 遗留的 running 事件放回队列（本机进程已退出或运行超过租约）",
+    )
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="向本地事件队列加入一个事件")
+    enqueue_parser.add_argument(
+        "--queue", type=str, default=None, help="队列文件（默认 ISSUELAB_QUEUE_DB 或 .issuelab/queue.db）"
+    )
+    enqueue_parser.add_argument(
+        "--trigger-comment", type=str, default=None, help="触发评论正文（替代 ISSUELAB_TRIGGER_COMMENT）"
+    )
+    enqueue_parser.add_argument(
+        "event", nargs=argparse.REMAINDER, help="事件命令行，如: execute --issue 12 --agents moderator --post"
+    )
+    return parser
+
 
+def parse_event_argv(argv: list[str]) -> argparse.Namespace:
+    """按 CLI 规则解析队列事件的 argv（enqueue / webhook / serve 共用），不合法时抛 ValueError"""
+    from issuelab.event_queue import SERVE_COMMANDS
+
+    if not argv or argv[0] not in SERVE_COMMANDS:
+        raise ValueError(f"事件命令必须是 {', '.join(SERVE_COMMANDS)} 之一: {argv[:1]}")
+    return build_parser(_EventArgumentParser).parse_args(argv)
+
+
+def run_event(argv: list[str]):
+    """在当前进程内执行一个队列事件（与命令行调用走同一分派逻辑）"""
+    return _run_command(parse_event_argv(argv))
+
+
+def main():
+    args = build_parser().parse_args()
+    with profile_session(f"issuelab-{args.command or 'help'}", enabled=args.profile or None):
+        return _run_command(args)
+
+
+def _run_command(args: argparse.Namespace):
+    # 各子命令只导入自己需要的模块：list-agents 等轻量命令不加载执行器与 SDK
     if args.command == "execute":
+        from issuelab.commands.core import handle_execute
+
         _, _, context, _, comment_count = _prepare_issue_execution_context(args.issue)
         return handle_execute(args, context, comment_count, parse_agents_arg)
 
     if args.command == "review":
+        from issuelab.commands.core import handle_review
+
         _, _, context, _, comment_count = _prepare_issue_execution_context(args.issue)
         handle_review(args, context, comment_count)
         return None
 
     if args.command == "observe":
+        from issuelab.commands.observer import handle_observe
+
         issue_info, issue_file, _, comments, _ = _prepare_issue_execution_context(args.issue)
         handle_observe(args, issue_info, issue_file, comments)
         return None
 
     if args.command == "observe-batch":
+        from issuelab.commands.observer import handle_observe_batch
+
         handle_observe_batch(args)
         return None
 
     if args.command == "personal-scan":
+        from issuelab.commands.personal import handle_personal_scan
+
         return handle_personal_scan(args)
 
     if args.command == "personal-reply":
+        from issuelab.commands.personal import handle_personal_reply
+
         return handle_personal_reply(args)
 
     if args.command == "list-agents":
+        from issuelab.commands.list_agents import handle_list_agents
+
         handle_list_agents()
         return None
 
-    parser.print_help()
+    if args.command == "serve":
+        from issuelab.commands.serve import handle_serve
+
+        return handle_serve(args, parse_event_argv, run_event)
+
+    if args.command == "enqueue":
+        from issuelab.commands.serve import handle_enqueue
+
+        return handle_enqueue(args, parse_event_argv)
+
+    build_parser().print_help()
     return None
 
 
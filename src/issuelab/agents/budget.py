@@ -0,0 +1,102 @@
+"""批次预算账本 - 为一次多 agent 批次设置总成本上限
+
+单个 agent 的 max_budget_usd 只约束自身；账本在批次内共享（通过 contextvar 传递给
+run_single_agent），每收到一条 ResultMessage 就记账。总成本超过上限后：
+- 取消仍在运行的其他 agent（各自的 anyio CancelScope）
+- 之后启动的查询（流水线下游、多阶段的后续阶段）直接以 budget 失败返回
+"""
+
+import os
+from contextvars import ContextVar
+
+import anyio
+
+from issuelab.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+current_budget_ledger: ContextVar["BudgetLedger | None"] = ContextVar("current_budget_ledger", default=None)
+
+
+def get_wave_budget_usd() -> float | None:
+    """读取批次总预算（ISSUELAB_WAVE_BUDGET_USD，未设置或 <=0 表示不限制）"""
+    try:
+        value = float(os.environ.get("ISSUELAB_WAVE_BUDGET_USD", "0"))
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+# 估算成本的默认单价（美元 / 百万 token，按 Sonnet 级模型取值）；缓存读取按输入的 0.1 倍、写入按 1.25 倍计
+_DEFAULT_INPUT_USD_PER_MTOK = 3.0
+_DEFAULT_OUTPUT_USD_PER_MTOK = 15.0
+
+
+def _env_price(name: str, default: float) -> float:
+    try:
+        value = float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value >= 0 else default
+
+
+def estimate_cost_usd(
+    input_tokens: int, output_tokens: int, cache_read_input_tokens: int = 0, cache_creation_input_tokens: int = 0
+) -> float:
+    """在拿不到 ResultMessage 的实际成本时（如输出治理中止了查询）按 token 数估算成本
+
+    单价可用 ISSUELAB_ESTIMATE_INPUT_USD_PER_MTOK / ISSUELAB_ESTIMATE_OUTPUT_USD_PER_MTOK 覆盖。
+    """
+    input_price = _env_price("ISSUELAB_ESTIMATE_INPUT_USD_PER_MTOK", _DEFAULT_INPUT_USD_PER_MTOK)
+    output_price = _env_price("ISSUELAB_ESTIMATE_OUTPUT_USD_PER_MTOK", _DEFAULT_OUTPUT_USD_PER_MTOK)
+    weighted_input = input_tokens + 0.1 * cache_read_input_tokens + 1.25 * cache_creation_input_tokens
+    return (weighted_input * input_price + output_tokens * output_price) / 1_000_000
+
+
+class BudgetLedger:
+    """批次共享的成本账本"""
+
+    def __init__(self, cap_usd: float | None) -> None:
+        self.cap_usd = cap_usd
+        self.spent_usd = 0.0
+        self.spent_by_agent: dict[str, float] = {}
+        self.exceeded = False
+        self._scopes: dict[str, anyio.CancelScope] = {}
+
+    def register(self, agent_name: str, scope: anyio.CancelScope) -> None:
+        self._scopes[agent_name] = scope
+
+    def unregister(self, agent_name: str) -> None:
+        self._scopes.pop(agent_name, None)
+
+    def charge(self, agent_name: str, cost_usd: float) -> None:
+        """记账；首次超过上限时取消其他仍在运行的 agent（记账方自身的结果已产生，予以保留）"""
+        if cost_usd <= 0:
+            return
+        self.spent_usd += cost_usd
+        self.spent_by_agent[agent_name] = self.spent_by_agent.get(agent_name, 0.0) + cost_usd
+        if self.cap_usd is None or self.exceeded or self.spent_usd < self.cap_usd:
+            return
+        self.exceeded = True
+        running = [name for name in self._scopes if name != agent_name]
+        logger.warning(
+            f"[Budget] 批次成本 ${self.spent_usd:.4f} 已达上限 ${self.cap_usd:.4f}（由 {agent_name} 触发），"
+            f"取消运行中的 agent: {', '.join(running) or '无'}"
+        )
+        for name in running:
+            self._scopes[name].cancel()
+
+    def failure_result(self, agent_name: str, cost_usd: float = 0.0) -> dict:
+        """预算耗尽时的失败结果（与 run_single_agent 失败结构一致；cost_usd 为被取消前已产生的成本）"""
+        message = f"批次预算已耗尽（已花费 ${self.spent_usd:.4f} / 上限 ${self.cap_usd or 0:.4f}）"
+        return {
+            "ok": False,
+            "error_type": "budget",
+            "error_message": message,
+            "response": f"[系统护栏] Agent {agent_name} 未完成：{message}",
+            "cost_usd": cost_usd,
+            "num_turns": 0,
+            "tool_calls": [],
+            "session_id": "",
+            "text_blocks": [],
+        }
@@ -0,0 +1,117 @@
+"""Agent 终端输出复用
+
+多个 agent 并行运行时，逐块 print 到 stderr 会让各自的流式文本交错在一起。
+每次 agent 运行通过各自的 AgentConsole 缓冲输出，在一轮结束、缓冲超过阈值或运行结束时
+持锁整块写出；输出方切换时先写一行 agent 标签，块与块之间不会交错。
+运行结束（含超时、异常与取消）时写出剩余缓冲，进程退出时兜底写出所有未结束运行的缓冲。
+
+ISSUELAB_AGENT_OUTPUT：block（默认，按块输出）、stream（即时输出，仍带标签）、off（不输出）。
+"""
+
+import atexit
+import os
+import sys
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TextIO
+
+_MAX_BUFFER_CHARS = 8192
+
+_write_lock = threading.Lock()
+_last_label: str | None = None
+_line_open = False
+_consoles: list["AgentConsole"] = []
+_consoles_lock = threading.Lock()
+_current_console: ContextVar["AgentConsole | None"] = ContextVar("issuelab_agent_console", default=None)
+
+
+def get_output_mode() -> str:
+    """终端输出模式（ISSUELAB_AGENT_OUTPUT：block / stream / off，默认 block）"""
+    mode = os.environ.get("ISSUELAB_AGENT_OUTPUT", "block").strip().lower()
+    return mode if mode in {"block", "stream", "off"} else "block"
+
+
+def _emit(label: str, text: str, stream: TextIO) -> None:
+    global _last_label, _line_open
+    with _write_lock:
+        if label != _last_label:
+            prefix = "\n" if _line_open else ""
+            text = f"{prefix}──── [{label}] ────\n{text}"
+            _last_label = label
+        stream.write(text)
+        stream.flush()
+        _line_open = not text.endswith("\n")
+
+
+class AgentConsole:
+    """单次 agent 运行的终端输出缓冲（写 stderr，避免污染 stdout）"""
+
+    def __init__(self, label: str, stream: TextIO | None = None, max_buffer_chars: int = _MAX_BUFFER_CHARS) -> None:
+        self.label = label
+        self.max_buffer_chars = max_buffer_chars
+        self._stream = stream
+        self._parts: list[str] = []
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> None:
+        mode = get_output_mode()
+        if not text or mode == "off":
+            return
+        with self._lock:
+            self._parts.append(text)
+            self._size += len(text)
+            full = self._size >= self.max_buffer_chars
+        if mode == "stream" or full:
+            self.flush()
+
+    def flush(self) -> None:
+        """把缓冲内容作为一个整块写出"""
+        with self._lock:
+            if not self._parts:
+                return
+            text = "".join(self._parts)
+            self._parts.clear()
+            self._size = 0
+        # 每次写出时再取 sys.stderr，兼容测试捕获与运行中的重定向
+        _emit(self.label, text, self._stream or sys.stderr)
+
+
+@contextmanager
+def agent_console(label: str) -> Iterator[AgentConsole]:
+    """为一次运行创建独立的 AgentConsole 并设为当前 console
+
+    同名 agent 并发运行（serve 同时处理多个事件、对冲尝试）时各用各的缓冲，标签追加 #序号区分。
+    退出时（含异常与取消）写出剩余缓冲并注销。
+    """
+    with _consoles_lock:
+        taken = {console.label for console in _consoles}
+        name, index = label, 2
+        while name in taken:
+            name, index = f"{label}#{index}", index + 1
+        console = AgentConsole(name)
+        _consoles.append(console)
+    token = _current_console.set(console)
+    try:
+        yield console
+    finally:
+        _current_console.reset(token)
+        with _consoles_lock:
+            _consoles.remove(console)
+        console.flush()
+
+
+def current_agent_console() -> AgentConsole | None:
+    """当前运行的 AgentConsole（不在 agent_console 内时为 None）"""
+    return _current_console.get()
+
+
+@atexit.register
+def flush_all() -> None:
+    """写出所有未结束运行的缓冲（进程退出时调用）"""
+    with _consoles_lock:
+        consoles = list(_consoles)
+    for console in consoles:
+        console.flush()
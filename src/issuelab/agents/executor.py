@@ -4,9 +4,12 @@
 """
 
 import asyncio
+import json
 import os
 import re
-import sys
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import asdict
 from pathlib import Path
 from typing import Any, cast
 
@@ -19,14 +22,28 @@ from claude_agent_sdk import (
     ThinkingBlock,
     ToolResultBlock,
     ToolUseBlock,
+    UserMessage,
     query,
 )
 
+from issuelab.agents.budget import BudgetLedger, current_budget_ledger, estimate_cost_usd, get_wave_budget_usd
 from issuelab.agents.config import AgentConfig
-from issuelab.agents.options import create_agent_options, format_mcp_servers_for_prompt
+from issuelab.agents.console import AgentConsole, agent_console
+from issuelab.agents.options import create_agent_options, format_mcp_servers_for_prompt, get_stage_run_overrides
 from issuelab.agents.registry import get_agent_config, is_system_agent
-from issuelab.logging_config import get_logger
+from issuelab.agents.replay import ReplayNotFoundError, get_query_backend, record_stream, replay_stream
+from issuelab.agents.run_stats import adaptive_timeouts, record_run
+from issuelab.agents.singleflight import is_singleflight_enabled, request_key, run_once
+from issuelab.agents.stage_digest import format_stage_handoff
+from issuelab.agents.tool_metrics import ToolMetrics, publish_run_tool_metrics, result_size_chars
+from issuelab.agents.usage import append_usage_record, build_usage_record, current_usage_issue
+from issuelab.config import Config
+from issuelab.context_builder import estimate_tokens
+from issuelab.logging_config import get_logger, lazy
 from issuelab.retry import retry_async
+from issuelab.tools.github import MAX_COMMENT_LENGTH
+from issuelab.tools.link_checker import LinkStatus, check_links, format_link_status_table, is_link_check_enabled
+from issuelab.tracing import record_span, span
 from issuelab.utils.yaml_text import extract_yaml_block
 
 logger = get_logger(__name__)
@@ -71,6 +88,18 @@ _OUTPUT_SCHEMA_BLOCK_HYBRID = (
 )
 
 _DEFAULT_ATTEMPT_TIMEOUT_SECONDS = 90
+# gqy20 多阶段中可被自适应策略跳过的阶段，以及快速路径允许的最大上下文长度
+_GQY20_OPTIONAL_STAGES = ("Analyst", "Critic", "Verifier")
+_ADAPTIVE_FAST_MAX_CONTEXT_CHARS = 6000
+_SKIPPED_STAGE_PREFIX = "[skipped]"
+# 累计输出超过发布上限的该倍数时中止生成（留出余量，避免刚好越线就打断收尾）
+_OUTPUT_GOVERNOR_TOLERANCE = 1.2
+
+# 单个 agent 完成时的回调：(agent_name, result) -> None
+AgentResultCallback = Callable[[str, dict], Awaitable[None]]
+# 流式文本回调：(当前尝试的累计文本) -> None；带 agent 名称的版本用于多 agent 批次
+TextCallback = Callable[[str], Awaitable[None]]
+AgentTextCallback = Callable[[str, str], Awaitable[None]]
 
 
 def _classify_run_exception(exc: Exception) -> str:
@@ -78,11 +107,24 @@ def _classify_run_exception(exc: Exception) -> str:
         return "timeout"
     if isinstance(exc, asyncio.CancelledError):
         return "timeout"
+    if isinstance(exc, ReplayNotFoundError):
+        return "replay_missing"
     return "unknown"
 
 
 def _should_retry_run_exception(exc: Exception) -> bool:
-    return not isinstance(exc, TimeoutError | asyncio.CancelledError)
+    return not isinstance(exc, TimeoutError | asyncio.CancelledError | ReplayNotFoundError)
+
+
+def _open_query_stream(prompt: str, options: Any, *, agent_name: str, stage_name: str | None) -> Any:
+    """按查询后端（live / record / replay）打开消息流"""
+    backend = get_query_backend()
+    if backend == "replay":
+        return replay_stream(agent_name, stage_name, prompt)
+    stream = query(prompt=prompt, options=options)
+    if backend == "record":
+        return record_stream(stream, agent_name, stage_name, prompt)
+    return stream
 
 
 def _normalize_output_format(value: Any) -> str:
@@ -252,12 +294,39 @@ def _append_output_schema(
     mentions_mode: str = "controlled",
     output_template: str | None = None,
     section_order: list[str] | None = None,
+    output_limit_chars: int | None = None,
 ) -> str:
-    """为 prompt 注入统一输出格式（如果尚未注入）。"""
+    """为 prompt 注入统一输出格式（如果尚未注入）。
+
+    output_limit_chars: 发布长度上限，提前告知模型（仅对会被发布的最终输出生效）。
+    """
     if "## Output Format (required)" in prompt:
         return prompt
     if stage_name:
         return f"{prompt}{_OUTPUT_SCHEMA_BLOCK_YAML}"
+    schema = _render_output_schema(
+        agent_name,
+        output_format=output_format,
+        mentions_mode=mentions_mode,
+        output_template=output_template,
+        section_order=section_order,
+    )
+    if output_limit_chars:
+        schema += (
+            f"- 输出长度上限：约 {output_limit_chars} 字符（GitHub 评论上限），超出部分会被截断且生成将被中止；"
+            "请精简表述，优先保证核心结论与来源完整\n"
+        )
+    return f"{prompt}{schema}"
+
+
+def _render_output_schema(
+    agent_name: str,
+    *,
+    output_format: str,
+    mentions_mode: str,
+    output_template: str | None,
+    section_order: list[str] | None,
+) -> str:
 
     mention_instruction = {
         "controlled": "- 如需触发协作，仅在文末使用受控区：`---\\n相关人员: @user1 @user2` 或 `协作请求:` 列表\n",
@@ -266,7 +335,7 @@ def _append_output_schema(
     }.get(mentions_mode, "- 如需触发协作，仅在文末使用受控区：`---\\n相关人员: @user1 @user2` 或 `协作请求:` 列表\n")
 
     if output_format == "yaml":
-        return f"{prompt}{_OUTPUT_SCHEMA_BLOCK_YAML}"
+        return _OUTPUT_SCHEMA_BLOCK_YAML
 
     template = _resolve_output_template(agent_name, output_template)
     if template:
@@ -274,19 +343,138 @@ def _append_output_schema(
             template, mentions_mode=mentions_mode, output_format=output_format, section_order_override=section_order
         )
         if rendered:
-            return f"{prompt}{rendered}"
+            return rendered
 
     if output_format == "hybrid":
-        return f"{prompt}{_OUTPUT_SCHEMA_BLOCK_HYBRID}{mention_instruction}"
-    return f"{prompt}{_OUTPUT_SCHEMA_BLOCK_MARKDOWN}{mention_instruction}"
+        return f"{_OUTPUT_SCHEMA_BLOCK_HYBRID}{mention_instruction}"
+    return f"{_OUTPUT_SCHEMA_BLOCK_MARKDOWN}{mention_instruction}"
+
+
+async def _notify_text(on_text: TextCallback | None, text: str, agent_name: str) -> None:
+    """调用流式文本回调；回调失败只记录日志，不影响 Agent 运行。"""
+    if on_text is None:
+        return
+    try:
+        await on_text(text)
+    except Exception as exc:
+        logger.warning(f"[{agent_name}] 流式文本回调失败: {exc}")
+
+
+def _cache_hit_ratio(input_tokens: int, cache_read_tokens: int, cache_creation_tokens: int) -> float:
+    """缓存命中率：缓存读取 Token 占全部输入 Token（未缓存 + 读取 + 写入）的比例"""
+    prompt_tokens = input_tokens + cache_read_tokens + cache_creation_tokens
+    return cache_read_tokens / prompt_tokens if prompt_tokens else 0.0
+
+
+def _apply_estimated_usage(
+    info: dict[str, Any],
+    usages: Iterable[dict[str, Any]],
+    output_text: str,
+    turn_count: int,
+    *,
+    prompt_text: str = "",
+) -> None:
+    """查询被中止（无 ResultMessage）时，用流式消息里的用量估算 token 与成本，写入 info 并标记 cost_estimated
+
+    流式用量缺少输出 token 时按已输出文本估算；缺少输入 token 且给出 prompt_text 时按 prompt 估算。
+    """
+    totals = dict.fromkeys(
+        ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens"), 0
+    )
+    for usage in usages:
+        for key in totals:
+            totals[key] += int(usage.get(key) or 0)
+    if not totals["output_tokens"]:
+        totals["output_tokens"] = estimate_tokens(output_text)
+    if not totals["input_tokens"] and prompt_text:
+        totals["input_tokens"] = estimate_tokens(prompt_text)
+    info.update(totals)
+    info["total_tokens"] = totals["input_tokens"] + totals["output_tokens"]
+    info["num_turns"] = turn_count
+    info["cost_usd"] = estimate_cost_usd(**totals)
+    info["cost_estimated"] = True
+
+
+def _new_attempt_state() -> dict[str, Any]:
+    """单次查询尝试的统计（对冲执行时每个尝试独立累计，胜出者再写回 execution_info）"""
+    return {
+        "session_id": "",
+        "cost_usd": 0.0,
+        "num_turns": 0,
+        "tool_calls": [],
+        "text_blocks": [],
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "total_tokens": 0,
+        "cache_read_input_tokens": 0,
+        "cache_creation_input_tokens": 0,
+        # 内部字段（下划线开头，不写回 execution_info）
+        "_streamed_usage": {},
+    }
+
+
+def _get_output_limit_chars(agent_name: str) -> int | None:
+    """发布长度上限：agent.yml max_output_chars > MAX_COMMENT_LENGTH；ISSUELAB_OUTPUT_GOVERNOR=0 关闭"""
+    if os.environ.get("ISSUELAB_OUTPUT_GOVERNOR", "1").lower() in {"0", "false", "no", "off"}:
+        return None
+    try:
+        config = get_agent_config(agent_name)
+    except Exception:
+        config = None
+    if config and "max_output_chars" in config:
+        try:
+            value = int(config["max_output_chars"])
+            return value if value > 0 else None
+        except (TypeError, ValueError):
+            pass
+    return MAX_COMMENT_LENGTH
+
 
+def _get_hedge_stall_seconds(agent_name: str) -> float:
+    """对冲执行的停滞阈值：agent.yml hedge_stall_seconds > ISSUELAB_HEDGE_STALL_SECONDS；0 表示关闭（默认）"""
+    value: Any = os.environ.get("ISSUELAB_HEDGE_STALL_SECONDS", "0")
+    try:
+        config = get_agent_config(agent_name)
+    except Exception:
+        config = None
+    if config and "hedge_stall_seconds" in config:
+        value = config["hedge_stall_seconds"]
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _bind_agent_text_callback(on_text: AgentTextCallback | None, agent_name: str) -> TextCallback | None:
+    if on_text is None:
+        return None
 
-async def run_single_agent(prompt: str, agent_name: str, *, stage_name: str | None = None) -> dict:
+    async def _callback(text: str) -> None:
+        await on_text(agent_name, text)
+
+    return _callback
+
+
+async def run_single_agent(
+    prompt: str,
+    agent_name: str,
+    *,
+    stage_name: str | None = None,
+    on_text: TextCallback | None = None,
+    model: str | None = None,
+    max_turns: int | None = None,
+    max_budget_usd: float | None = None,
+) -> dict:
     """运行单个代理（带完善的中间日志监听）
 
+    相同请求（agent、阶段、覆盖参数与 prompt 均一致）并发到达时经 single-flight 合并：
+    只运行一次模型，其余请求复用其结果（结果带 singleflight_reused，cost_usd 记为 0）。
+
     Args:
         prompt: 用户提示词
         agent_name: 代理名称
+        on_text: 流式文本回调（开始时以空文本调用一次，之后每个文本块传入当前累计文本）
+        model / max_turns / max_budget_usd: 本次运行的覆盖参数（多阶段按阶段分级时使用）
 
     Returns:
         {
@@ -297,6 +485,65 @@ async def run_single_agent(prompt: str, agent_name: str, *, stage_name: str | No
             "local_id": str,  # 会话 ID
         }
     """
+
+    async def _run() -> dict:
+        with span(
+            f"stage:{stage_name}" if stage_name else "agent.run",
+            cat="agent",
+            lane=agent_name,
+            agent=agent_name,
+            stage=stage_name,
+            model=model,
+        ) as run_span:
+            result = await _run_single_agent_uncoalesced(
+                prompt,
+                agent_name,
+                stage_name=stage_name,
+                on_text=on_text,
+                model=model,
+                max_turns=max_turns,
+                max_budget_usd=max_budget_usd,
+            )
+            run_span.set(
+                cost_usd=result.get("cost_usd"),
+                num_turns=result.get("num_turns"),
+                error_type=result.get("error_type"),
+            )
+            if not result.get("ok", True):
+                run_span.status = "error"
+            return result
+
+    started_at = time.monotonic()
+    if is_singleflight_enabled():
+        key = request_key(agent_name, stage_name, model, max_turns, max_budget_usd, prompt)
+        result = await run_once(key, _run, label=agent_name)
+        if result.get("singleflight_reused"):
+            await _notify_text(on_text, str(result.get("response", "")), agent_name)
+    else:
+        result = await _run()
+
+    append_usage_record(
+        build_usage_record(agent_name, result, duration_seconds=time.monotonic() - started_at, stage_name=stage_name)
+    )
+    return result
+
+
+async def _run_single_agent_uncoalesced(
+    prompt: str,
+    agent_name: str,
+    *,
+    stage_name: str | None = None,
+    on_text: TextCallback | None = None,
+    model: str | None = None,
+    max_turns: int | None = None,
+    max_budget_usd: float | None = None,
+) -> dict:
+    """运行单个代理（不经 single-flight 合并，参数与返回值同 run_single_agent）"""
+    budget_ledger = current_budget_ledger.get()
+    if budget_ledger is not None and budget_ledger.exceeded:
+        logger.warning(f"[{agent_name}] 批次预算已耗尽，跳过运行")
+        return {**budget_ledger.failure_result(agent_name), "stage": stage_name}
+
     logger.info(f"[{agent_name}] 开始运行 Agent")
     logger.debug(f"[{agent_name}] Prompt 长度: {len(prompt)} 字符")
     output_format, mentions_mode, output_template, section_order = _get_output_preferences(agent_name)
@@ -316,10 +563,47 @@ async def run_single_agent(prompt: str, agent_name: str, *, stage_name: str | No
         "input_tokens": 0,
         "output_tokens": 0,
         "total_tokens": 0,
+        "cache_read_input_tokens": 0,
+        "cache_creation_input_tokens": 0,
+        "model": model or Config.get_anthropic_model(),
     }
-
-    async def _query_agent():
-        options = create_agent_options(agent_name=agent_name)
+    # 输出长度治理：仅针对会被发布的最终输出（多阶段中间阶段带 stage_name，不限制）
+    output_limit_chars = None if stage_name else _get_output_limit_chars(agent_name)
+    if output_limit_chars:
+        execution_info["output_limit_chars"] = output_limit_chars
+    # 运行耗时（写入本地统计，用于自适应超时）
+    run_started_at = time.monotonic()
+    timing: dict[str, float | None] = {"first_message": None, "attempt": None}
+    # 工具调用指标（所有尝试累计，含失败尝试中的调用）
+    run_tool_metrics = ToolMetrics()
+
+    async def _query_agent(
+        state: dict[str, Any] | None = None,
+        *,
+        stream_text: bool = True,
+        on_message: Callable[[], None] | None = None,
+    ):
+        """执行一次查询
+
+        state: 本次尝试的统计写入目标（默认直接写 execution_info；对冲执行时每个尝试各自独立）
+        on_message: 每收到一条流式消息时调用（用于停滞检测）
+        """
+        # 每次尝试独立的终端缓冲；超时、异常或取消时也会写出已缓冲的内容
+        with agent_console(agent_name) as console:
+            return await _query_agent_once(console, state, stream_text=stream_text, on_message=on_message)
+
+    async def _query_agent_once(
+        console: AgentConsole,
+        state: dict[str, Any] | None,
+        *,
+        stream_text: bool,
+        on_message: Callable[[], None] | None,
+    ):
+        info = execution_info if state is None else state
+        text_callback = on_text if stream_text else None
+        attempt_started_at = time.monotonic()
+        with span("options.build"):
+            options = create_agent_options(max_turns, max_budget_usd, agent_name=agent_name, model=model)
         response_text = []
         turn_count = 0
         tool_calls = []
@@ -333,24 +617,81 @@ async def run_single_agent(prompt: str, agent_name: str, *, stage_name: str | No
             mentions_mode=mentions_mode,
             output_template=output_template,
             section_order=section_order,
+            output_limit_chars=output_limit_chars,
         )
-        async for message in query(prompt=effective_prompt, options=options):
+        await _notify_text(text_callback, "", agent_name)
+        output_chars = 0
+        output_exhausted = False
+        # 各 API 消息的用量（按 message_id 去重）：查询被中止、收不到 ResultMessage 时据此估算成本
+        # 对冲执行的尝试把它放在尝试状态里，落败尝试被取消后仍可估算
+        streamed_usage: dict[str, dict[str, Any]] = info.get("_streamed_usage", {})
+        # 追踪：每轮模型耗时从上一条消息算起；工具调用从 ToolUseBlock 到匹配的 ToolResultBlock
+        query_started_at = last_message_at = time.monotonic()
+        first_message_seen = False
+        pending_tools: dict[str, tuple[str, float]] = {}
+
+        def _finish_tool_call(tool_use_id: str, is_error: bool, content: Any) -> None:
+            pending = pending_tools.pop(tool_use_id, None)
+            if pending is None:
+                return
+            tool_name, started_at = pending
+            ended_at = time.monotonic()
+            result_chars = result_size_chars(content)
+            run_tool_metrics.observe(
+                agent_name, tool_name, ended_at - started_at, is_error=is_error, result_chars=result_chars
+            )
+            record_span(
+                f"tool:{tool_name}",
+                started_monotonic=started_at,
+                ended_monotonic=ended_at,
+                cat="tool",
+                status="error" if is_error else "ok",
+                tool_use_id=tool_use_id,
+                result_chars=result_chars,
+            )
+
+        stream = _open_query_stream(effective_prompt, options, agent_name=agent_name, stage_name=stage_name)
+        async for message in stream:
+            now = time.monotonic()
+            if timing["first_message"] is None:
+                timing["first_message"] = now - attempt_started_at
+            if not first_message_seen:
+                first_message_seen = True
+                record_span("query.first_message", started_monotonic=query_started_at, ended_monotonic=now, cat="model")
+            turn_started_at, last_message_at = last_message_at, now
+            if on_message is not None:
+                on_message()
+            # UserMessage: 工具结果（仅用于闭合工具 span）
+            if isinstance(message, UserMessage) and isinstance(message.content, list):
+                for block in message.content:
+                    if isinstance(block, ToolResultBlock):
+                        _finish_tool_call(block.tool_use_id, bool(block.is_error), block.content)
             # AssistantMessage: AI 响应（文本或工具调用）
             if isinstance(message, AssistantMessage):
                 turn_count += 1
                 logger.debug(f"[{agent_name}] 收到消息 (第 {turn_count} 轮)")
+                message_usage = getattr(message, "usage", None)
+                if isinstance(message_usage, dict):
+                    streamed_usage[str(getattr(message, "message_id", None) or turn_count)] = message_usage
+                record_span(
+                    "turn", started_monotonic=turn_started_at, ended_monotonic=now, cat="model", turn=turn_count
+                )
 
                 for block in message.content:
                     # 文本块 → 终端流式输出 + INFO 日志
                     if isinstance(block, TextBlock):
                         text = block.text
                         response_text.append(text)
-                        execution_info["text_blocks"].append(text)
+                        info["text_blocks"].append(text)
 
-                        # 终端流式输出（写入 stderr，避免污染 stdout）
-                        print(text, end="", flush=True, file=sys.stderr)
+                        # 终端输出（按 agent 缓冲，每轮结束整块写到 stderr，并行时不交错）
+                        console.write(text)
                         # 日志记录（INFO 级别）
                         logger.info(f"[{agent_name}] [Text] {text[:100]}...")
+                        await _notify_text(text_callback, "\n".join(response_text), agent_name)
+                        output_chars += len(text)
+                        if output_limit_chars and output_chars > output_limit_chars * _OUTPUT_GOVERNOR_TOLERANCE:
+                            output_exhausted = True
 
                     # 思考块 → 输出思考过程
                     elif isinstance(block, ThinkingBlock):
@@ -365,56 +706,82 @@ async def run_single_agent(prompt: str, agent_name: str, *, stage_name: str | No
                         tool_use_id = getattr(block, "tool_use_id", "")
                         tool_input = getattr(block, "input", {})
                         tool_calls.append(tool_name)
-                        execution_info["tool_calls"].append(tool_name)
+                        info["tool_calls"].append(tool_name)
+                        pending_tools[getattr(block, "id", "") or tool_use_id] = (tool_name, now)
 
-                        # 终端输出（写入 stderr，避免污染 stdout）
-                        print(f"\n[{tool_name}] id={tool_use_id}", end="", flush=True, file=sys.stderr)
+                        console.write(f"\n[{tool_name}] id={tool_use_id}")
                         if tool_name == "Skill" or tool_name.startswith("Skill"):
                             logger.info(f"[{agent_name}] [Skill] {tool_name}(id={tool_use_id})")
                         if tool_name == "Task":
                             logger.info(f"[{agent_name}] [Subagent] Task(id={tool_use_id})")
-                        # 详细日志输出
+                        logger.info(f"[{agent_name}] [Tool] {tool_name}(id={tool_use_id})")
                         if isinstance(tool_input, dict):
-                            import json
-
-                            input_str = json.dumps(tool_input, indent=2, ensure_ascii=False)
-                            logger.info(f"[{agent_name}] [Tool] {tool_name}(id={tool_use_id})")
-                            logger.debug(f"[{agent_name}] [ToolInput] {input_str}")
-                        else:
-                            logger.info(f"[{agent_name}] [Tool] {tool_name}(id={tool_use_id})")
+                            # 只有真正输出 DEBUG 日志时才序列化工具输入
+                            logger.debug(
+                                "[%s] [ToolInput] %s",
+                                agent_name,
+                                lazy(json.dumps, tool_input, indent=2, ensure_ascii=False),
+                            )
 
                     # 工具结果块 → 只日志，不终端输出
                     elif isinstance(block, ToolResultBlock):
                         tool_use_id = getattr(block, "tool_use_id", "")
                         is_error = getattr(block, "is_error", False)
                         result = getattr(block, "result", "")
+                        _finish_tool_call(tool_use_id, bool(is_error), getattr(block, "content", None))
                         # 限制结果长度，避免日志过多
                         if isinstance(result, str) and len(result) > 500:
                             logger.info(f"[{agent_name}] [ToolResult] id={tool_use_id} error={is_error} (truncated)")
-                            logger.debug(f"[{agent_name}] [ToolResult] id={tool_use_id}:\n{result[:500]}...")
+                            logger.debug("[%s] [ToolResult] id=%s:\n%s...", agent_name, tool_use_id, result[:500])
                         else:
                             logger.info(f"[{agent_name}] [ToolResult] id={tool_use_id} error={is_error}")
                             if result:
-                                logger.debug(f"[{agent_name}] [ToolResult] id={tool_use_id}: {result}")
+                                logger.debug("[%s] [ToolResult] id=%s: %s", agent_name, tool_use_id, result)
+
+                console.flush()
+                if output_exhausted:
+                    # 输出已明显超过发布上限：继续生成只会被截断，直接中止查询
+                    logger.warning(
+                        f"[{agent_name}] 输出已达 {output_chars} 字符，超过发布上限 {output_limit_chars}，中止生成"
+                    )
+                    info["output_truncated"] = True
+                    aclose = getattr(stream, "aclose", None)
+                    if aclose is not None:
+                        await aclose()
+                    # 不会再收到 ResultMessage：按已流式收到的用量估算成本并照常记账
+                    _apply_estimated_usage(info, streamed_usage.values(), "".join(response_text), turn_count)
+                    logger.warning(
+                        f"[{agent_name}] 中止后按用量估算成本: ${info['cost_usd']:.4f}"
+                        f"（输入Token: {info['input_tokens']}, 输出Token: {info['output_tokens']}）"
+                    )
+                    if budget_ledger is not None:
+                        budget_ledger.charge(agent_name, info["cost_usd"])
+                    break
 
             # ResultMessage: 执行结果（成本、统计信息）
             elif isinstance(message, ResultMessage):
-                # 打印统计信息
-                print("\n")
+                console.write("\n")
+                console.flush()
                 session_id = message.session_id or ""
                 cost_usd = message.total_cost_usd or 0.0
                 result_turns = message.num_turns or turn_count
                 usage = message.usage or {}
                 input_tokens = int(usage.get("input_tokens") or 0)
                 output_tokens = int(usage.get("output_tokens") or 0)
+                cache_read_tokens = int(usage.get("cache_read_input_tokens") or 0)
+                cache_creation_tokens = int(usage.get("cache_creation_input_tokens") or 0)
                 total_tokens = int(usage.get("total_tokens") or (input_tokens + output_tokens))
 
-                execution_info["session_id"] = session_id
-                execution_info["cost_usd"] = cost_usd
-                execution_info["num_turns"] = result_turns
-                execution_info["input_tokens"] = input_tokens
-                execution_info["output_tokens"] = output_tokens
-                execution_info["total_tokens"] = total_tokens
+                info["session_id"] = session_id
+                info["cost_usd"] = cost_usd
+                info["num_turns"] = result_turns
+                info["input_tokens"] = input_tokens
+                info["output_tokens"] = output_tokens
+                info["total_tokens"] = total_tokens
+                info["cache_read_input_tokens"] = cache_read_tokens
+                info["cache_creation_input_tokens"] = cache_creation_tokens
+                if budget_ledger is not None:
+                    budget_ledger.charge(agent_name, cost_usd)
 
                 # 只在第一次收到 ResultMessage 时记录
                 if first_result:
@@ -427,6 +794,11 @@ async def run_single_agent(prompt: str, agent_name: str, *, stage_name: str | No
                 )
                 if input_tokens or output_tokens or total_tokens:
                     stats_line += f", 输入Token: {input_tokens}, 输出Token: {output_tokens}, 总Token: {total_tokens}"
+                if cache_read_tokens or cache_creation_tokens:
+                    stats_line += (
+                        f", 缓存读取Token: {cache_read_tokens}, 缓存写入Token: {cache_creation_tokens}, "
+                        f"缓存命中率: {_cache_hit_ratio(input_tokens, cache_read_tokens, cache_creation_tokens):.0%}"
+                    )
                 logger.info(stats_line)
 
         result = "\n".join(response_text)
@@ -466,15 +838,118 @@ async def run_single_agent(prompt: str, agent_name: str, *, stage_name: str | No
             return None
         return max(1, min(_DEFAULT_ATTEMPT_TIMEOUT_SECONDS, int(overall_timeout_seconds)))
 
+    async def _query_agent_hedged(stall_seconds: float) -> str:
+        """对冲执行：主尝试在 stall_seconds 内没有任何流式消息时并行启动第二个尝试，取先完成者"""
+        states: dict[str, dict[str, Any]] = {"primary": _new_attempt_state()}
+        last_message_at = {"primary": time.monotonic()}
+
+        def _touch(name: str) -> Callable[[], None]:
+            def _callback() -> None:
+                last_message_at[name] = time.monotonic()
+
+            return _callback
+
+        async def _hedge_attempt(state: dict[str, Any], on_message: Callable[[], None]) -> str:
+            # 对冲尝试与主尝试时间重叠，放到单独的泳道
+            with span("hedge", cat="query", lane=f"{agent_name}#hedge", stall_seconds=stall_seconds):
+                return await _query_agent(state, stream_text=False, on_message=on_message)
+
+        tasks = {
+            "primary": asyncio.create_task(_query_agent(states["primary"], on_message=_touch("primary"))),
+        }
+        hedge_started_at: float | None = None
+        winner: str | None = None
+        try:
+            while winner is None:
+                running = [task for task in tasks.values() if not task.done()]
+                if not running:
+                    # 全部失败：抛出主尝试的异常，交给外层重试逻辑
+                    raise tasks["primary"].exception() or RuntimeError("hedged attempts failed")
+                timeout = max(0.05, min(1.0, stall_seconds / 4))
+                await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for name, task in tasks.items():
+                    if task.done() and not task.cancelled() and task.exception() is None:
+                        winner = name
+                        break
+                if winner is None and "hedge" not in tasks and not tasks["primary"].done():
+                    stalled_for = time.monotonic() - last_message_at["primary"]
+                    if stalled_for >= stall_seconds:
+                        logger.warning(f"[{agent_name}] 流式输出停滞 {stalled_for:.1f}s，启动对冲尝试")
+                        hedge_started_at = time.monotonic()
+                        states["hedge"] = _new_attempt_state()
+                        last_message_at["hedge"] = hedge_started_at
+                        tasks["hedge"] = asyncio.create_task(_hedge_attempt(states["hedge"], _touch("hedge")))
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        winner_state = states[winner]
+        for key, value in winner_state.items():
+            if not key.startswith("_"):
+                execution_info[key] = value
+        if hedge_started_at is not None:
+            loser = "primary" if winner == "hedge" else "hedge"
+            loser_state = states[loser]
+            # 被取消的尝试通常来不及收到 ResultMessage：按其已流式收到的用量（无用量时按 prompt）估算并记账
+            extra_estimated = not loser_state.get("cost_usd")
+            if extra_estimated:
+                streamed = loser_state["_streamed_usage"]
+                _apply_estimated_usage(
+                    loser_state,
+                    streamed.values(),
+                    "\n".join(loser_state["text_blocks"]),
+                    len(streamed),
+                    prompt_text=prompt,
+                )
+                if budget_ledger is not None:
+                    budget_ledger.charge(agent_name, loser_state["cost_usd"])
+                execution_info["cost_estimated"] = True
+            extra_cost = float(loser_state.get("cost_usd", 0.0))
+            execution_info["cost_usd"] = float(execution_info["cost_usd"]) + extra_cost
+            execution_info["hedge"] = {
+                "triggered": True,
+                "stall_seconds": stall_seconds,
+                "winner": winner,
+                "extra_cost_usd": extra_cost,
+                "extra_cost_estimated": extra_estimated,
+                "extra_turns": int(loser_state.get("num_turns", 0)),
+                "extra_output_tokens": int(loser_state.get("output_tokens", 0)),
+            }
+            logger.info(
+                f"[{agent_name}] [Hedge] 胜出: {winner}, 对冲启动后 {time.monotonic() - hedge_started_at:.1f}s 完成, "
+                f"额外成本: ${extra_cost:.4f}{'（估算）' if extra_estimated else ''}"
+            )
+            if winner == "hedge":
+                await _notify_text(on_text, "\n".join(winner_state["text_blocks"]), agent_name)
+        return cast(str, tasks[winner].result())
+
     try:
-        timeout_seconds = _get_timeout_seconds()
-        attempt_timeout_seconds = _get_attempt_timeout_seconds(timeout_seconds)
+        static_timeout_seconds = _get_timeout_seconds()
+        timeout_seconds, attempt_timeout_seconds = adaptive_timeouts(
+            agent_name,
+            static_timeout_seconds,
+            _get_attempt_timeout_seconds(static_timeout_seconds),
+            stage_name=stage_name,
+        )
+        hedge_stall_seconds = _get_hedge_stall_seconds(agent_name)
+
+        attempt_number = 0
 
         async def _query_agent_with_attempt_timeout() -> str:
-            if attempt_timeout_seconds:
-                with anyio.fail_after(attempt_timeout_seconds):
-                    return await _query_agent()
-            return await _query_agent()
+            nonlocal attempt_number
+            attempt_number += 1
+            run = (lambda: _query_agent_hedged(hedge_stall_seconds)) if hedge_stall_seconds else _query_agent
+            attempt_started_at = time.monotonic()
+            with span("attempt", cat="query", attempt=attempt_number, timeout_seconds=attempt_timeout_seconds):
+                if attempt_timeout_seconds:
+                    with anyio.fail_after(attempt_timeout_seconds):
+                        result = await run()
+                else:
+                    result = await run()
+            timing["attempt"] = time.monotonic() - attempt_started_at
+            return result
 
         if timeout_seconds:
             with anyio.fail_after(timeout_seconds):
@@ -500,6 +975,22 @@ async def run_single_agent(prompt: str, agent_name: str, *, stage_name: str | No
                 ),
             )
         execution_info["response"] = response
+        execution_info["tool_metrics"] = run_tool_metrics.summary()
+        publish_run_tool_metrics(run_tool_metrics)
+        if execution_info["tool_metrics"]:
+            slowest = execution_info["tool_metrics"][0]
+            logger.info(
+                f"[{agent_name}] [ToolMetrics] 耗时最多: {slowest['server']}/{slowest['tool']} "
+                f"合计 {slowest['latency_total_seconds']:.1f}s（{slowest['calls']} 次，错误 {slowest['errors']}）"
+            )
+        record_run(
+            agent_name,
+            duration_seconds=time.monotonic() - run_started_at,
+            attempt_seconds=timing["attempt"],
+            first_message_seconds=timing["first_message"],
+            ok=True,
+            stage_name=stage_name,
+        )
 
         # 最终日志
         logger.info(
@@ -510,12 +1001,23 @@ async def run_single_agent(prompt: str, agent_name: str, *, stage_name: str | No
             f"工具调用: {len(execution_info['tool_calls'])}, "
             f"输入Token: {execution_info['input_tokens']}, "
             f"输出Token: {execution_info['output_tokens']}, "
-            f"总Token: {execution_info['total_tokens']}"
+            f"总Token: {execution_info['total_tokens']}, "
+            f"缓存读取Token: {execution_info['cache_read_input_tokens']}"
         )
 
         return execution_info
     except Exception as e:
         error_type = _classify_run_exception(e)
+        record_run(
+            agent_name,
+            duration_seconds=time.monotonic() - run_started_at,
+            attempt_seconds=timing["attempt"],
+            first_message_seconds=timing["first_message"],
+            ok=False,
+            error_type=error_type,
+            stage_name=stage_name,
+        )
+        publish_run_tool_metrics(run_tool_metrics)
         timeout_hint = ""
         if error_type == "timeout":
             timeout_hint = (
@@ -536,6 +1038,7 @@ async def run_single_agent(prompt: str, agent_name: str, *, stage_name: str | No
             "tool_calls": [],
             "session_id": "",
             "text_blocks": [],
+            "tool_metrics": run_tool_metrics.summary(),
         }
 
 
@@ -626,21 +1129,105 @@ def _collect_source_urls(text: str) -> list[str]:
     return _extract_urls(text)
 
 
+def _is_gqy20_adaptive_enabled() -> bool:
+    return os.environ.get("ISSUELAB_GQY20_ADAPTIVE", "1").lower() not in {"0", "false", "no", "off"}
+
+
+def _plan_gqy20_stage_depth(research_text: str, task_context: str) -> tuple[list[str], str]:
+    """根据 Researcher 输出决定可跳过的中间阶段，返回 (跳过的阶段, 原因)。
+
+    - 高置信度、多条可追溯证据、几乎无待解决问题且 Issue 较短：直接 Researcher -> Judge
+    - 高置信度且至少一条可追溯证据：跳过 Critic
+    - 其余情况：完整五阶段
+    """
+    if not _is_gqy20_adaptive_enabled():
+        return [], ""
+    try:
+        parsed = yaml.safe_load(extract_yaml_block(research_text)) or {}
+    except Exception:
+        return [], ""
+    if not isinstance(parsed, dict):
+        return [], ""
+
+    confidence = str(parsed.get("confidence", "")).strip().lower()
+    evidence = parsed.get("evidence") if isinstance(parsed.get("evidence"), list) else []
+    evidence_urls = {
+        str(item.get("url", ""))
+        for item in evidence
+        if isinstance(item, dict) and str(item.get("url", "")).startswith(("http://", "https://"))
+    }
+    raw_questions = parsed.get("open_questions")
+    if raw_questions is None:
+        raw_questions = []
+    if not isinstance(raw_questions, list):
+        # 格式不符（数字、字符串等）时无法判断问题数量，保守地不跳过任何阶段
+        return [], ""
+    open_questions = [q for q in raw_questions if str(q or "").strip()]
+    if confidence != "high" or not evidence_urls:
+        return [], ""
+
+    if len(evidence_urls) >= 2 and len(open_questions) <= 1 and len(task_context) <= _ADAPTIVE_FAST_MAX_CONTEXT_CHARS:
+        return (
+            list(_GQY20_OPTIONAL_STAGES),
+            f"Researcher 置信度 high，{len(evidence_urls)} 条可追溯证据，"
+            f"{len(open_questions)} 个待解决问题，Issue 上下文较短",
+        )
+    return ["Critic"], f"Researcher 置信度 high，{len(evidence_urls)} 条可追溯证据"
+
+
 def _is_gqy20_multistage_enabled(agent_name: str) -> bool:
     if agent_name != "gqy20":
         return False
     return os.environ.get("ISSUELAB_GQY20_MULTISTAGE", "1").lower() not in {"0", "false", "no", "off"}
 
 
-async def _run_gqy20_multistage(agent_prompt: str, issue_number: int, task_context: str) -> dict[str, Any]:
-    """gqy20 专用多阶段流程：Researcher -> Analyst -> Critic -> Verifier -> Judge。"""
+async def _run_gqy20_multistage(
+    agent_prompt: str, issue_number: int, task_context: str, *, on_progress: TextCallback | None = None
+) -> dict[str, Any]:
+    """gqy20 专用多阶段流程：Researcher -> Analyst -> Critic -> Verifier -> Judge。
+
+    on_progress 在每个阶段开始时收到一行进度说明（用于流式评论占位）。
+    """
     stages: dict[str, str] = {}
     total_cost = 0.0
     total_turns = 0
     total_input_tokens = 0
     total_output_tokens = 0
     total_tokens = 0
+    total_cache_read_tokens = 0
+    total_cache_creation_tokens = 0
     tool_calls: list[str] = []
+    # 每个阶段的模型与用量（Judge 重试累加到同一条目）
+    stage_usage: dict[str, dict[str, Any]] = {}
+
+    def _accumulate_usage(result: dict[str, Any], stage_name: str) -> None:
+        nonlocal total_cost, total_turns, total_input_tokens, total_output_tokens, total_tokens
+        nonlocal total_cache_read_tokens, total_cache_creation_tokens
+        usage = stage_usage.setdefault(
+            stage_name,
+            {"model": result.get("model") or Config.get_anthropic_model(), "runs": 0, "cost_usd": 0.0},
+        )
+        usage["runs"] += 1
+        usage["cost_usd"] += float(result.get("cost_usd", 0.0))
+        for key in (
+            "num_turns",
+            "input_tokens",
+            "output_tokens",
+            "total_tokens",
+            "cache_read_input_tokens",
+            "cache_creation_input_tokens",
+        ):
+            usage[key] = usage.get(key, 0) + int(result.get(key, 0))
+        total_cost += float(result.get("cost_usd", 0.0))
+        total_turns += int(result.get("num_turns", 0))
+        total_input_tokens += int(result.get("input_tokens", 0))
+        total_output_tokens += int(result.get("output_tokens", 0))
+        total_tokens += int(result.get("total_tokens", 0))
+        total_cache_read_tokens += int(result.get("cache_read_input_tokens", 0))
+        total_cache_creation_tokens += int(result.get("cache_creation_input_tokens", 0))
+        stage_tools = result.get("tool_calls", [])
+        if isinstance(stage_tools, list):
+            tool_calls.extend(str(t) for t in stage_tools)
 
     def _build_failure_result(stage_name: str, error_type: str, error_message: str) -> dict[str, Any]:
         unique_tools: list[str] = []
@@ -665,7 +1252,10 @@ async def _run_gqy20_multistage(agent_prompt: str, issue_number: int, task_conte
             "input_tokens": total_input_tokens,
             "output_tokens": total_output_tokens,
             "total_tokens": total_tokens,
+            "cache_read_input_tokens": total_cache_read_tokens,
+            "cache_creation_input_tokens": total_cache_creation_tokens,
             "stages": stages,
+            "stage_usage": stage_usage,
         }
 
     def _dedupe_tools() -> list[str]:
@@ -675,33 +1265,44 @@ async def _run_gqy20_multistage(agent_prompt: str, issue_number: int, task_conte
                 unique_tools.append(tool)
         return unique_tools
 
-    async def _run_stage(stage_name: str, task: str, *, structured_output: bool = True) -> dict[str, Any]:
-        nonlocal total_cost, total_turns, total_input_tokens, total_output_tokens, total_tokens
-        stage_prompt = f"""{agent_prompt}
+    # 提示缓存友好布局：角色定义 + 流程规则 + Issue 上下文 + 已完成阶段输出 在各阶段间逐段追加、
+    # 字节级一致，阶段专属内容（阶段名、任务、输出格式）统一放在末尾。
+    shared_prefix = f"""{agent_prompt}
 
 ---
 
 ## Multi-Stage Workflow
 你正在执行 gqy20 的多阶段高质量流程。
-当前阶段：{stage_name}
 
 请严格遵守：
 - 优先大量使用可用工具进行检索、核验、对照
 - 不得在证据不足时给出确定性结论
 - 如涉及事实陈述，尽可能给出可追溯 URL
 
+## Issue #{issue_number} 上下文
+{task_context}
+"""
+    completed_outputs: list[str] = []
+
+    async def _run_stage(stage_name: str, task: str, *, structured_output: bool = True) -> dict[str, Any]:
+        await _notify_text(on_progress, f"多阶段流程进行中：{stage_name} 阶段（已完成 {len(stages)} 个阶段）", "gqy20")
+        stage_prompt = shared_prefix
+        if completed_outputs:
+            stage_prompt += "\n## 已完成阶段输出\n\n" + "\n\n".join(completed_outputs) + "\n"
+        stage_prompt += f"""
+---
+
+当前阶段：{stage_name}
+
 ## 当前任务
 {task}
 """
-        result = await run_single_agent(stage_prompt, "gqy20", stage_name=stage_name if structured_output else None)
-        total_cost += float(result.get("cost_usd", 0.0))
-        total_turns += int(result.get("num_turns", 0))
-        total_input_tokens += int(result.get("input_tokens", 0))
-        total_output_tokens += int(result.get("output_tokens", 0))
-        total_tokens += int(result.get("total_tokens", 0))
-        stage_tools = result.get("tool_calls", [])
-        if isinstance(stage_tools, list):
-            tool_calls.extend(str(t) for t in stage_tools)
+        # 阶段分级：轻量阶段可使用快速模型，并按 agent.yml stage_overrides 调整轮数/预算
+        stage_overrides = get_stage_run_overrides("gqy20", stage_name)
+        result = await run_single_agent(
+            stage_prompt, "gqy20", stage_name=stage_name if structured_output else None, **stage_overrides
+        )
+        _accumulate_usage(result, stage_name)
         text = str(result.get("response", "")).strip()
         stages[stage_name] = text
         if not bool(result.get("ok", True)):
@@ -727,11 +1328,15 @@ async def _run_gqy20_multistage(agent_prompt: str, issue_number: int, task_conte
             "response": text,
         }
 
-    researcher_task = f"""
-请先只做“证据收集”，不要下最终结论。
+    completed_stage_names: list[str] = []
 
-Issue #{issue_number} 上下文：
-{task_context}
+    def _complete_stage(stage_name: str, text: str) -> None:
+        completed_stage_names.append(stage_name)
+        # 下游阶段拿到的是结构化摘要（完整输出以文件引用按需读取），避免输入随深度平方增长
+        completed_outputs.append(format_stage_handoff(issue_number, stage_name, text))
+
+    researcher_task = """
+请先只做“证据收集”，不要下最终结论（Issue 上下文见上文）。
 
 输出要求（YAML）：
 ```yaml
@@ -775,14 +1380,7 @@ confidence: "low|medium|high"
 - 若涉及事实，请尽量给出可追溯链接；无法核验时明确说明不确定性
 """
             fallback_result = await run_single_agent(fallback_prompt, "gqy20")
-            total_cost += float(fallback_result.get("cost_usd", 0.0))
-            total_turns += int(fallback_result.get("num_turns", 0))
-            total_input_tokens += int(fallback_result.get("input_tokens", 0))
-            total_output_tokens += int(fallback_result.get("output_tokens", 0))
-            total_tokens += int(fallback_result.get("total_tokens", 0))
-            stage_tools = fallback_result.get("tool_calls", [])
-            if isinstance(stage_tools, list):
-                tool_calls.extend(str(t) for t in stage_tools)
+            _accumulate_usage(fallback_result, "FallbackSingleStage")
             fallback_text = str(fallback_result.get("response", "")).strip()
             if fallback_text and "证据不足" not in fallback_text:
                 fallback_text = "证据不足，基于有限信息。\n\n" + fallback_text
@@ -806,7 +1404,10 @@ confidence: "low|medium|high"
                 "input_tokens": total_input_tokens,
                 "output_tokens": total_output_tokens,
                 "total_tokens": total_tokens,
+                "cache_read_input_tokens": total_cache_read_tokens,
+                "cache_creation_input_tokens": total_cache_creation_tokens,
                 "stages": stages,
+                "stage_usage": stage_usage,
             }
         return _build_failure_result(
             "Researcher",
@@ -814,12 +1415,16 @@ confidence: "low|medium|high"
             str(research_stage.get("error_message") or "Researcher 阶段失败"),
         )
     research_text = str(research_stage.get("response", ""))
+    _complete_stage("Researcher", research_text)
 
-    analyst_task = f"""
-基于 Researcher 证据，产出 2-3 个候选结论版本（不要最终定稿）。
+    # 自适应深度：简单问题不必跑满五个阶段
+    skip_stages, skip_reason = _plan_gqy20_stage_depth(research_text, task_context)
+    skipped_stages: dict[str, str] = {}
+    if skip_stages:
+        logger.info("[gqy20] 自适应深度：跳过 %s（%s）", "/".join(skip_stages), skip_reason)
 
-Researcher 输出：
-{research_text}
+    analyst_task = """
+基于 Researcher 证据，产出 2-3 个候选结论版本（不要最终定稿）。
 
 输出要求（YAML）：
 ```yaml
@@ -844,24 +1449,9 @@ candidates:
 confidence: "low|medium|high"
 ```
 """
-    analyst_stage = await _run_stage("Analyst", analyst_task)
-    if not analyst_stage["ok"]:
-        return _build_failure_result(
-            "Analyst",
-            str(analyst_stage.get("error_type") or "unknown"),
-            str(analyst_stage.get("error_message") or "Analyst 阶段失败"),
-        )
-    analyst_text = str(analyst_stage.get("response", ""))
-
-    critic_task = f"""
+    critic_task = """
 逐条批判 Analyst 候选结论，识别逻辑漏洞、证据缺口、过度推断和缺失引用。
 
-Researcher 输出：
-{research_text}
-
-Analyst 输出：
-{analyst_text}
-
 输出要求（YAML）：
 ```yaml
 summary: ""
@@ -874,27 +1464,16 @@ criticisms:
 confidence: "low|medium|high"
 ```
 """
-    critic_stage = await _run_stage("Critic", critic_task)
-    if not critic_stage["ok"]:
-        return _build_failure_result(
-            "Critic",
-            str(critic_stage.get("error_type") or "unknown"),
-            str(critic_stage.get("error_message") or "Critic 阶段失败"),
-        )
-    critic_text = str(critic_stage.get("response", ""))
-
+    link_check_enabled = is_link_check_enabled()
+    link_check_rule = (
+        "链接可达性已由本地检查完成（见上文「链接可达性检查」表格），无需再用工具逐个访问链接；\n"
+        "请把工具调用集中在核验内容是否支持对应结论，并优先剔除 broken/unreachable 的来源。"
+        if link_check_enabled
+        else "要求尽可能调用工具验证链接是否可访问、内容是否支持对应结论。"
+    )
     verifier_task = f"""
 强制核验候选结论的来源链接与证据一致性。
-要求尽可能调用工具验证链接是否可访问、内容是否支持对应结论。
-
-Researcher 输出：
-{research_text}
-
-Analyst 输出：
-{analyst_text}
-
-Critic 输出：
-{critic_text}
+{link_check_rule}
 
 输出要求（YAML）：
 ```yaml
@@ -909,35 +1488,38 @@ verification_gaps:
 confidence: "low|medium|high"
 ```
 """
-    verifier_stage = await _run_stage("Verifier", verifier_task)
-    if not verifier_stage["ok"]:
-        return _build_failure_result(
-            "Verifier",
-            str(verifier_stage.get("error_type") or "unknown"),
-            str(verifier_stage.get("error_message") or "Verifier 阶段失败"),
-        )
-    verifier_text = str(verifier_stage.get("response", ""))
+    link_checks: list[LinkStatus] = []
+    for stage_name, stage_task in (("Analyst", analyst_task), ("Critic", critic_task), ("Verifier", verifier_task)):
+        if stage_name == "Verifier" and link_check_enabled:
+            # 在 Verifier/Judge 之前本地并发检查所有来源链接，结果进入共享前缀供后续阶段引用
+            urls: list[str] = []
+            for text in stages.values():
+                urls.extend(_collect_source_urls(text))
+            with span("link_check", urls=len(urls)):
+                link_checks = await check_links(urls)
+            if link_checks:
+                completed_outputs.append(f"### 链接可达性检查（本地自动完成）\n{format_link_status_table(link_checks)}")
+        if stage_name in skip_stages:
+            skipped_stages[stage_name] = skip_reason
+            stages[stage_name] = f"{_SKIPPED_STAGE_PREFIX} {skip_reason}"
+            continue
+        stage_result = await _run_stage(stage_name, stage_task)
+        if not stage_result["ok"]:
+            return _build_failure_result(
+                stage_name,
+                str(stage_result.get("error_type") or "unknown"),
+                str(stage_result.get("error_message") or f"{stage_name} 阶段失败"),
+            )
+        _complete_stage(stage_name, str(stage_result.get("response", "")))
 
     judge_base_task = f"""
-请综合 Researcher/Analyst/Critic/Verifier 结果，给出最终结论。
+请综合 {"/".join(completed_stage_names)} 结果，给出最终结论。
 
 要求：
 - 必须优先使用已核验来源
 - 必须输出可追溯链接（sources）
 - 对不确定项明确标注
 
-Researcher 输出：
-{research_text}
-
-Analyst 输出：
-{analyst_text}
-
-Critic 输出：
-{critic_text}
-
-Verifier 输出：
-{verifier_text}
-
 最终输出必须是 Markdown（禁止 YAML/JSON 代码块）：
 - [Agent: gqy20]
 - ## Summary
@@ -990,14 +1572,7 @@ Verifier 输出：
         fallback_urls = _collect_source_urls(fallback_text)
         if fallback_urls:
             judge_text = fallback_text
-            total_cost += float(fallback_result.get("cost_usd", 0.0))
-            total_turns += int(fallback_result.get("num_turns", 0))
-            total_input_tokens += int(fallback_result.get("input_tokens", 0))
-            total_output_tokens += int(fallback_result.get("output_tokens", 0))
-            total_tokens += int(fallback_result.get("total_tokens", 0))
-            stage_tools = fallback_result.get("tool_calls", [])
-            if isinstance(stage_tools, list):
-                tool_calls.extend(str(t) for t in stage_tools)
+            _accumulate_usage(fallback_result, "FallbackSingleStage")
 
     return {
         "ok": True,
@@ -1010,10 +1585,66 @@ Verifier 输出：
         "input_tokens": total_input_tokens,
         "output_tokens": total_output_tokens,
         "total_tokens": total_tokens,
+        "cache_read_input_tokens": total_cache_read_tokens,
+        "cache_creation_input_tokens": total_cache_creation_tokens,
         "stages": stages,
+        "stage_usage": stage_usage,
+        "skipped_stages": skipped_stages,
+        "link_checks": [asdict(item) for item in link_checks],
     }
 
 
+def _validate_agent_dependencies(agents: list[str], dependencies: dict[str, list[str]]) -> dict[str, list[str]]:
+    """规范化依赖表：仅保留本批次内的上游，并拒绝环形依赖。"""
+    agent_set = set(agents)
+    normalized: dict[str, list[str]] = {}
+    for agent_name in agents:
+        upstream: list[str] = []
+        for dep in dependencies.get(agent_name, []):
+            if dep == agent_name:
+                raise ValueError(f"Agent {agent_name} 不能依赖自身")
+            if dep not in agent_set:
+                logger.warning(f"[{agent_name}] 依赖 {dep} 不在本次执行列表中，已忽略")
+                continue
+            if dep not in upstream:
+                upstream.append(dep)
+        normalized[agent_name] = upstream
+
+    visiting: set[str] = set()
+    visited: set[str] = set()
+
+    def _visit(name: str) -> None:
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"Agent 依赖存在环: {name}")
+        visiting.add(name)
+        for dep in normalized.get(name, []):
+            _visit(dep)
+        visiting.discard(name)
+        visited.add(name)
+
+    for agent_name in agents:
+        _visit(agent_name)
+    return normalized
+
+
+def _format_upstream_outputs(upstream_results: dict[str, dict | None]) -> str:
+    """将上游 agent 的输出格式化为下游可直接引用的上下文段落。"""
+    lines = ["## 上游 Agent 输出（本次流程内已完成）", ""]
+    for agent_name, result in upstream_results.items():
+        lines.append(f"### {agent_name}")
+        if not result:
+            lines.append("（未产出结果）")
+        elif not bool(result.get("ok", True)):
+            error_type = str(result.get("error_type") or "unknown")
+            lines.append(f"（执行失败：{error_type}，请勿引用该 agent 的结论）")
+        else:
+            lines.append(str(result.get("response", "")).strip() or "（空响应）")
+        lines.append("")
+    return "\n".join(lines).rstrip()
+
+
 async def run_agents_parallel(
     issue_number: int,
     agents: list[str],
@@ -1021,6 +1652,8 @@ async def run_agents_parallel(
     comment_count: int = 0,
     available_agents: list[dict] | None = None,
     trigger_comment: str | None = None,
+    on_result: AgentResultCallback | None = None,
+    on_text: AgentTextCallback | None = None,
 ) -> dict:
     """并行运行多个代理
 
@@ -1030,6 +1663,8 @@ async def run_agents_parallel(
         context: 上下文信息（Issue 标题、内容、评论等）
         comment_count: 评论数量（用于增强上下文）
         available_agents: 系统中可用的智能体列表
+        on_result: 单个 agent 完成时立即调用的回调（按完成顺序）
+        on_text: 流式文本回调 (agent_name, 累计文本)
 
     Returns:
         {
@@ -1042,6 +1677,69 @@ async def run_agents_parallel(
             }
         }
     """
+    return await _run_agents(
+        issue_number,
+        agents,
+        context,
+        comment_count,
+        available_agents=available_agents,
+        trigger_comment=trigger_comment,
+        on_result=on_result,
+        on_text=on_text,
+    )
+
+
+async def run_agents_pipeline(
+    issue_number: int,
+    dependencies: dict[str, list[str]],
+    context: str = "",
+    comment_count: int = 0,
+    available_agents: list[dict] | None = None,
+    trigger_comment: str | None = None,
+    on_result: AgentResultCallback | None = None,
+    on_text: AgentTextCallback | None = None,
+) -> dict:
+    """按依赖关系运行多个代理
+
+    无依赖的 agent 立即并行启动；有依赖的 agent 在全部上游完成后启动，
+    并将上游输出注入其任务上下文。
+
+    Args:
+        issue_number: Issue 编号
+        dependencies: {agent_name: [上游 agent 名称, ...]}，键顺序即执行列表
+        context: 上下文信息
+        comment_count: 评论数量
+        available_agents: 系统中可用的智能体列表
+        on_result: 单个 agent 完成时立即调用的回调（按完成顺序）
+        on_text: 流式文本回调 (agent_name, 累计文本)
+
+    Returns:
+        与 run_agents_parallel 相同的结果字典
+    """
+    return await _run_agents(
+        issue_number,
+        list(dependencies),
+        context,
+        comment_count,
+        available_agents=available_agents,
+        trigger_comment=trigger_comment,
+        dependencies=dependencies,
+        on_result=on_result,
+        on_text=on_text,
+    )
+
+
+async def _run_agents(
+    issue_number: int,
+    agents: list[str],
+    context: str = "",
+    comment_count: int = 0,
+    available_agents: list[dict] | None = None,
+    trigger_comment: str | None = None,
+    dependencies: dict[str, list[str]] | None = None,
+    on_result: AgentResultCallback | None = None,
+    on_text: AgentTextCallback | None = None,
+) -> dict:
     from issuelab.agents.discovery import discover_agents, load_prompt
     from issuelab.agents.observer import run_observer_for_papers, run_pubmed_observer_for_papers
     from issuelab.agents.paper_extractors import (
@@ -1052,11 +1750,12 @@ async def run_agents_parallel(
         parse_pubmed_papers_from_issue,
     )
     from issuelab.collaboration import build_collaboration_guidelines
+    from issuelab.context_builder import INLINED_CONTEXT_MARKER
 
     # 构建任务上下文（Issue 信息）
     task_context = context
     if trigger_comment:
-        task_context = "## 最新触发评论（最高优先级）\n" f"{trigger_comment}\n\n" "---\n\n" f"{task_context}"
+        task_context = f"## 最新触发评论（最高优先级）\n{trigger_comment}\n\n---\n\n{task_context}"
     if comment_count > 0:
         task_context += f"\n\n**重要提示**: 本 Issue 已有 {comment_count} 条历史评论。请仔细阅读并分析这些评论。"
 
@@ -1071,8 +1770,13 @@ async def run_agents_parallel(
     results: dict[str, dict] = {}
     total_cost = 0.0
 
-    async def run_agent_task(agent_name: str, results: dict[str, dict]) -> None:
-        """并行任务：运行单个 agent"""
+    async def run_agent_task(
+        agent_name: str, results: dict[str, dict], task_context: str, upstream_text: str = ""
+    ) -> None:
+        """并行任务：运行单个 agent
+
+        upstream_text 为流水线上游输出，放在共享上下文之后，保证同一批次各 agent 的 prompt 前缀一致。
+        """
         logger.info(f"[Issue#{issue_number}] [并行] 开始执行 {agent_name}")
 
         # 特殊：pubmed_observer / arxiv_observer 需要从 Issue 正文解析文献列表
@@ -1121,12 +1825,9 @@ async def run_agents_parallel(
             mcp_text = format_mcp_servers_for_prompt(agent_name)
             agent_prompt = agent_prompt.replace("{mcp_servers}", mcp_text)
 
-        # 2. 构建最终 prompt：角色定义 + 当前任务
-        final_prompt = f"""{agent_prompt}
-
----
-
-## 当前任务
+        # 2. 构建最终 prompt：共享的任务上下文在前（同批次 agent 可命中提示缓存），角色定义与上游输出在后
+        upstream_section = f"{upstream_text}\n\n" if upstream_text else ""
+        final_prompt = f"""## 当前任务
 
 你需要分析 GitHub Issue #{issue_number}：
 
@@ -1134,7 +1835,13 @@ async def run_agents_parallel(
 
 ---
 
-**输出要求**：
+## 你的角色
+
+{agent_prompt}
+
+---
+
+{upstream_section}**输出要求**：
 - 请以 [Agent: {agent_name}] 为前缀发布你的回复
 - 专注于 Issue 的讨论话题和内容
 - 不要去分析项目代码或架构（除非 Issue 明确要求）
@@ -1148,9 +1855,25 @@ async def run_agents_parallel(
 
         if _is_gqy20_multistage_enabled(agent_name):
             logger.info(f"[Issue#{issue_number}] {agent_name} 启用多阶段流程")
-            result = await _run_gqy20_multistage(agent_prompt, issue_number, task_context)
+            multistage_context = f"{task_context}\n\n{upstream_text}" if upstream_text else task_context
+            result = await _run_gqy20_multistage(
+                agent_prompt,
+                issue_number,
+                multistage_context,
+                on_progress=_bind_agent_text_callback(on_text, agent_name),
+            )
         else:
-            result = await run_single_agent(final_prompt, agent_name)
+            result = await run_single_agent(
+                final_prompt, agent_name, on_text=_bind_agent_text_callback(on_text, agent_name)
+            )
+        # Issue 内容已内联时，每次模型调用（多阶段为每个阶段）都省去一轮 Read
+        if INLINED_CONTEXT_MARKER in task_context:
+            executed_stages = [
+                text
+                for text in (result.get("stages") or {}).values()
+                if not str(text).startswith(_SKIPPED_STAGE_PREFIX)
+            ]
+            result["read_turns_saved"] = max(1, len(executed_stages))
         results[agent_name] = result
         total_cost_local = result.get("cost_usd", 0.0)
         logger.info(
@@ -1160,12 +1883,70 @@ async def run_agents_parallel(
             f"工具: {len(result.get('tool_calls', []))}"
         )
 
-    # 使用 anyio.create_task_group 实现真正的并行执行
-    async with anyio.create_task_group() as tg:
-        for agent in agents:
-            tg.start_soon(run_agent_task, agent, results)
+    upstream_map = _validate_agent_dependencies(agents, dependencies) if dependencies else {}
+    done_events = {agent: anyio.Event() for agent in agents}
+    # 批次预算账本：超过总上限时取消仍在运行的 agent，并让后续查询直接失败
+    budget_ledger = BudgetLedger(get_wave_budget_usd())
+
+    async def run_agent_node(agent_name: str) -> None:
+        """依赖调度：等待上游完成后注入其输出，再运行当前 agent"""
+        try:
+            upstream_text = ""
+            upstream = upstream_map.get(agent_name, [])
+            if upstream:
+                for dep in upstream:
+                    await done_events[dep].wait()
+                logger.info(f"[Issue#{issue_number}] [流水线] {agent_name} 的上游已完成: {', '.join(upstream)}")
+                upstream_text = _format_upstream_outputs({dep: results.get(dep) for dep in upstream})
+            with anyio.CancelScope() as scope:
+                budget_ledger.register(agent_name, scope)
+                await run_agent_task(agent_name, results, task_context, upstream_text)
+            budget_ledger.unregister(agent_name)
+            if scope.cancelled_caught:
+                logger.warning(f"[Issue#{issue_number}] {agent_name} 因批次预算耗尽被取消")
+                results[agent_name] = budget_ledger.failure_result(
+                    agent_name, budget_ledger.spent_by_agent.get(agent_name, 0.0)
+                )
+        finally:
+            done_events[agent_name].set()
+        if on_result is not None and agent_name in results:
+            try:
+                await on_result(agent_name, results[agent_name])
+            except Exception as exc:
+                logger.warning(f"[{agent_name}] 结果回调失败: {exc}")
+
+    # 使用 anyio.create_task_group 实现真正的并行执行（子任务继承 contextvar 中的预算账本）
+    ledger_token = current_budget_ledger.set(budget_ledger)
+    issue_token = current_usage_issue.set(issue_number)
+    try:
+        with span("wave", lane="orchestrator", issue=issue_number, agents=",".join(agents)):
+            async with anyio.create_task_group() as tg:
+                for agent in agents:
+                    tg.start_soon(run_agent_node, agent)
+    finally:
+        current_usage_issue.reset(issue_token)
+        current_budget_ledger.reset(ledger_token)
 
     # 汇总总成本
     total_cost = sum(r.get("cost_usd", 0.0) for r in results.values())
-    logger.info(f"[Issue#{issue_number}] 所有 Agent 完成 - 总成本: ${total_cost:.4f}")
+    read_turns_saved = sum(int(r.get("read_turns_saved", 0)) for r in results.values())
+    cache_read_tokens = sum(int(r.get("cache_read_input_tokens", 0)) for r in results.values())
+    cache_creation_tokens = sum(int(r.get("cache_creation_input_tokens", 0)) for r in results.values())
+    input_tokens = sum(int(r.get("input_tokens", 0)) for r in results.values())
+    logger.info(
+        f"[Issue#{issue_number}] 所有 Agent 完成 - 总成本: ${total_cost:.4f}"
+        + (f", 内联上下文节省 Read 轮次: {read_turns_saved}" if read_turns_saved else "")
+        + (
+            f", 缓存读取Token: {cache_read_tokens}, 缓存写入Token: {cache_creation_tokens}, "
+            f"缓存命中率: {_cache_hit_ratio(input_tokens, cache_read_tokens, cache_creation_tokens):.0%}"
+            if cache_read_tokens or cache_creation_tokens
+            else ""
+        )
+        + (
+            f", 批次预算: ${budget_ledger.spent_usd:.4f}/${budget_ledger.cap_usd:.4f}"
+            + ("（已超限）" if budget_ledger.exceeded else "")
+            if budget_ledger.cap_usd is not None
+            else ""
+        )
+    )
     return results
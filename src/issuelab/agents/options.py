@@ -16,6 +16,7 @@ import yaml
 from claude_agent_sdk import AgentDefinition, ClaudeAgentOptions
 
 from issuelab.agents.config import AgentConfig
+from issuelab.agents.console import AgentConsole, current_agent_console
 from issuelab.agents.discovery import AGENTS_DIR, discover_agents
 from issuelab.agents.registry import get_agent_config, is_system_agent
 from issuelab.config import Config
@@ -106,6 +107,44 @@ def _get_agent_run_overrides(agent_name: str | None) -> dict[str, float | int]:
     return overrides
 
 
+# 多阶段流程中默认使用快速模型的轻量阶段（Judge 等其余阶段沿用主模型）
+_FAST_MODEL_STAGES = frozenset({"Researcher", "Critic"})
+
+
+def get_stage_run_overrides(agent_name: str | None, stage_name: str | None) -> dict[str, Any]:
+    """读取多阶段流程中单个阶段的模型/轮数/预算覆盖
+
+    优先级：agent.yml 的 stage_overrides.<Stage> > 轻量阶段默认使用 ANTHROPIC_FAST_MODEL。
+    返回空字典表示沿用 agent 级配置。
+
+    agent.yml 示例::
+
+        stage_overrides:
+          Researcher: {model: fast-model, max_turns: 40, max_budget_usd: 2.0}
+          Judge: {max_turns: 20}
+    """
+    if not agent_name or not stage_name:
+        return {}
+
+    overrides: dict[str, Any] = {}
+    fast_model = Config.get_anthropic_fast_model()
+    if fast_model and stage_name in _FAST_MODEL_STAGES:
+        overrides["model"] = fast_model
+
+    config = get_agent_config(agent_name, agents_dir=AGENTS_DIR, include_disabled=False) or {}
+    stage_config = (config.get("stage_overrides") or {}).get(stage_name)
+    if isinstance(stage_config, dict):
+        if stage_config.get("model"):
+            overrides["model"] = str(stage_config["model"])
+        if "max_turns" in stage_config:
+            with suppress(TypeError, ValueError):
+                overrides["max_turns"] = int(stage_config["max_turns"])
+        if "max_budget_usd" in stage_config:
+            with suppress(TypeError, ValueError):
+                overrides["max_budget_usd"] = float(stage_config["max_budget_usd"])
+    return overrides
+
+
 def _get_agent_feature_flags(agent_name: str | None) -> dict[str, bool]:
     """读取 agent.yml 中的功能开关（默认取环境配置）"""
     flags = _default_feature_flags(agent_name)
@@ -470,20 +509,21 @@ def _create_agent_options_impl(
     subagents_sig: str,
     enable_skills: bool,
     enable_subagents: bool,
+    model: str | None = None,
 ) -> ClaudeAgentOptions:
     """创建 Agent 选项的实际实现（无缓存）"""
     env = Config.get_anthropic_env()
+    if model:
+        env["ANTHROPIC_MODEL"] = model
     env["CLAUDE_AGENT_SDK_SKIP_VERSION_CHECK"] = "true"
 
-    # 收集 SDK 内部日志的回调
-    sdk_logs: list[str] = []
-
+    # SDK 内部日志的回调（不在闭包里累积日志：options 会被缓存，serve 常驻进程中会无限增长）
     def sdk_stderr_handler(message: str) -> None:
         """捕获 SDK 内部日志（包含详细的模型交互信息）"""
-        log_entry = f"[SDK] {message}"
-        sdk_logs.append(log_entry)
-        # 输出到终端
-        print(message, end="", flush=True)
+        # 输出到终端：经当前运行的 console 立即写出（不留在缓冲里，超时或崩溃前的诊断信息不会丢）
+        console = current_agent_console() or AgentConsole(agent_name or "sdk")
+        console.write(message)
+        console.flush()
         # 记录到日志
         logger.debug(f"[SDK] {message}")
 
@@ -543,6 +583,7 @@ def _create_agent_options_impl(
         max_turns=max_turns if max_turns is not None else AgentConfig().max_turns,
         max_budget_usd=max_budget_usd if max_budget_usd is not None else AgentConfig().max_budget_usd,
         system_prompt={"type": "preset", "preset": "claude_code", "append": system_prompt_append},
+        model=model or None,
         setting_sources=["user", "project"],
         env=env,
         permission_mode="bypassPermissions",
@@ -558,6 +599,7 @@ def create_agent_options(
     max_budget_usd: float | None = None,
     *,
     agent_name: str | None = None,
+    model: str | None = None,
 ) -> ClaudeAgentOptions:
     """创建包含所有评审代理的配置（动态发现）
 
@@ -568,6 +610,8 @@ def create_agent_options(
     Args:
         max_turns: 最大对话轮数（默认使用 AgentConfig 默认值）
         max_budget_usd: 最大花费限制（默认使用 AgentConfig 默认值）
+        agent_name: agent 名称（用于读取 agent.yml 覆盖）
+        model: 模型覆盖（默认使用 ANTHROPIC_MODEL）
 
     Returns:
         ClaudeAgentOptions: 配置好的 SDK 选项
@@ -635,6 +679,7 @@ def create_agent_options(
         _mcp_cache_key(mcp_servers),
         _skills_signature(cwd),
         subagents_sig,
+        model or "",
     )
 
     # 检查缓存
@@ -660,6 +705,7 @@ def create_agent_options(
         subagents_sig=subagents_sig,
         enable_skills=feature_flags["enable_skills"],
         enable_subagents=feature_flags["enable_subagents"],
+        model=model,
     )
 
     # 存入缓存
@@ -0,0 +1,202 @@
+"""查询后端：实时 / 录制 / 回放
+
+ISSUELAB_QUERY_BACKEND 选择 run_single_agent 使用的消息流来源：
+- live（默认）：直接调用 SDK query
+- record：调用 SDK query，同时把消息流（各类 block、ResultMessage 用量、消息间隔）录制到文件
+- replay：不访问模型，按录制文件回放消息流（间隔按 ISSUELAB_REPLAY_DELAY_SCALE 缩放，0 表示不等待）
+
+录制文件位于 ISSUELAB_REPLAY_DIR（默认 .issuelab/recordings）/<agent>/<stage>/<prompt 哈希>.jsonl，
+回放时优先按 prompt 哈希精确匹配；找不到时使用同 agent/阶段最新的录制
+（ISSUELAB_REPLAY_STRICT=1 时改为报错），便于在 prompt 微调后继续离线复现编排开销与并发行为。
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import os
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+from claude_agent_sdk import (
+    AssistantMessage,
+    ResultMessage,
+    SystemMessage,
+    TextBlock,
+    ThinkingBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+)
+
+from issuelab.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+QUERY_BACKENDS = ("live", "record", "replay")
+RECORDING_VERSION = 1
+
+_MESSAGE_TYPES: dict[str, type] = {
+    cls.__name__: cls for cls in (AssistantMessage, ResultMessage, SystemMessage, UserMessage)
+}
+_BLOCK_TYPES: dict[str, type] = {cls.__name__: cls for cls in (TextBlock, ThinkingBlock, ToolUseBlock, ToolResultBlock)}
+
+
+class ReplayNotFoundError(LookupError):
+    """回放模式下找不到对应录制"""
+
+
+def get_query_backend() -> str:
+    """当前查询后端（ISSUELAB_QUERY_BACKEND：live / record / replay，无效值按 live 处理）"""
+    value = os.environ.get("ISSUELAB_QUERY_BACKEND", "live").strip().lower()
+    return value if value in QUERY_BACKENDS else "live"
+
+
+def get_replay_dir() -> str:
+    """录制目录（ISSUELAB_REPLAY_DIR，默认 .issuelab/recordings）"""
+    return os.environ.get("ISSUELAB_REPLAY_DIR") or os.path.join(os.getcwd(), ".issuelab", "recordings")
+
+
+def get_replay_delay_scale() -> float:
+    """回放间隔缩放（ISSUELAB_REPLAY_DELAY_SCALE，默认 1.0 = 原始间隔，0 = 不等待）"""
+    try:
+        return max(0.0, float(os.environ.get("ISSUELAB_REPLAY_DELAY_SCALE", "1.0")))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def _safe_segment(value: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in value) or "_"
+
+
+def prompt_digest(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def recording_path(agent_name: str, stage_name: str | None, prompt: str, directory: str | None = None) -> str:
+    return os.path.join(
+        directory or get_replay_dir(),
+        _safe_segment(agent_name),
+        _safe_segment(stage_name or "run"),
+        f"{prompt_digest(prompt)}.jsonl",
+    )
+
+
+def _encode_block(block: Any) -> dict[str, Any] | None:
+    if not dataclasses.is_dataclass(block) or type(block).__name__ not in _BLOCK_TYPES:
+        return None
+    return {"block": type(block).__name__, **dataclasses.asdict(block)}
+
+
+def encode_message(message: Any) -> dict[str, Any] | None:
+    """SDK 消息 -> 可 JSON 序列化的 dict（不认识的消息类型返回 None，不录制）"""
+    name = type(message).__name__
+    if name not in _MESSAGE_TYPES or not dataclasses.is_dataclass(message):
+        return None
+    fields: dict[str, Any] = {}
+    for field in dataclasses.fields(message):
+        value = getattr(message, field.name)
+        if field.name == "content" and isinstance(value, list):
+            value = [encoded for encoded in (_encode_block(block) for block in value) if encoded is not None]
+        elif dataclasses.is_dataclass(value):
+            value = dataclasses.asdict(value)
+        fields[field.name] = value
+    return {"message": name, **fields}
+
+
+def _construct(cls: type, data: dict[str, Any]) -> Any:
+    # 只传入当前 SDK 版本认识的字段，兼容不同版本录制的文件
+    names = {field.name for field in dataclasses.fields(cls)}
+    return cls(**{key: value for key, value in data.items() if key in names})
+
+
+def decode_message(data: dict[str, Any]) -> Any:
+    """dict -> SDK 消息"""
+    cls = _MESSAGE_TYPES[data["message"]]
+    fields = {key: value for key, value in data.items() if key not in {"message", "delay"}}
+    content = fields.get("content")
+    if isinstance(content, list):
+        fields["content"] = [
+            _construct(_BLOCK_TYPES[item["block"]], item)
+            for item in content
+            if isinstance(item, dict) and item.get("block") in _BLOCK_TYPES
+        ]
+    return _construct(cls, fields)
+
+
+async def record_stream(
+    stream: AsyncIterator[Any], agent_name: str, stage_name: str | None, prompt: str
+) -> AsyncIterator[Any]:
+    """透传 SDK 消息流并录制；流结束（含提前关闭）时写入文件"""
+    path = recording_path(agent_name, stage_name, prompt)
+    lines: list[dict[str, Any]] = []
+    last = time.monotonic()
+    try:
+        async for message in stream:
+            now = time.monotonic()
+            encoded = encode_message(message)
+            if encoded is not None:
+                lines.append({"delay": round(now - last, 4), **encoded})
+            last = now
+            yield message
+    finally:
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+        if lines:
+            _write_recording(path, agent_name, stage_name, prompt, lines)
+
+
+def _write_recording(
+    path: str, agent_name: str, stage_name: str | None, prompt: str, lines: list[dict[str, Any]]
+) -> None:
+    header = {
+        "recording": RECORDING_VERSION,
+        "agent": agent_name,
+        "stage": stage_name,
+        "prompt_sha256": prompt_digest(prompt),
+        "recorded_at": time.time(),
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for item in (header, *lines):
+                f.write(json.dumps(item, ensure_ascii=False, default=str) + "\n")
+        os.replace(tmp_path, path)
+        logger.info(f"[{agent_name}] 已录制 {len(lines)} 条消息: {path}")
+    except OSError as exc:
+        logger.warning(f"[{agent_name}] 录制写入失败: {exc}")
+
+
+def find_recording(agent_name: str, stage_name: str | None, prompt: str) -> str:
+    """定位回放文件：精确匹配 prompt 哈希，否则（非严格模式）取同 agent/阶段最新录制"""
+    exact = recording_path(agent_name, stage_name, prompt)
+    if os.path.exists(exact):
+        return exact
+    strict = os.environ.get("ISSUELAB_REPLAY_STRICT", "0").lower() in {"1", "true", "yes", "on"}
+    directory = os.path.dirname(exact)
+    candidates = []
+    if not strict and os.path.isdir(directory):
+        candidates = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".jsonl")]
+    if not candidates:
+        raise ReplayNotFoundError(f"没有 {agent_name}/{stage_name or 'run'} 的录制: {exact}")
+    latest = max(candidates, key=os.path.getmtime)
+    logger.info(f"[{agent_name}] prompt 无精确匹配的录制，回放最新录制: {latest}")
+    return latest
+
+
+async def replay_stream(agent_name: str, stage_name: str | None, prompt: str) -> AsyncIterator[Any]:
+    """按录制回放 SDK 消息流"""
+    path = find_recording(agent_name, stage_name, prompt)
+    scale = get_replay_delay_scale()
+    with open(path, encoding="utf-8") as f:
+        items = [json.loads(line) for line in f if line.strip()]
+    for item in items:
+        if "message" not in item:
+            continue
+        delay = float(item.get("delay", 0.0)) * scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+        yield decode_message(item)
@@ -0,0 +1,203 @@
+"""Agent 运行耗时统计与自适应超时
+
+每次运行记录总耗时、成功尝试耗时和首条消息延迟（time-to-first-message）到本地 JSON 存储，
+样本按 agent（多阶段流程按 agent:stage）分组，再按历史分位数（p99 × 余量）推导超时；静态配置（agent.yml / 默认值）同时是上界，
+自适应只会在历史耗时稳定偏短时收紧超时，不会放宽。
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from issuelab.logging_config import get_logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - 非 POSIX 平台只做进程内加锁
+    fcntl = None  # type: ignore[assignment]
+
+logger = get_logger(__name__)
+
+_MAX_SAMPLES_PER_AGENT = 200
+_DEFAULT_MIN_SAMPLES = 10
+_DEFAULT_MARGIN = 1.5
+_DEFAULT_FLOOR_RATIO = 0.25
+_DEFAULT_MAX_TIMEOUT_RATE = 0.1
+_RECENT_WINDOW = 20
+
+_lock = threading.Lock()
+
+
+def is_adaptive_timeout_enabled() -> bool:
+    """是否根据历史耗时自适应超时（ISSUELAB_ADAPTIVE_TIMEOUTS，默认开启；样本不足时沿用静态配置）"""
+    return os.environ.get("ISSUELAB_ADAPTIVE_TIMEOUTS", "1").lower() not in {"0", "false", "no", "off"}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_run_stats_path() -> str:
+    """统计文件路径（ISSUELAB_RUN_STATS_FILE，默认 .issuelab/run_stats.json）"""
+    return os.environ.get("ISSUELAB_RUN_STATS_FILE") or os.path.join(os.getcwd(), ".issuelab", "run_stats.json")
+
+
+def _load(path: str) -> dict[str, list[dict[str, Any]]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _sample_key(agent_name: str, stage_name: str | None) -> str:
+    return f"{agent_name}:{stage_name}" if stage_name else agent_name
+
+
+def load_samples(agent_name: str, path: str | None = None, *, stage_name: str | None = None) -> list[dict[str, Any]]:
+    samples = _load(path or get_run_stats_path()).get(_sample_key(agent_name, stage_name), [])
+    return samples if isinstance(samples, list) else []
+
+
+@contextmanager
+def _locked(stats_path: str) -> Iterator[None]:
+    """进程内线程锁 + 跨进程文件锁（<path>.lock），串行化统计文件的读-改-写"""
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        try:
+            os.makedirs(os.path.dirname(stats_path) or ".", exist_ok=True)
+            fd = os.open(f"{stats_path}.lock", os.O_CREAT | os.O_RDWR)
+        except OSError as exc:
+            logger.warning(f"运行统计文件锁不可用: {exc}")
+            yield
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+def record_run(
+    agent_name: str,
+    *,
+    duration_seconds: float,
+    attempt_seconds: float | None,
+    first_message_seconds: float | None,
+    ok: bool,
+    error_type: str | None = None,
+    stage_name: str | None = None,
+    path: str | None = None,
+) -> None:
+    """追加一条运行记录（每个 agent / 阶段仅保留最近 200 条）"""
+    stats_path = path or get_run_stats_path()
+    key = _sample_key(agent_name, stage_name)
+    sample = {
+        "at": time.time(),
+        "ok": ok,
+        "error_type": error_type,
+        "duration": round(duration_seconds, 3),
+        "attempt": round(attempt_seconds, 3) if attempt_seconds is not None else None,
+        "first_message": round(first_message_seconds, 3) if first_message_seconds is not None else None,
+    }
+    with _locked(stats_path):
+        data = _load(stats_path)
+        samples = data.get(key)
+        if not isinstance(samples, list):
+            samples = []
+        samples.append(sample)
+        data[key] = samples[-_MAX_SAMPLES_PER_AGENT:]
+        try:
+            os.makedirs(os.path.dirname(stats_path) or ".", exist_ok=True)
+            tmp_path = f"{stats_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, stats_path)
+        except OSError as exc:
+            logger.warning(f"[{key}] 运行统计写入失败: {exc}")
+
+
+def percentile(values: list[float], q: float) -> float:
+    """最近秩法分位数（q 取 0-100）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _bounded(value: float, static_value: int) -> int:
+    floor = static_value * _env_float("ISSUELAB_ADAPTIVE_TIMEOUT_FLOOR_RATIO", _DEFAULT_FLOOR_RATIO)
+    return max(1, int(math.ceil(min(max(value, floor), static_value))))
+
+
+def adaptive_timeouts(
+    agent_name: str,
+    static_overall: int | None,
+    static_attempt: int | None,
+    *,
+    stage_name: str | None = None,
+    path: str | None = None,
+) -> tuple[int | None, int | None]:
+    """按历史 p99 × 余量推导 (overall, attempt) 超时
+
+    - 传入 stage_name 时只使用该阶段的样本（多阶段流程各阶段耗时差异很大）
+    - 样本数不足（ISSUELAB_ADAPTIVE_TIMEOUT_MIN_SAMPLES，默认 10）或功能关闭时返回静态配置
+    - 结果限制在静态配置的 [floor_ratio, 1] 倍之间（floor_ratio 默认 0.25）
+    - 静态配置为 None（不限时）时保持不限时
+    - 超时的运行不计入分位数：其耗时只是被截断的下界（>= 当时的超时），计入会让超时逐次抬高；
+      其他失败的运行照常计入
+    - 超时被删失后分位数无法反映更慢的负载：最近 20 次运行的超时率达到
+      ISSUELAB_ADAPTIVE_TIMEOUT_MAX_TIMEOUT_RATE（默认 0.1）时退回静态配置，直到超时从窗口中滑出
+    """
+    if not is_adaptive_timeout_enabled():
+        return static_overall, static_attempt
+
+    label = _sample_key(agent_name, stage_name)
+    all_samples = load_samples(agent_name, path, stage_name=stage_name)
+    recent = all_samples[-_RECENT_WINDOW:]
+    recent_timeouts = sum(1 for s in recent if s.get("error_type") == "timeout")
+    max_timeout_rate = _env_float("ISSUELAB_ADAPTIVE_TIMEOUT_MAX_TIMEOUT_RATE", _DEFAULT_MAX_TIMEOUT_RATE)
+    if recent_timeouts and recent_timeouts / len(recent) >= max_timeout_rate:
+        logger.info(f"[{label}] 最近 {len(recent)} 次运行中 {recent_timeouts} 次超时，自适应超时退回静态配置")
+        return static_overall, static_attempt
+
+    samples = [s for s in all_samples if s.get("error_type") != "timeout"]
+    min_samples = int(_env_float("ISSUELAB_ADAPTIVE_TIMEOUT_MIN_SAMPLES", _DEFAULT_MIN_SAMPLES))
+    if len(samples) < max(1, min_samples):
+        return static_overall, static_attempt
+
+    margin = _env_float("ISSUELAB_ADAPTIVE_TIMEOUT_MARGIN", _DEFAULT_MARGIN)
+    durations = [float(s["duration"]) for s in samples if s.get("duration") is not None]
+    attempts = [float(s["attempt"]) for s in samples if s.get("attempt") is not None]
+    first_messages = [float(s["first_message"]) for s in samples if s.get("first_message") is not None]
+
+    overall = static_overall
+    if static_overall and durations:
+        overall = _bounded(percentile(durations, 99) * margin, static_overall)
+
+    attempt = static_attempt
+    if static_attempt and (attempts or first_messages):
+        target = max(percentile(attempts, 99), percentile(first_messages, 99)) * margin
+        attempt = _bounded(target, static_attempt)
+    if overall and attempt:
+        attempt = min(attempt, overall)
+
+    if (overall, attempt) != (static_overall, static_attempt):
+        logger.info(
+            f"[{label}] 自适应超时: overall {static_overall} -> {overall}s, "
+            f"attempt {static_attempt} -> {attempt}s (样本 {len(samples)} 条)"
+        )
+    return overall, attempt
@@ -0,0 +1,160 @@
+"""相同 Agent 请求的 single-flight 去重
+
+同一 Issue 短时间内的多个事件（评论 + 标签 + 编辑）可能同时触发完全相同的 agent 运行：
+- 进程内：相同请求共享同一个 Future，后到者等待并复用先到者的结果；
+  Future 为线程安全的 concurrent.futures.Future，serve worker 中不同线程各自的事件循环之间同样可以共享
+- 跨进程（同一 runner）：.issuelab/singleflight/<key>.lock 文件锁串行化，
+  后到者拿到锁后若发现先到者在自己发起之后写入了结果，则直接复用
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from issuelab.logging_config import get_logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - 非 POSIX 平台只做进程内去重
+    fcntl = None  # type: ignore[assignment]
+
+logger = get_logger(__name__)
+
+_LOCK_POLL_SECONDS = 0.2
+_RESULT_RETENTION_SECONDS = 24 * 3600
+
+_inflight: dict[str, concurrent.futures.Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def is_singleflight_enabled() -> bool:
+    """是否启用 single-flight 去重（ISSUELAB_SINGLEFLIGHT，默认开启）"""
+    return os.environ.get("ISSUELAB_SINGLEFLIGHT", "1").lower() not in {"0", "false", "no", "off"}
+
+
+def request_key(*parts: Any) -> str:
+    """由请求参数生成稳定键"""
+    payload = json.dumps([str(part) for part in parts], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _singleflight_dir() -> str:
+    """锁与结果目录（ISSUELAB_SINGLEFLIGHT_DIR，默认 .issuelab/singleflight）"""
+    return os.environ.get("ISSUELAB_SINGLEFLIGHT_DIR") or os.path.join(os.getcwd(), ".issuelab", "singleflight")
+
+
+def _read_result_since(path: str, since: float) -> dict | None:
+    """读取在 since 之后写入的结果（更早的结果属于之前的独立运行，不复用）"""
+    try:
+        if os.path.getmtime(path) < since:
+            return None
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _write_result(directory: str, path: str, result: dict) -> None:
+    try:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+        cutoff = time.time() - _RESULT_RETENTION_SECONDS
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                full = os.path.join(directory, name)
+                if os.path.getmtime(full) < cutoff:
+                    os.remove(full)
+    except OSError as exc:
+        logger.warning(f"single-flight 结果写入失败: {exc}")
+
+
+async def _run_with_file_lock(key: str, func: Callable[[], Awaitable[dict]], started_at: float) -> tuple[dict, bool]:
+    if fcntl is None:
+        return await func(), False
+
+    directory = _singleflight_dir()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd = os.open(os.path.join(directory, f"{key}.lock"), os.O_CREAT | os.O_RDWR)
+    except OSError as exc:
+        logger.warning(f"single-flight 文件锁不可用，直接运行: {exc}")
+        return await func(), False
+
+    result_path = os.path.join(directory, f"{key}.json")
+    locked = False
+    try:
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                locked = True
+                break
+            except BlockingIOError:
+                await asyncio.sleep(_LOCK_POLL_SECONDS)
+
+        shared = _read_result_since(result_path, started_at)
+        if shared is not None:
+            return shared, True
+
+        result = await func()
+        if result.get("ok", True):
+            _write_result(directory, result_path, result)
+        return result, False
+    finally:
+        if locked:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def _as_reused(result: dict, source: str) -> dict:
+    """复用结果：成本已由首个请求计入，这里记为 0，避免重复统计"""
+    reused = dict(result)
+    reused["singleflight_reused"] = source
+    reused["reused_cost_usd"] = float(result.get("cost_usd", 0.0) or 0.0)
+    reused["cost_usd"] = 0.0
+    return reused
+
+
+async def run_once(key: str, func: Callable[[], Awaitable[dict]], *, label: str = "") -> dict:
+    """相同 key 的并发请求只执行一次 func，其余请求复用其结果"""
+    started_at = time.time()
+    future: concurrent.futures.Future = concurrent.futures.Future()
+    with _inflight_lock:
+        existing = _inflight.setdefault(key, future)
+    if existing is not future:
+        logger.info(f"[{label}] 相同请求正在进行，等待并复用其结果")
+        try:
+            # 先到者可能在其他线程的事件循环中运行，经 wrap_future 在本循环中等待
+            return _as_reused(await asyncio.shield(asyncio.wrap_future(existing)), "process")
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if current is not None and current.cancelling():
+                raise
+            # 首个请求被取消：自行运行
+            logger.info(f"[{label}] 首个相同请求已取消，改为自行运行")
+        with _inflight_lock:
+            _inflight[key] = future
+
+    try:
+        result, reused = await _run_with_file_lock(key, func, started_at)
+    except BaseException:
+        future.cancel()
+        raise
+    finally:
+        with _inflight_lock:
+            if _inflight.get(key) is future:
+                del _inflight[key]
+
+    future.set_result(result)
+    if reused:
+        logger.info(f"[{label}] 复用了其他进程的相同请求结果")
+        return _as_reused(result, "file")
+    return result
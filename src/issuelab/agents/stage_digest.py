@@ -0,0 +1,153 @@
+"""多阶段流程的阶段交接摘要
+
+后续阶段原本逐字嵌入所有前序阶段输出，输入 token 随流程深度近似平方增长。
+本模块把每个阶段的 YAML 输出压缩为结构化摘要（结论、URL、核验结论、待解决问题），
+完整输出写入 .issuelab/stages/ 下的文件，下游阶段需要细节时可用 Read 工具按需读取。
+"""
+
+import os
+import re
+from typing import Any
+
+import yaml
+
+from issuelab.logging_config import get_logger
+from issuelab.utils.yaml_text import extract_yaml_block
+
+logger = get_logger(__name__)
+
+_URL_RE = re.compile(r"https?://[^\s)>\]\"']+")
+_MAX_ITEM_CHARS = 300
+_MAX_FALLBACK_CHARS = 800
+
+
+def is_stage_digest_enabled() -> bool:
+    """是否以摘要形式在阶段间交接（ISSUELAB_STAGE_DIGEST，默认开启）"""
+    return os.environ.get("ISSUELAB_STAGE_DIGEST", "1").lower() not in {"0", "false", "no", "off"}
+
+
+def _clip(value: Any, limit: int = _MAX_ITEM_CHARS) -> str:
+    text = " ".join(str(value or "").split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _as_list(value: Any) -> list:
+    if isinstance(value, list):
+        return value
+    return [value] if value else []
+
+
+def _dedupe(items: list[str]) -> list[str]:
+    seen: list[str] = []
+    for item in items:
+        if item and item not in seen:
+            seen.append(item)
+    return seen
+
+
+def _extract_urls(text: str) -> list[str]:
+    return _dedupe([url.rstrip(".,;:!?") for url in _URL_RE.findall(text or "")])
+
+
+def build_stage_digest(text: str) -> dict[str, Any] | None:
+    """从阶段输出的 YAML 块提取结构化摘要；无法解析时返回 None
+
+    兼容 Researcher（evidence）、Analyst（candidates）、Critic（criticisms）、
+    Verifier（verified_sources）四种输出结构。
+    """
+    yaml_text = extract_yaml_block(text)
+    if not yaml_text:
+        return None
+    try:
+        parsed = yaml.safe_load(yaml_text)
+    except Exception:
+        return None
+    if not isinstance(parsed, dict):
+        return None
+
+    claims: list[str] = []
+    verdicts: list[str] = []
+    open_questions: list[str] = []
+
+    for item in _as_list(parsed.get("evidence")):
+        if isinstance(item, dict):
+            claim = _clip(item.get("claim"))
+            url = str(item.get("url") or "").strip()
+            confidence = str(item.get("confidence") or "").strip()
+            if claim:
+                claims.append(claim + (f" <{url}>" if url else "") + (f" [{confidence}]" if confidence else ""))
+
+    for item in _as_list(parsed.get("candidates")):
+        if isinstance(item, dict):
+            points = [_clip(item.get("summary"))]
+            points += [_clip(f) for f in _as_list(item.get("findings"))]
+            points += [f"建议: {_clip(r)}" for r in _as_list(item.get("recommendations"))]
+            claims.append(f"[{item.get('id', '?')}] " + "；".join(p for p in points if p))
+
+    for item in _as_list(parsed.get("criticisms")):
+        if isinstance(item, dict):
+            candidate_id = item.get("candidate_id", "?")
+            verdicts.extend(f"[{candidate_id}] {_clip(issue)}" for issue in _as_list(item.get("issues")))
+            open_questions.extend(_clip(gap) for gap in _as_list(item.get("missing_evidence")))
+
+    for item in _as_list(parsed.get("verified_sources")):
+        if isinstance(item, dict):
+            supports = "；".join(_clip(s) for s in _as_list(item.get("supports")))
+            verdicts.append(
+                f"{item.get('url', '')}: {item.get('status', 'unknown')}" + (f"（{supports}）" if supports else "")
+            )
+
+    open_questions.extend(_clip(q) for q in _as_list(parsed.get("open_questions")))
+    open_questions.extend(_clip(g) for g in _as_list(parsed.get("verification_gaps")))
+
+    digest: dict[str, Any] = {"summary": _clip(parsed.get("summary"))}
+    for key, values in (("claims", claims), ("verdicts", verdicts), ("open_questions", open_questions)):
+        values = _dedupe([v for v in values if v])
+        if values:
+            digest[key] = values
+    urls = _extract_urls(text)
+    if urls:
+        digest["urls"] = urls
+    if parsed.get("confidence"):
+        digest["confidence"] = str(parsed["confidence"])
+    return digest
+
+
+def write_stage_output_file(issue_number: int, stage_name: str, text: str) -> str | None:
+    """把阶段完整输出写入 .issuelab/stages/issue_N/<stage>.md，返回路径；失败返回 None"""
+    base_dir = os.path.join(os.getcwd(), ".issuelab", "stages", f"issue_{issue_number}")
+    path = os.path.join(base_dir, f"{stage_name.lower()}.md")
+    try:
+        os.makedirs(base_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    except OSError as exc:
+        logger.warning(f"[{stage_name}] 阶段输出写入失败: {exc}")
+        return None
+    return path
+
+
+def format_stage_handoff(issue_number: int, stage_name: str, text: str) -> str:
+    """生成交给下游阶段的内容：结构化摘要 + 完整输出文件引用
+
+    摘要不比原文短（或功能关闭）时直接交接原文。
+    """
+    full = f"### {stage_name} 输出\n{text}"
+    if not is_stage_digest_enabled():
+        return full
+
+    digest = build_stage_digest(text)
+    if digest is None:
+        digest = {"summary": _clip(text, _MAX_FALLBACK_CHARS)}
+        urls = _extract_urls(text)
+        if urls:
+            digest["urls"] = urls
+    body = yaml.safe_dump(digest, allow_unicode=True, sort_keys=False, width=1000).strip()
+
+    path = write_stage_output_file(issue_number, stage_name, text)
+    reference = f"（完整输出：{path}，需要细节时使用 Read 工具读取）" if path else ""
+    handoff = f"### {stage_name} 摘要{reference}\n```yaml\n{body}\n```"
+    if len(handoff) >= len(full):
+        return full
+    logger.info(f"[gqy20] {stage_name} 交接摘要: {len(text)} -> {len(handoff)} 字符")
+    return handoff
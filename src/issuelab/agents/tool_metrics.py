@@ -0,0 +1,232 @@
+"""工具调用指标 - 按 (agent, MCP server, tool) 统计延迟、错误率与结果大小
+
+执行器在 ToolUseBlock 与匹配的 ToolResultBlock 之间计时：
+- 每次运行的汇总写入结果 dict 的 tool_metrics 字段
+- 进程内累计的直方图写入 OpenMetrics 文本文件（默认 .issuelab/metrics/tool_metrics.prom），
+  用于定位拖慢运行的 MCP server（load_mcp_servers_for_agent 配置的工具名形如 mcp__<server>__<tool>）
+"""
+
+import bisect
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+from issuelab.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+BUILTIN_SERVER = "builtin"
+
+LATENCY_BUCKETS_SECONDS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+RESULT_SIZE_BUCKETS_CHARS = (100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+def is_tool_metrics_enabled() -> bool:
+    """是否写出工具指标文件（ISSUELAB_TOOL_METRICS，默认开启；结果中的 tool_metrics 始终记录）"""
+    return os.environ.get("ISSUELAB_TOOL_METRICS", "1").lower() not in {"0", "false", "no", "off"}
+
+
+def get_tool_metrics_path() -> str:
+    """OpenMetrics 文件路径（ISSUELAB_TOOL_METRICS_FILE，默认 .issuelab/metrics/tool_metrics.prom）"""
+    return os.environ.get("ISSUELAB_TOOL_METRICS_FILE") or os.path.join(
+        os.getcwd(), ".issuelab", "metrics", "tool_metrics.prom"
+    )
+
+
+def split_tool_name(tool_name: str) -> tuple[str, str]:
+    """拆分为 (server, tool)：mcp__github__search_issues -> (github, search_issues)；内置工具归为 builtin"""
+    if tool_name.startswith("mcp__"):
+        server, sep, tool = tool_name[len("mcp__") :].partition("__")
+        if sep and server and tool:
+            return server, tool
+    return BUILTIN_SERVER, tool_name
+
+
+def result_size_chars(content: Any) -> int:
+    """ToolResultBlock.content 的字符数（字符串或内容块列表）"""
+    if content is None:
+        return 0
+    if isinstance(content, str):
+        return len(content)
+    if isinstance(content, list):
+        total = 0
+        for item in content:
+            if isinstance(item, dict) and isinstance(item.get("text"), str):
+                total += len(item["text"])
+            else:
+                total += len(json.dumps(item, ensure_ascii=False, default=str))
+        return total
+    return len(str(content))
+
+
+@dataclass
+class _Histogram:
+    buckets: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)
+    total: float = 0.0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.counts:
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def merge(self, other: "_Histogram") -> None:
+        for i, value in enumerate(other.counts):
+            self.counts[i] += value
+        self.total += other.total
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        """按桶上界估算分位数（落在 +Inf 桶时返回最大有限上界）"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, value in enumerate(self.counts):
+            cumulative += value
+            if cumulative >= target:
+                return float(self.buckets[min(i, len(self.buckets) - 1)])
+        return float(self.buckets[-1])
+
+
+@dataclass
+class _ToolStats:
+    latency: _Histogram = field(default_factory=lambda: _Histogram(LATENCY_BUCKETS_SECONDS))
+    result_size: _Histogram = field(default_factory=lambda: _Histogram(RESULT_SIZE_BUCKETS_CHARS))
+    errors: int = 0
+    max_latency: float = 0.0
+
+    def merge(self, other: "_ToolStats") -> None:
+        self.latency.merge(other.latency)
+        self.result_size.merge(other.result_size)
+        self.errors += other.errors
+        self.max_latency = max(self.max_latency, other.max_latency)
+
+
+class ToolMetrics:
+    """(agent, server, tool) -> 延迟 / 结果大小直方图与错误计数"""
+
+    def __init__(self) -> None:
+        self._stats: dict[tuple[str, str, str], _ToolStats] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, agent_name: str, tool_name: str, latency_seconds: float, *, is_error: bool, result_chars: int):
+        server, tool = split_tool_name(tool_name)
+        with self._lock:
+            stats = self._stats.setdefault((agent_name, server, tool), _ToolStats())
+            stats.latency.observe(latency_seconds)
+            stats.result_size.observe(result_chars)
+            stats.max_latency = max(stats.max_latency, latency_seconds)
+            if is_error:
+                stats.errors += 1
+
+    def merge(self, other: "ToolMetrics") -> None:
+        with self._lock:
+            for key, stats in other._stats.items():
+                self._stats.setdefault(key, _ToolStats()).merge(stats)
+
+    def summary(self) -> list[dict[str, Any]]:
+        """每个工具一行的汇总（按总耗时降序）"""
+        rows = []
+        with self._lock:
+            for (agent_name, server, tool), stats in self._stats.items():
+                calls = stats.latency.count
+                rows.append(
+                    {
+                        "agent": agent_name,
+                        "server": server,
+                        "tool": tool,
+                        "calls": calls,
+                        "errors": stats.errors,
+                        "error_rate": round(stats.errors / calls, 4) if calls else 0.0,
+                        "latency_total_seconds": round(stats.latency.total, 3),
+                        "latency_p50_seconds": stats.latency.quantile(0.5),
+                        "latency_p95_seconds": stats.latency.quantile(0.95),
+                        "latency_max_seconds": round(stats.max_latency, 3),
+                        "result_chars_total": int(stats.result_size.total),
+                    }
+                )
+        rows.sort(key=lambda row: row["latency_total_seconds"], reverse=True)
+        return rows
+
+    def to_openmetrics(self) -> str:
+        """OpenMetrics 文本格式"""
+        with self._lock:
+            items = sorted(self._stats.items())
+        lines = [
+            "# TYPE issuelab_tool_latency_seconds histogram",
+            "# UNIT issuelab_tool_latency_seconds seconds",
+            "# HELP issuelab_tool_latency_seconds Time from ToolUseBlock to matching ToolResultBlock.",
+        ]
+        for key, stats in items:
+            lines.extend(_histogram_lines("issuelab_tool_latency_seconds", _labels(key), stats.latency))
+        lines += [
+            "# TYPE issuelab_tool_result_chars histogram",
+            "# HELP issuelab_tool_result_chars Tool result size in characters.",
+        ]
+        for key, stats in items:
+            lines.extend(_histogram_lines("issuelab_tool_result_chars", _labels(key), stats.result_size))
+        lines += [
+            "# TYPE issuelab_tool_errors counter",
+            "# HELP issuelab_tool_errors Tool results flagged is_error.",
+        ]
+        for key, stats in items:
+            lines.append(f"issuelab_tool_errors_total{{{_labels(key)}}} {stats.errors}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(key: tuple[str, str, str]) -> str:
+    agent_name, server, tool = key
+    return f'agent="{_escape_label(agent_name)}",server="{_escape_label(server)}",tool="{_escape_label(tool)}"'
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _histogram_lines(name: str, labels: str, histogram: _Histogram) -> list[str]:
+    lines = []
+    cumulative = 0
+    for bound, value in zip(histogram.buckets, histogram.counts, strict=False):
+        cumulative += value
+        lines.append(f'{name}_bucket{{{labels},le="{_format_number(bound)}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    lines.append(f"{name}_sum{{{labels}}} {_format_number(round(histogram.total, 6))}")
+    return lines
+
+
+_process_metrics = ToolMetrics()
+
+
+def get_process_tool_metrics() -> ToolMetrics:
+    """进程内累计的工具指标"""
+    return _process_metrics
+
+
+def publish_run_tool_metrics(run_metrics: ToolMetrics) -> None:
+    """将一次运行的指标并入进程累计，并重写 OpenMetrics 文件"""
+    _process_metrics.merge(run_metrics)
+    if not is_tool_metrics_enabled():
+        return
+    path = get_tool_metrics_path()
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(_process_metrics.to_openmetrics())
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        logger.warning(f"工具指标写入失败: {exc}")
@@ -0,0 +1,170 @@
+"""结构化用量记录
+
+每次 run_single_agent 结束追加一条 JSONL 记录（agent、issue、阶段、成本、token、轮数、工具、耗时、结果），
+替代从日志中用正则抓取 [Stats] 行。默认写到 LOG_FILE 所在目录的 usage.jsonl，
+随 workflow 的 logs/ artifact 一起上传；scripts/stats_agent_usage.py 优先读取这些记录。
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from collections.abc import Iterable
+from contextvars import ContextVar
+from typing import Any
+
+from issuelab.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+USAGE_FILE_NAME = "usage.jsonl"
+
+# 当前批次对应的 Issue 编号（由 _run_agents 设置，run_single_agent 记录时读取）
+current_usage_issue: ContextVar[int | None] = ContextVar("current_usage_issue", default=None)
+
+_lock = threading.Lock()
+
+
+def is_usage_record_enabled() -> bool:
+    """是否写用量记录（ISSUELAB_USAGE_RECORD，默认开启）"""
+    return os.environ.get("ISSUELAB_USAGE_RECORD", "1").lower() not in {"0", "false", "no", "off"}
+
+
+def get_usage_path() -> str:
+    """用量记录路径：ISSUELAB_USAGE_FILE > LOG_FILE 同目录 usage.jsonl > .issuelab/usage.jsonl"""
+    explicit = os.environ.get("ISSUELAB_USAGE_FILE")
+    if explicit:
+        return explicit
+    log_file = os.environ.get("LOG_FILE")
+    if log_file:
+        return os.path.join(os.path.dirname(os.path.abspath(log_file)), USAGE_FILE_NAME)
+    return os.path.join(os.getcwd(), ".issuelab", USAGE_FILE_NAME)
+
+
+def build_usage_record(
+    agent_name: str,
+    result: dict[str, Any],
+    *,
+    duration_seconds: float,
+    stage_name: str | None = None,
+    issue_number: int | None = None,
+) -> dict[str, Any]:
+    """由 run_single_agent 的结果构造一条用量记录"""
+    tools = Counter(str(name) for name in result.get("tool_calls", []) or [])
+    return {
+        "record_id": uuid.uuid4().hex,
+        "at": round(time.time(), 3),
+        "github_run_id": os.environ.get("GITHUB_RUN_ID") or None,
+        "agent": agent_name,
+        "issue": issue_number if issue_number is not None else current_usage_issue.get(),
+        "stage": stage_name,
+        "model": result.get("model"),
+        "ok": bool(result.get("ok", True)),
+        "error_type": result.get("error_type"),
+        "cost_usd": float(result.get("cost_usd", 0.0) or 0.0),
+        "cost_estimated": bool(result.get("cost_estimated", False)),
+        "num_turns": int(result.get("num_turns", 0) or 0),
+        "tool_calls": sum(tools.values()),
+        "tools": dict(tools),
+        "input_tokens": int(result.get("input_tokens", 0) or 0),
+        "output_tokens": int(result.get("output_tokens", 0) or 0),
+        "total_tokens": int(result.get("total_tokens", 0) or 0),
+        "cache_read_input_tokens": int(result.get("cache_read_input_tokens", 0) or 0),
+        "cache_creation_input_tokens": int(result.get("cache_creation_input_tokens", 0) or 0),
+        "duration_seconds": round(duration_seconds, 3),
+        "singleflight_reused": result.get("singleflight_reused"),
+    }
+
+
+def append_usage_record(record: dict[str, Any], path: str | None = None) -> None:
+    """追加一条记录（写入失败只告警）"""
+    if not is_usage_record_enabled():
+        return
+    usage_path = path or get_usage_path()
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _lock:
+        try:
+            os.makedirs(os.path.dirname(usage_path) or ".", exist_ok=True)
+            with open(usage_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as exc:
+            logger.warning(f"[{record.get('agent')}] 用量记录写入失败: {exc}")
+
+
+def parse_usage_records(text: str) -> list[dict[str, Any]]:
+    """解析 JSONL 文本，跳过空行与损坏行"""
+    records = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and record.get("agent"):
+            records.append(record)
+    return records
+
+
+def empty_usage_stats() -> dict[str, Any]:
+    return {
+        "runs_found": 0,
+        "cost_usd": 0.0,
+        "total_turns": 0,
+        "total_tool_calls": 0,
+        "total_input_tokens": 0,
+        "total_output_tokens": 0,
+        "total_tokens": 0,
+        "agents": {},
+    }
+
+
+def aggregate_usage_records(records: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """汇总为 stats_agent_usage 的统计结构（按 record_id 去重，同一 agent 的多次运行分别计数）"""
+    stats = empty_usage_stats()
+    seen: set[str] = set()
+    for record in records:
+        record_id = str(record.get("record_id") or "")
+        if record_id:
+            if record_id in seen:
+                continue
+            seen.add(record_id)
+
+        cost = float(record.get("cost_usd", 0.0) or 0.0)
+        turns = int(record.get("num_turns", 0) or 0)
+        tools = int(record.get("tool_calls", 0) or 0)
+        input_tokens = int(record.get("input_tokens", 0) or 0)
+        output_tokens = int(record.get("output_tokens", 0) or 0)
+        total_tokens = int(record.get("total_tokens", 0) or 0)
+
+        agent = stats["agents"].setdefault(
+            str(record["agent"]),
+            {
+                "runs": 0,
+                "cost_usd": 0.0,
+                "total_turns": 0,
+                "total_tool_calls": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "total_tokens": 0,
+            },
+        )
+        agent["runs"] += 1
+        agent["cost_usd"] += cost
+        agent["total_turns"] += turns
+        agent["total_tool_calls"] += tools
+        agent["input_tokens"] += input_tokens
+        agent["output_tokens"] += output_tokens
+        agent["total_tokens"] += total_tokens
+
+        stats["runs_found"] += 1
+        stats["cost_usd"] += cost
+        stats["total_turns"] += turns
+        stats["total_tool_calls"] += tools
+        stats["total_input_tokens"] += input_tokens
+        stats["total_output_tokens"] += output_tokens
+        stats["total_tokens"] += total_tokens
+    return stats
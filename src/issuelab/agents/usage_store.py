@@ -0,0 +1,265 @@
+"""本地用量仓库（SQLite）
+
+按 workflow run 增量导入 usage.jsonl 记录（已导入的 run 直接跳过，无需重复下载 artifact），
+并提供任意时间窗口的查询：
+- 各 agent 的耗时 p50/p95/p99
+- 每个 Issue 的成本
+- 每轮 token 数
+- 失败率
+"""
+
+import os
+import re
+import sqlite3
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+
+from issuelab.agents.run_stats import percentile
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested_runs (
+    run_id TEXT PRIMARY KEY,
+    workflow TEXT,
+    started_at TEXT,
+    source TEXT,
+    records INTEGER NOT NULL,
+    ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS usage (
+    record_id TEXT PRIMARY KEY,
+    run_id TEXT,
+    at REAL,
+    agent TEXT NOT NULL,
+    issue INTEGER,
+    stage TEXT,
+    model TEXT,
+    ok INTEGER NOT NULL,
+    error_type TEXT,
+    cost_usd REAL NOT NULL,
+    num_turns INTEGER NOT NULL,
+    tool_calls INTEGER NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    total_tokens INTEGER NOT NULL,
+    cache_read_input_tokens INTEGER NOT NULL,
+    duration_seconds REAL
+);
+CREATE INDEX IF NOT EXISTS idx_usage_agent_at ON usage (agent, at);
+CREATE INDEX IF NOT EXISTS idx_usage_at ON usage (at);
+"""
+
+_USAGE_COLUMNS = (
+    "record_id",
+    "run_id",
+    "at",
+    "agent",
+    "issue",
+    "stage",
+    "model",
+    "ok",
+    "error_type",
+    "cost_usd",
+    "num_turns",
+    "tool_calls",
+    "input_tokens",
+    "output_tokens",
+    "total_tokens",
+    "cache_read_input_tokens",
+    "duration_seconds",
+)
+
+_RELATIVE_WINDOW = re.compile(r"^(\d+(?:\.\d+)?)([hdw])$")
+_WINDOW_UNIT_SECONDS = {"h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def get_usage_db_path() -> str:
+    """仓库路径（ISSUELAB_USAGE_DB，默认 .issuelab/usage.db）"""
+    return os.environ.get("ISSUELAB_USAGE_DB") or os.path.join(os.getcwd(), ".issuelab", "usage.db")
+
+
+def parse_time_bound(value: str | None, *, now: float | None = None) -> float | None:
+    """解析时间窗口边界：相对时长（24h / 7d / 2w，表示“距今”）或 ISO 日期/时间"""
+    if not value:
+        return None
+    current = time.time() if now is None else now
+    match = _RELATIVE_WINDOW.match(value.strip())
+    if match:
+        return current - float(match.group(1)) * _WINDOW_UNIT_SECONDS[match.group(2)]
+    try:
+        return datetime.fromisoformat(value.strip()).timestamp()
+    except ValueError as exc:
+        raise ValueError(f"无法解析时间: {value}（示例: 7d, 24h, 2026-10-01）") from exc
+
+
+def _parse_started_at(value: str | None) -> float | None:
+    """解析 GitHub run 的 startedAt（如 2026-10-01T12:00:00Z）"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class UsageStore:
+    """SQLite 用量仓库"""
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path or get_usage_db_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(_SCHEMA)
+        self._backfill_record_times()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "UsageStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    # ---- 导入 ----
+
+    def ingested_run_ids(self) -> set[str]:
+        return {row[0] for row in self.conn.execute("SELECT run_id FROM ingested_runs")}
+
+    def _backfill_record_times(self) -> None:
+        """旧版本导入的无时间记录（正则兜底统计）补上所属 run 的开始时间，使其进入时间窗口查询"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE usage SET at = (SELECT CAST(strftime('%s', r.started_at) AS REAL) FROM ingested_runs r "
+                "WHERE r.run_id = usage.run_id) WHERE at IS NULL"
+            )
+
+    def ingest_run(
+        self,
+        run_id: str,
+        records: Iterable[dict[str, Any]],
+        *,
+        workflow: str | None = None,
+        started_at: str | None = None,
+        source: str = "records",
+    ) -> int:
+        """导入一个 run 的记录并标记为已导入（记录按 record_id 去重），返回新增条数
+
+        没有 at 的记录（如日志正则兜底统计）以 run 的开始时间 started_at（ISO 时间）为准。
+        """
+        default_at = _parse_started_at(started_at)
+        rows = [self._row(run_id, record, default_at) for record in records]
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO usage ({', '.join(_USAGE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _USAGE_COLUMNS)})",
+                rows,
+            )
+            inserted = self.conn.total_changes - before
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ingested_runs (run_id, workflow, started_at, source, records, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, workflow, started_at, source, len(rows), time.time()),
+            )
+        return inserted
+
+    @staticmethod
+    def _row(run_id: str, record: dict[str, Any], default_at: float | None = None) -> tuple:
+        record_id = record.get("record_id") or f"{run_id}:{record.get('agent')}:{record.get('stage') or ''}"
+        return (
+            str(record_id),
+            str(record.get("github_run_id") or run_id),
+            float(record["at"]) if record.get("at") is not None else default_at,
+            str(record["agent"]),
+            int(record["issue"]) if record.get("issue") is not None else None,
+            record.get("stage"),
+            record.get("model"),
+            1 if record.get("ok", True) else 0,
+            record.get("error_type"),
+            float(record.get("cost_usd", 0.0) or 0.0),
+            int(record.get("num_turns", 0) or 0),
+            int(record.get("tool_calls", 0) or 0),
+            int(record.get("input_tokens", 0) or 0),
+            int(record.get("output_tokens", 0) or 0),
+            int(record.get("total_tokens", 0) or 0),
+            int(record.get("cache_read_input_tokens", 0) or 0),
+            float(record["duration_seconds"]) if record.get("duration_seconds") is not None else None,
+        )
+
+    # ---- 查询 ----
+
+    def _select(self, columns: str, since: float | None, until: float | None, extra: str = "") -> list[tuple]:
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("at < ?")
+            params.append(until)
+        if extra:
+            clauses.append(extra)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return list(self.conn.execute(f"SELECT {columns} FROM usage{where}", params))
+
+    def duration_percentiles(self, since: float | None = None, until: float | None = None) -> list[dict[str, Any]]:
+        """各 agent 的耗时分位数（仅统计有耗时的记录）"""
+        durations: dict[str, list[float]] = defaultdict(list)
+        for agent, duration in self._select("agent, duration_seconds", since, until, "duration_seconds IS NOT NULL"):
+            durations[agent].append(float(duration))
+        return [
+            {
+                "agent": agent,
+                "runs": len(values),
+                "p50_seconds": percentile(values, 50),
+                "p95_seconds": percentile(values, 95),
+                "p99_seconds": percentile(values, 99),
+            }
+            for agent, values in sorted(durations.items())
+        ]
+
+    def cost_per_issue(self, since: float | None = None, until: float | None = None) -> list[dict[str, Any]]:
+        """每个 Issue 的总成本与运行次数（按成本降序）"""
+        totals: dict[int, dict[str, Any]] = {}
+        for issue, cost in self._select("issue, cost_usd", since, until, "issue IS NOT NULL"):
+            row = totals.setdefault(int(issue), {"issue": int(issue), "runs": 0, "cost_usd": 0.0})
+            row["runs"] += 1
+            row["cost_usd"] += float(cost)
+        return sorted(totals.values(), key=lambda row: row["cost_usd"], reverse=True)
+
+    def tokens_per_turn(self, since: float | None = None, until: float | None = None) -> list[dict[str, Any]]:
+        """各 agent 每轮平均 token 数"""
+        sums: dict[str, list[int]] = defaultdict(lambda: [0, 0, 0])
+        for agent, tokens, output_tokens, turns in self._select(
+            "agent, total_tokens, output_tokens, num_turns", since, until
+        ):
+            entry = sums[agent]
+            entry[0] += int(tokens)
+            entry[1] += int(output_tokens)
+            entry[2] += int(turns)
+        return [
+            {
+                "agent": agent,
+                "turns": turns,
+                "tokens_per_turn": round(tokens / turns, 1) if turns else 0.0,
+                "output_tokens_per_turn": round(output_tokens / turns, 1) if turns else 0.0,
+            }
+            for agent, (tokens, output_tokens, turns) in sorted(sums.items())
+        ]
+
+    def failure_rate(self, since: float | None = None, until: float | None = None) -> list[dict[str, Any]]:
+        """各 agent 的失败率与主要失败类型"""
+        counts: dict[str, dict[str, Any]] = {}
+        for agent, ok, error_type in self._select("agent, ok, error_type", since, until):
+            row = counts.setdefault(agent, {"agent": agent, "runs": 0, "failures": 0, "error_types": {}})
+            row["runs"] += 1
+            if not ok:
+                row["failures"] += 1
+                key = error_type or "unknown"
+                row["error_types"][key] = row["error_types"].get(key, 0) + 1
+        for row in counts.values():
+            row["failure_rate"] = round(row["failures"] / row["runs"], 4) if row["runs"] else 0.0
+        return [counts[agent] for agent in sorted(counts)]
@@ -12,9 +12,6 @@ from datetime import UTC, datetime, timedelta
 from pathlib import Path
 from typing import Any
 
-import jwt
-import requests
-
 from issuelab.agents.registry import load_registry
 from issuelab.retry import retry_sync
 
@@ -42,7 +39,14 @@ def match_triggers(mentions: list[str], registry: dict[str, dict[str, Any]]) ->
     return matched
 
 
+def github_api_url() -> str:
+    """GitHub REST API 根地址（GITHUB_API_URL，Actions 中自动设置；默认 https://api.github.com）"""
+    return (os.environ.get("GITHUB_API_URL") or "https://api.github.com").rstrip("/")
+
+
 def _should_retry_dispatch_exception(exc: Exception) -> bool:
+    import requests
+
     return isinstance(exc, requests.exceptions.Timeout | requests.exceptions.ConnectionError)
 
 
@@ -57,6 +61,8 @@ def generate_github_app_jwt(app_id: str, private_key: str) -> str:
     Returns:
         JWT token string
     """
+    import jwt  # 仅实际分发时需要；无匹配 / dry-run 时不加载 jwt 与 cryptography
+
     now = datetime.now(UTC)
     payload = {
         "iat": int(now.timestamp()),
@@ -79,7 +85,9 @@ def get_installation_id(owner: str, repo: str, app_jwt: str) -> int | None:
     Returns:
         Installation ID，如果未找到则返回 None
     """
-    url = f"https://api.github.com/repos/{owner}/{repo}/installation"
+    import requests
+
+    url = f"{github_api_url()}/repos/{owner}/{repo}/installation"
     headers = {
         "Accept": "application/vnd.github+json",
         "Authorization": f"Bearer {app_jwt}",
@@ -113,7 +121,9 @@ def generate_installation_token(installation_id: int, app_jwt: str) -> str | Non
     Returns:
         Installation Access Token，失败返回 None
     """
-    url = f"https://api.github.com/app/installations/{installation_id}/access_tokens"
+    import requests
+
+    url = f"{github_api_url()}/app/installations/{installation_id}/access_tokens"
     headers = {
         "Accept": "application/vnd.github+json",
         "Authorization": f"Bearer {app_jwt}",
@@ -173,7 +183,9 @@ def dispatch_event(
     Returns:
         (是否成功, 错误代码)
     """
-    url = f"https://api.github.com/repos/{repository}/dispatches"
+    import requests
+
+    url = f"{github_api_url()}/repos/{repository}/dispatches"
 
     headers = {
         "Accept": "application/vnd.github+json",
@@ -238,7 +250,9 @@ def dispatch_workflow(
     Returns:
         (是否成功, 错误代码)
     """
-    url = f"https://api.github.com/repos/{repository}/actions/workflows/{workflow_file}/dispatches"
+    import requests
+
+    url = f"{github_api_url()}/repos/{repository}/actions/workflows/{workflow_file}/dispatches"
 
     headers = {
         "Accept": "application/vnd.github+json",
@@ -0,0 +1,41 @@
+"""
+导出 agent 运行 trace 为 Chrome trace / Perfetto 格式
+
+输入为 .issuelab/traces/ 下的 JSONL span 文件（或其所在目录），多个进程的文件会合并到同一时间线。
+"""
+
+import argparse
+import os
+import sys
+
+from issuelab.tracing import export_chrome_trace, get_trace_dir
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    CLI 入口点
+
+    Args:
+        argv: 命令行参数，None 则使用 sys.argv
+
+    Returns:
+        退出码，0 表示成功
+    """
+    parser = argparse.ArgumentParser(description="Export IssueLab span traces to Chrome trace format")
+    parser.add_argument("inputs", nargs="*", help="JSONL span files or directories (default: trace dir)")
+    parser.add_argument("-o", "--output", default="trace.json", help="Output file (default: trace.json)")
+    args = parser.parse_args(argv)
+
+    inputs = args.inputs or [get_trace_dir()]
+    missing = [path for path in inputs if not os.path.exists(path)]
+    if missing:
+        print(f"Error: trace input not found: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    count = export_chrome_trace(inputs, args.output)
+    print(f"Exported {count} spans to {args.output} (open in chrome://tracing or https://ui.perfetto.dev)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
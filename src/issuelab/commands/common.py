@@ -3,8 +3,11 @@
 import asyncio
 import os
 
-from issuelab.agents.executor import run_agents_parallel
+from issuelab.agents.executor import run_agents_parallel, run_agents_pipeline
+from issuelab.config import Config
+from issuelab.tools.comment_stream import StreamingCommentPublisher, is_comment_streaming_enabled
 from issuelab.tools.github import post_comment
+from issuelab.tracing import span
 
 
 def is_result_publishable(result: dict) -> tuple[bool, str]:
@@ -38,23 +41,51 @@ def should_post_failure_comment() -> bool:
     return os.environ.get("ISSUELAB_POST_FAILURE_COMMENT", "0").lower() in {"1", "true", "yes", "on"}
 
 
+def should_post_as_completed() -> bool:
+    """Whether to publish each agent result as soon as that agent finishes."""
+    return os.environ.get("ISSUELAB_POST_AS_COMPLETED", "1").lower() not in {"0", "false", "no", "off"}
+
+
 def print_agent_result(agent_name: str, result: dict) -> str:
     response = result.get("response", str(result))
     cost_usd = result.get("cost_usd", 0.0)
     num_turns = result.get("num_turns", 0)
     tool_calls = len(result.get("tool_calls", []))
 
-    print(f"\n=== {agent_name} result (成本: ${cost_usd:.4f}, 轮数: {num_turns}, 工具: {tool_calls}) ===")
+    saved = result.get("read_turns_saved", 0)
+    saved_text = f", 节省轮数: {saved}" if saved else ""
+    print(f"\n=== {agent_name} result (成本: ${cost_usd:.4f}, 轮数: {num_turns}, 工具: {tool_calls}{saved_text}) ===")
     print(response)
     return str(response)
 
 
 def maybe_post_agent_result(
-    issue_number: int, agent_name: str, response: str, result: dict, repo: str | None = None
+    issue_number: int,
+    agent_name: str,
+    response: str,
+    result: dict,
+    repo: str | None = None,
+    comment_id: int | None = None,
+) -> bool | None:
+    """Publish a result through the post_comment policy pipeline.
+
+    comment_id finalizes an existing (streaming placeholder) comment in place instead of creating one.
+    """
+    with span("post_comment", cat="github", lane=agent_name, agent=agent_name, issue=issue_number):
+        return _post_agent_result(issue_number, agent_name, response, result, repo=repo, comment_id=comment_id)
+
+
+def _post_agent_result(
+    issue_number: int,
+    agent_name: str,
+    response: str,
+    result: dict,
+    repo: str | None,
+    comment_id: int | None,
 ) -> bool | None:
     publishable, reason = is_result_publishable(result)
     if publishable:
-        if post_comment(issue_number, response, agent_name=agent_name, repo=repo):
+        if post_comment(issue_number, response, agent_name=agent_name, repo=repo, comment_id=comment_id):
             if repo:
                 print(f"[OK] 已发布到 {repo}#{issue_number}")
             else:
@@ -69,7 +100,7 @@ def maybe_post_agent_result(
     print(f"[WARN] {agent_name} result blocked by guardrail: {reason}")
     if should_post_failure_comment():
         body_to_post = build_failure_comment(agent_name, result)
-        if post_comment(issue_number, body_to_post, agent_name=agent_name, repo=repo):
+        if post_comment(issue_number, body_to_post, agent_name=agent_name, repo=repo, comment_id=comment_id):
             if repo:
                 print(f"[OK] 已发布失败摘要到 {repo}#{issue_number}")
             else:
@@ -91,21 +122,142 @@ def run_agents_command(
     post: bool = False,
     repo: str | None = None,
     available_agents: list[dict] | None = None,
+    dependencies: dict[str, list[str]] | None = None,
 ) -> dict:
-    trigger_comment = os.environ.get("ISSUELAB_TRIGGER_COMMENT", "")
-    results = asyncio.run(
-        run_agents_parallel(
-            issue_number,
-            agents,
-            context,
-            comment_count,
-            available_agents=available_agents,
-            trigger_comment=trigger_comment,
+    trigger_comment = Config.get_trigger_comment()
+    if post and should_post_as_completed():
+        return asyncio.run(
+            _run_agents_and_publish_as_completed(
+                issue_number,
+                agents,
+                context,
+                comment_count,
+                repo=repo,
+                available_agents=available_agents,
+                dependencies=dependencies,
+                trigger_comment=trigger_comment,
+            )
+        )
+
+    if dependencies:
+        results = asyncio.run(
+            run_agents_pipeline(
+                issue_number,
+                {agent: list(dependencies.get(agent, [])) for agent in agents},
+                context,
+                comment_count,
+                available_agents=available_agents,
+                trigger_comment=trigger_comment,
+            )
+        )
+    else:
+        results = asyncio.run(
+            run_agents_parallel(
+                issue_number,
+                agents,
+                context,
+                comment_count,
+                available_agents=available_agents,
+                trigger_comment=trigger_comment,
+            )
         )
-    )
 
     for agent_name, result in results.items():
         response = print_agent_result(agent_name, result)
         if post:
             maybe_post_agent_result(issue_number, agent_name, response, result, repo=repo)
     return results
+
+
+async def _run_agents_and_publish_as_completed(
+    issue_number: int,
+    agents: list[str],
+    context: str,
+    comment_count: int,
+    *,
+    repo: str | None,
+    available_agents: list[dict] | None,
+    dependencies: dict[str, list[str]] | None,
+    trigger_comment: str,
+) -> dict:
+    """Run agents and publish each result through a posting queue in completion order.
+
+    With ISSUELAB_STREAM_COMMENTS enabled, each agent first gets a placeholder comment that is edited
+    as text streams in, then finalized in place.
+    """
+    queue: asyncio.Queue[tuple[str, dict] | None] = asyncio.Queue()
+    enqueued: set[str] = set()
+    publishers: dict[str, StreamingCommentPublisher] = {}
+    stream_text = None
+    if is_comment_streaming_enabled():
+
+        async def stream_text(agent_name: str, text: str) -> None:
+            publisher = publishers.get(agent_name)
+            if publisher is None:
+                publisher = publishers[agent_name] = StreamingCommentPublisher(issue_number, agent_name, repo=repo)
+            await publisher.update(text)
+
+    async def enqueue_result(agent_name: str, result: dict) -> None:
+        enqueued.add(agent_name)
+        await queue.put((agent_name, result))
+
+    async def publish_results() -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            agent_name, result = item
+            response = print_agent_result(agent_name, result)
+            publisher = publishers.get(agent_name)
+            comment_id = None
+            if publisher is not None:
+                await publisher.close()
+                comment_id = publisher.comment_id
+            try:
+                posted = await asyncio.to_thread(
+                    maybe_post_agent_result,
+                    issue_number,
+                    agent_name,
+                    response,
+                    result,
+                    repo=repo,
+                    comment_id=comment_id,
+                )
+                if posted is None and publisher is not None and not should_post_failure_comment():
+                    await publisher.discard()
+            except Exception as e:
+                print(f"[ERROR] 发布 {agent_name} 结果异常: {e}")
+
+    publisher = asyncio.create_task(publish_results())
+    results: dict = {}
+    try:
+        if dependencies:
+            results = await run_agents_pipeline(
+                issue_number,
+                {agent: list(dependencies.get(agent, [])) for agent in agents},
+                context,
+                comment_count,
+                available_agents=available_agents,
+                trigger_comment=trigger_comment,
+                on_result=enqueue_result,
+                on_text=stream_text,
+            )
+        else:
+            results = await run_agents_parallel(
+                issue_number,
+                agents,
+                context,
+                comment_count,
+                available_agents=available_agents,
+                trigger_comment=trigger_comment,
+                on_result=enqueue_result,
+                on_text=stream_text,
+            )
+        # 兜底：未经回调入队的结果在整批结束后补发
+        for agent_name, result in results.items():
+            if agent_name not in enqueued:
+                await enqueue_result(agent_name, result)
+    finally:
+        await queue.put(None)
+        await publisher
+    return results
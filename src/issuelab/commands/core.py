@@ -1,10 +1,24 @@
 """Core command handlers: execute/review/list-agents."""
 
+import os
 from argparse import Namespace
 from collections.abc import Callable
 
-from issuelab.agents.discovery import discover_agents, get_agent_matrix_markdown
 from issuelab.commands.common import run_agents_command
+from issuelab.commands.list_agents import handle_list_agents  # noqa: F401  兼容旧的导入路径
+
+# 评审流水线：moderator/reviewer 并行，summarizer 在其全部完成后基于其输出汇总
+REVIEW_PIPELINE: dict[str, list[str]] = {
+    "moderator": [],
+    "reviewer_a": [],
+    "reviewer_b": [],
+    "summarizer": ["moderator", "reviewer_a", "reviewer_b"],
+}
+
+
+def is_review_pipeline_enabled() -> bool:
+    """Whether review runs summarizer after reviewers in the same process."""
+    return os.environ.get("ISSUELAB_REVIEW_PIPELINE", "1").lower() not in {"0", "false", "no", "off"}
 
 
 def handle_execute(
@@ -21,8 +35,11 @@ def handle_execute(
 
 
 def handle_review(args: Namespace, context: str, comment_count: int) -> None:
-    agents = ["moderator", "reviewer_a", "reviewer_b", "summarizer"]
-    results = run_agents_command(args.issue, agents, context, comment_count, post=getattr(args, "post", False))
+    agents = list(REVIEW_PIPELINE)
+    dependencies = REVIEW_PIPELINE if is_review_pipeline_enabled() else None
+    results = run_agents_command(
+        args.issue, agents, context, comment_count, post=getattr(args, "post", False), dependencies=dependencies
+    )
 
     for agent_name, result in results.items():
         response = str(result.get("response", str(result)))
@@ -35,21 +52,3 @@ def handle_review(args: Namespace, context: str, comment_count: int) -> None:
                     print(f"[OK] Issue #{args.issue} 已自动关闭")
                 else:
                     print("[ERROR] 自动关闭失败")
-
-
-def handle_list_agents() -> None:
-    agents = discover_agents()
-    print("\n=== Available Agents ===\n")
-    print(f"{'Agent':<15} {'Description':<50} {'Trigger Conditions'}")
-    print("-" * 100)
-    for name, config in agents.items():
-        conditions = config.get("trigger_conditions", [])
-        if conditions and all(isinstance(c, str) for c in conditions):
-            conditions_str = ", ".join(conditions)
-        else:
-            conditions_str = "auto-detect"
-        desc = config.get("description", "")[:48]
-        print(f"{name:<15} {desc:<50} {conditions_str[:40]}")
-
-    print("\n\n=== Agent Matrix (for Observer) ===\n")
-    print(get_agent_matrix_markdown())
@@ -0,0 +1,21 @@
+"""list-agents command handler (reads agents/ only; must not import the executor or SDK)."""
+
+from issuelab.agents.discovery import discover_agents, get_agent_matrix_markdown
+
+
+def handle_list_agents() -> None:
+    agents = discover_agents()
+    print("\n=== Available Agents ===\n")
+    print(f"{'Agent':<15} {'Description':<50} {'Trigger Conditions'}")
+    print("-" * 100)
+    for name, config in agents.items():
+        conditions = config.get("trigger_conditions", [])
+        if conditions and all(isinstance(c, str) for c in conditions):
+            conditions_str = ", ".join(conditions)
+        else:
+            conditions_str = "auto-detect"
+        desc = config.get("description", "")[:48]
+        print(f"{name:<15} {desc:<50} {conditions_str[:40]}")
+
+    print("\n\n=== Agent Matrix (for Observer) ===\n")
+    print(get_agent_matrix_markdown())
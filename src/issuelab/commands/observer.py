@@ -3,23 +3,38 @@
 from argparse import Namespace
 
 from issuelab.agents.observer import run_observer
+from issuelab.context_builder import comments_for_context, read_inlinable_context
 from issuelab.tools import github as github_tools
 from issuelab.tools.github import get_issue_info, post_comment
 
 
-def handle_observe(args: Namespace, issue_info: dict, issue_file: str, comments: str) -> None:
-    issue_body_ref = (
-        f"内容已保存至文件: {issue_file}\n请使用 Read 工具读取该文件后再分析。"
-        if issue_file
-        else (issue_info.get("body", "") or "无内容")
+def _observer_issue_refs(issue_file: str) -> tuple[str, str, bool]:
+    """Observer 的正文/评论引用：小上下文直接内联，大上下文引用文件。"""
+    inline_content = read_inlinable_context(issue_file)
+    if inline_content is not None:
+        return inline_content, "历史评论已包含在上方内容中。", True
+    return (
+        f"内容已保存至文件: {issue_file}\n请使用 Read 工具读取该文件后再分析。",
+        "历史评论已包含在同一文件中。",
+        False,
     )
-    comments_ref = "历史评论已包含在同一文件中。" if issue_file else (comments or "无评论")
+
+
+def handle_observe(args: Namespace, issue_info: dict, issue_file: str, comments: str) -> None:
+    if issue_file:
+        issue_body_ref, comments_ref, inlined = _observer_issue_refs(issue_file)
+    else:
+        issue_body_ref = issue_info.get("body", "") or "无内容"
+        comments_ref = comments or "无评论"
+        inlined = False
 
     import asyncio
 
     result = asyncio.run(run_observer(args.issue, issue_info.get("title", ""), issue_body_ref, comments_ref))
 
     print(f"\n=== Observer Analysis for Issue #{args.issue} ===")
+    if inlined:
+        print("[Stats] 上下文已内联，节省 Read 轮次: 1")
     print(f"\nAnalysis:\n{result.get('analysis', 'N/A')}")
     print(f"\nShould Trigger: {result.get('should_trigger', False)}")
     if result.get("should_trigger"):
@@ -49,6 +64,7 @@ def handle_observe_batch(args: Namespace) -> None:
     print(f"\n=== 并行分析 {len(issue_numbers)} 个 Issues ===")
 
     issue_data_list = []
+    inlined_count = 0
     for issue_num in issue_numbers:
         try:
             data = get_issue_info(issue_num, format_comments=True)
@@ -56,16 +72,18 @@ def handle_observe_batch(args: Namespace) -> None:
                 issue_number=issue_num,
                 title=data.get("title", ""),
                 body=data.get("body", ""),
-                comments=data.get("comments", ""),
+                comments=comments_for_context(data),
                 comment_count=data.get("comment_count", 0),
             )
 
+            issue_body_ref, comments_ref, inlined = _observer_issue_refs(issue_file)
+            inlined_count += int(inlined)
             issue_data_list.append(
                 {
                     "issue_number": issue_num,
                     "issue_title": data.get("title", ""),
-                    "issue_body": f"内容已保存至文件: {issue_file}\n请使用 Read 工具读取该文件后再分析。",
-                    "comments": "历史评论已包含在同一文件中。",
+                    "issue_body": issue_body_ref,
+                    "comments": comments_ref,
                 }
             )
         except Exception as e:
@@ -118,3 +136,5 @@ def handle_observe_batch(args: Namespace) -> None:
         print()
 
     print(f"\n总结: {triggered_count}/{len(results)} 个 Issues 需要触发 Agent")
+    if inlined_count:
+        print(f"[Stats] 上下文已内联 {inlined_count} 个 Issue，节省 Read 轮次: {inlined_count}")
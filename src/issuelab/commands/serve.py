@@ -0,0 +1,72 @@
+"""serve / enqueue command handlers (long-running worker fed by the local event queue)."""
+
+import argparse
+import signal
+from collections.abc import Callable
+from typing import Any
+
+from issuelab.event_queue import EventQueue
+from issuelab.logging_config import get_logger
+from issuelab.worker import EventWorker, RunEvent, WebhookReceiver, warm_up
+
+logger = get_logger(__name__)
+
+ParseEvent = Callable[[list[str]], Any]
+
+
+def handle_enqueue(args: argparse.Namespace, parse_event_argv: ParseEvent) -> int:
+    event = list(args.event)
+    if event and event[0] == "--":
+        event = event[1:]
+    try:
+        parse_event_argv(event)
+    except ValueError as exc:
+        print(f"[ERROR] 事件不合法: {exc}")
+        return 1
+    with EventQueue(args.queue) as queue:
+        event_id = queue.enqueue(event, trigger_comment=args.trigger_comment)
+        print(f"[OK] 已加入队列: #{event_id} {' '.join(event)} ({queue.path})")
+    return 0
+
+
+def handle_serve(args: argparse.Namespace, parse_event_argv: ParseEvent, run_event: RunEvent) -> int:
+    queue = EventQueue(args.queue)
+    worker = EventWorker(queue, run_event, concurrency=args.concurrency, poll_interval=args.poll_interval)
+    webhook = None
+    if args.webhook_port is not None:
+        try:
+            webhook = WebhookReceiver(
+                queue, parse_event_argv, host=args.webhook_host, port=args.webhook_port, on_enqueue=worker.notify
+            )
+        except (ValueError, OSError) as exc:
+            queue.close()
+            print(f"[ERROR] webhook 无法启动: {exc}")
+            return 1
+
+    if args.recover:
+        recovered = queue.recover_orphaned()
+        if recovered:
+            logger.info(f"[serve] 已把 {recovered} 个已失效 worker 遗留的 running 事件放回队列")
+    if not args.no_warm:
+        warm_up()
+    if webhook is not None:
+        webhook.start()
+
+    def _request_stop(signum: int, _frame: Any) -> None:
+        logger.info(f"[serve] 收到信号 {signum}，处理完进行中的事件后退出")
+        worker.stop()
+
+    previous_handlers = {sig: signal.signal(sig, _request_stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+    logger.info(f"[serve] worker 已启动：队列 {queue.path}，并发 {worker.concurrency}")
+    try:
+        worker.serve(once=args.once)
+    finally:
+        for sig, handler in previous_handlers.items():
+            signal.signal(sig, handler)
+        if webhook is not None:
+            webhook.stop()
+        counts = queue.counts()
+        queue.close()
+
+    logger.info(f"[serve] 已处理 {worker.processed} 个事件（失败 {worker.failed}），队列状态: {counts}")
+    return 1 if args.once and worker.failed else 0
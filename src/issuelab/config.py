@@ -1,8 +1,12 @@
 """配置管理 - 统一的环境变量和配置管理"""
 
 import os
+from contextvars import ContextVar
 from pathlib import Path
 
+# 常驻 worker（issuelab serve）按事件覆盖触发评论；os.environ 是进程级的，并发事件之间不能共用
+trigger_comment_override: ContextVar[str | None] = ContextVar("issuelab_trigger_comment", default=None)
+
 
 class Config:
     """全局配置管理器"""
@@ -26,6 +30,11 @@ class Config:
         """获取 Anthropic Model"""
         return os.environ.get("ANTHROPIC_MODEL", "MiniMax-M2.1")
 
+    @staticmethod
+    def get_anthropic_fast_model() -> str:
+        """获取快速/低成本模型（用于多阶段流程的检索、批判等轻量阶段，未配置时返回空）"""
+        return os.environ.get("ANTHROPIC_FAST_MODEL", "")
+
     @staticmethod
     def get_anthropic_env() -> dict:
         """获取完整的 Anthropic 环境变量字典
@@ -72,6 +81,12 @@ class Config:
             env["GH_TOKEN"] = token
         return env
 
+    @staticmethod
+    def get_trigger_comment() -> str:
+        """获取触发本次运行的评论正文（worker 事件覆盖 > ISSUELAB_TRIGGER_COMMENT）"""
+        override = trigger_comment_override.get()
+        return os.environ.get("ISSUELAB_TRIGGER_COMMENT", "") if override is None else override
+
     # 日志配置
     @staticmethod
     def get_log_level() -> str:
@@ -0,0 +1,281 @@
+"""Issue 上下文打包 - 在 token 预算内挑选评论
+
+长讨论串会让每个 agent 的输入 token 与延迟线性增长。本模块在给定预算内：
+- 始终保留标题、正文与触发评论
+- 其余评论按「时间新近度 + 与标题/触发评论的词法相关度（本地 BM25）」排序填充
+- 被省略的连续评论折叠为一行标记，保持时间顺序可读
+
+打包后的上下文足够小时直接内联进 prompt，省去 agent 调用 Read 工具的一轮往返。
+"""
+
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+
+from issuelab.logging_config import get_logger
+from issuelab.tools.github import format_issue_comment
+
+logger = get_logger(__name__)
+
+DEFAULT_CONTEXT_TOKEN_BUDGET = 16000
+DEFAULT_INLINE_CONTEXT_MAX_CHARS = 6000
+# 任务上下文以此标记开头时，表示 Issue 内容已直接内联（agent 无需再调用 Read）
+INLINED_CONTEXT_MARKER = "## Issue 上下文（已内联）"
+
+_CJK_CLASS = r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af"
+_CJK_RE = re.compile(f"[{_CJK_CLASS}]")
+_WORD_RE = re.compile(r"[a-z0-9_]+")
+_CJK_RUN_RE = re.compile(f"[{_CJK_CLASS}]+")
+
+# 相关度与新近度的权重（合计为 1）
+_RELEVANCE_WEIGHT = 0.6
+_RECENCY_WEIGHT = 0.4
+
+
+@dataclass
+class PackedComments:
+    """打包结果
+
+    Attributes:
+        text: 写入上下文文件的评论文本（含折叠标记）
+        kept: 保留的评论数
+        omitted: 被折叠的评论数
+        estimated_tokens: 标题 + 正文 + 评论的估算 token 数
+        kept_indices: 保留评论在原列表中的下标（升序）
+    """
+
+    text: str
+    kept: int
+    omitted: int
+    estimated_tokens: int
+    kept_indices: list[int] = field(default_factory=list)
+
+
+def get_context_token_budget() -> int:
+    """读取上下文 token 预算（ISSUELAB_CONTEXT_TOKEN_BUDGET，0 表示不限制）"""
+    try:
+        return max(0, int(os.environ.get("ISSUELAB_CONTEXT_TOKEN_BUDGET", DEFAULT_CONTEXT_TOKEN_BUDGET)))
+    except (TypeError, ValueError):
+        return DEFAULT_CONTEXT_TOKEN_BUDGET
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：CJK 字符按 1 token/字，其余按 4 字符/token"""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def tokenize(text: str) -> list[str]:
+    """BM25 分词：英文按单词，CJK 按字符二元组（单字串退化为单字）"""
+    lowered = (text or "").lower()
+    tokens = _WORD_RE.findall(lowered)
+    for run in _CJK_RUN_RE.findall(lowered):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def bm25_scores(query: str, documents: list[str], *, k1: float = 1.5, b: float = 0.75) -> list[float]:
+    """计算 query 对每个文档的 BM25 分数"""
+    docs_tokens = [tokenize(doc) for doc in documents]
+    query_terms = set(tokenize(query))
+    if not docs_tokens or not query_terms:
+        return [0.0] * len(documents)
+
+    doc_count = len(docs_tokens)
+    avg_len = sum(len(tokens) for tokens in docs_tokens) / doc_count or 1.0
+    doc_freq: Counter[str] = Counter()
+    for tokens in docs_tokens:
+        doc_freq.update(set(tokens) & query_terms)
+
+    scores: list[float] = []
+    for tokens in docs_tokens:
+        term_freq = Counter(tokens)
+        length_norm = k1 * (1 - b + b * len(tokens) / avg_len)
+        score = 0.0
+        for term in query_terms:
+            tf = term_freq.get(term, 0)
+            if not tf:
+                continue
+            idf = math.log(1 + (doc_count - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + length_norm)
+        scores.append(score)
+    return scores
+
+
+def _find_trigger_index(comments: list[dict], trigger_comment: str) -> int | None:
+    trigger = " ".join((trigger_comment or "").split())
+    if not trigger:
+        return None
+    for index in range(len(comments) - 1, -1, -1):
+        body = " ".join(str(comments[index].get("body", "")).split())
+        if body and (body == trigger or trigger in body):
+            return index
+    return None
+
+
+def _collapsed_marker(comments: list[dict]) -> str:
+    authors: list[str] = []
+    for comment in comments:
+        author = (comment.get("author") or {}).get("login", "unknown")
+        if author not in authors:
+            authors.append(author)
+    shown = "、".join(authors[:5]) + (" 等" if len(authors) > 5 else "")
+    return f"- _（已折叠 {len(comments)} 条较早或相关度较低的评论，作者：{shown}）_"
+
+
+def _render(comments: list[dict], formatted: list[str], kept: set[int]) -> str:
+    parts: list[str] = []
+    omitted_run: list[dict] = []
+    for index, comment in enumerate(comments):
+        if index in kept:
+            if omitted_run:
+                parts.append(_collapsed_marker(omitted_run))
+                omitted_run = []
+            parts.append(formatted[index])
+        else:
+            omitted_run.append(comment)
+    if omitted_run:
+        parts.append(_collapsed_marker(omitted_run))
+    return "\n\n".join(parts)
+
+
+def pack_issue_comments(
+    title: str,
+    body: str,
+    comments: list[dict],
+    *,
+    trigger_comment: str = "",
+    token_budget: int | None = None,
+) -> PackedComments:
+    """在 token 预算内挑选评论并渲染
+
+    Args:
+        title: Issue 标题（始终保留）
+        body: Issue 正文（始终保留）
+        comments: gh 返回的原始评论列表（按时间顺序）
+        trigger_comment: 触发评论（匹配到的评论始终保留）
+        token_budget: 总预算；None 读取环境配置，0 表示不限制
+
+    Returns:
+        PackedComments
+    """
+    budget = get_context_token_budget() if token_budget is None else token_budget
+    formatted = [format_issue_comment(comment) for comment in comments]
+    fixed_tokens = estimate_tokens(title) + estimate_tokens(body)
+    comment_tokens = [estimate_tokens(text) for text in formatted]
+    full_text = "\n\n".join(formatted)
+
+    if budget <= 0 or fixed_tokens + estimate_tokens(full_text) <= budget:
+        return PackedComments(
+            text=full_text,
+            kept=len(comments),
+            omitted=0,
+            estimated_tokens=fixed_tokens + estimate_tokens(full_text),
+            kept_indices=list(range(len(comments))),
+        )
+
+    count = len(comments)
+    trigger_index = _find_trigger_index(comments, trigger_comment)
+    query = f"{title}\n{trigger_comment}" if trigger_comment else f"{title}\n{body[:500]}"
+    relevance = bm25_scores(query, [str(comment.get("body", "")) for comment in comments])
+    max_relevance = max(relevance) or 1.0
+    scores = [
+        _RELEVANCE_WEIGHT * relevance[i] / max_relevance + _RECENCY_WEIGHT * (i + 1) / count for i in range(count)
+    ]
+
+    kept: set[int] = set()
+    if trigger_index is not None:
+        kept.add(trigger_index)
+
+    remaining = budget - fixed_tokens - sum(comment_tokens[i] for i in kept)
+    for index in sorted(range(count), key=lambda i: scores[i], reverse=True):
+        if index in kept:
+            continue
+        if comment_tokens[index] <= remaining:
+            kept.add(index)
+            remaining -= comment_tokens[index]
+
+    # 折叠标记本身也占 token：超出时按分数从低到高剔除（触发评论除外）
+    text = _render(comments, formatted, kept)
+    while fixed_tokens + estimate_tokens(text) > budget:
+        removable = [i for i in kept if i != trigger_index]
+        if not removable:
+            break
+        kept.discard(min(removable, key=lambda i: scores[i]))
+        text = _render(comments, formatted, kept)
+
+    kept_indices = sorted(kept)
+    logger.info(
+        "上下文打包: 预算=%s, 保留评论=%s/%s, 估算Token=%s",
+        budget,
+        len(kept_indices),
+        count,
+        fixed_tokens + estimate_tokens(text),
+    )
+    return PackedComments(
+        text=text,
+        kept=len(kept_indices),
+        omitted=count - len(kept_indices),
+        estimated_tokens=fixed_tokens + estimate_tokens(text),
+        kept_indices=kept_indices,
+    )
+
+
+def comments_for_context(issue_info: dict, *, trigger_comment: str = "", token_budget: int | None = None) -> str:
+    """返回写入上下文文件的评论文本：有原始评论时按预算打包，否则沿用已格式化文本"""
+    raw_comments = issue_info.get("raw_comments")
+    if not isinstance(raw_comments, list):
+        return str(issue_info.get("comments", "") or "")
+    packed = pack_issue_comments(
+        str(issue_info.get("title", "") or ""),
+        str(issue_info.get("body", "") or ""),
+        raw_comments,
+        trigger_comment=trigger_comment,
+        token_budget=token_budget,
+    )
+    return packed.text
+
+
+def get_inline_context_max_chars() -> int:
+    """读取内联阈值（ISSUELAB_INLINE_CONTEXT_MAX_CHARS，0 表示总是使用文件引用）"""
+    try:
+        return max(0, int(os.environ.get("ISSUELAB_INLINE_CONTEXT_MAX_CHARS", DEFAULT_INLINE_CONTEXT_MAX_CHARS)))
+    except (TypeError, ValueError):
+        return DEFAULT_INLINE_CONTEXT_MAX_CHARS
+
+
+def read_inlinable_context(issue_file: str, *, max_chars: int | None = None) -> str | None:
+    """上下文文件足够小时返回其内容（可直接内联进 prompt），否则返回 None"""
+    limit = get_inline_context_max_chars() if max_chars is None else max_chars
+    if not issue_file or limit <= 0:
+        return None
+    try:
+        with open(issue_file, encoding="utf-8") as f:
+            content = f.read(limit + 1)
+    except OSError:
+        return None
+    return content if len(content) <= limit else None
+
+
+def build_issue_context_reference(issue_file: str, *, max_chars: int | None = None) -> tuple[str, bool]:
+    """构建 agent 任务上下文：小上下文直接内联，大上下文引用文件
+
+    内联后 agent 无需先花一轮调用 Read 工具。
+
+    Returns:
+        (context, inlined)
+    """
+    content = read_inlinable_context(issue_file, max_chars=max_chars)
+    if content is not None:
+        return (
+            f"{INLINED_CONTEXT_MARKER}\n（完整内容已内联如下，无需再使用 Read 工具读取 {issue_file}）\n\n{content}",
+            True,
+        )
+    return f"**Issue 内容文件**: {issue_file}\n请使用 Read 工具读取该文件后再进行分析。", False
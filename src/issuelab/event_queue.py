@@ -0,0 +1,196 @@
+"""本地事件队列（SQLite），常驻 worker（issuelab serve）的输入
+
+一个事件就是一条 issuelab 子命令行（argv），如 ["execute", "--issue", "12", "--agents", "moderator", "--post"]，
+外加可选的触发评论正文。事件由 `python -m issuelab enqueue ...` 或 serve 自带的 webhook 接收端写入。
+
+多个 serve 进程可共享同一个队列文件：领取事件在 BEGIN IMMEDIATE 事务内完成，同一事件只会被领取一次。
+恢复遗留事件（serve --recover）只处理已失效 worker 的事件：本机上进程已退出，或运行时长超过租约。
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+SERVE_COMMANDS = ("execute", "review", "observe", "personal-reply")
+
+_DEFAULT_LEASE_SECONDS = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    argv TEXT NOT NULL,
+    trigger_comment TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_status ON events (status, id);
+"""
+
+
+def get_queue_db_path() -> str:
+    """队列路径（ISSUELAB_QUEUE_DB，默认 .issuelab/queue.db）"""
+    return os.environ.get("ISSUELAB_QUEUE_DB") or os.path.join(os.getcwd(), ".issuelab", "queue.db")
+
+
+def get_lease_seconds() -> float:
+    """running 事件的租约时长（ISSUELAB_QUEUE_LEASE_SECONDS，默认 3600）：超过后无法确认存活的 worker 视为已失效"""
+    try:
+        return float(os.environ.get("ISSUELAB_QUEUE_LEASE_SECONDS", _DEFAULT_LEASE_SECONDS))
+    except ValueError:
+        return float(_DEFAULT_LEASE_SECONDS)
+
+
+def _is_local_worker_dead(worker: str | None) -> bool:
+    """worker 标识为本机 host:pid 且该进程已不存在"""
+    host, _, pid = (worker or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:  # 无权限发信号：进程存在
+        return False
+    return False
+
+
+@dataclass
+class QueuedEvent:
+    id: int
+    argv: list[str]
+    trigger_comment: str | None
+    enqueued_at: float
+    started_at: float
+
+
+class EventQueue:
+    """SQLite 事件队列（状态：queued → running → done / failed）；同一实例可在多个线程间共用"""
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path or get_queue_db_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        # 手动管理事务（BEGIN IMMEDIATE），多进程共享时由 SQLite 文件锁保证领取互斥
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        if self.path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "EventQueue":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def enqueue(self, argv: list[str], *, trigger_comment: str | None = None) -> int:
+        """写入一个事件，返回事件 id"""
+        if not argv or argv[0] not in SERVE_COMMANDS:
+            raise ValueError(f"不支持的事件命令: {argv[:1]}（可选: {', '.join(SERVE_COMMANDS)}）")
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT INTO events (argv, trigger_comment, enqueued_at) VALUES (?, ?, ?)",
+                (json.dumps(argv, ensure_ascii=False), trigger_comment, time.time()),
+            )
+        return int(cursor.lastrowid)
+
+    def claim(self) -> QueuedEvent | None:
+        """领取最早的一个待处理事件（标记为 running）；队列为空时返回 None"""
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT id, argv, trigger_comment, enqueued_at FROM events WHERE status = 'queued' "
+                    "ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute(
+                        "UPDATE events SET status = 'running', started_at = ?, worker = ? WHERE id = ?",
+                        (now, self.worker_id, row[0]),
+                    )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return QueuedEvent(
+            id=int(row[0]), argv=json.loads(row[1]), trigger_comment=row[2], enqueued_at=float(row[3]), started_at=now
+        )
+
+    def finish(self, event_id: int, *, ok: bool, error: str | None = None) -> None:
+        with self._lock:
+            self.conn.execute(
+                "UPDATE events SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                ("done" if ok else "failed", time.time(), error, event_id),
+            )
+
+    def requeue_running(self, worker_id: str | None = None) -> int:
+        """把 running 状态的事件放回队列（worker 异常退出后恢复），返回条数；指定 worker_id 时只处理该 worker 的事件"""
+        sql = "UPDATE events SET status = 'queued', started_at = NULL, worker = NULL WHERE status = 'running'"
+        params: tuple[Any, ...] = ()
+        if worker_id is not None:
+            sql += " AND worker = ?"
+            params = (worker_id,)
+        with self._lock:
+            return self.conn.execute(sql, params).rowcount
+
+    def recover_orphaned(self, *, lease_seconds: float | None = None) -> int:
+        """把已失效 worker 遗留的 running 事件放回队列，返回条数
+
+        本机 worker（host:pid）进程已退出的立即恢复；其他主机或无法判断的，在运行时长超过租约后才恢复。
+        仍存活的 worker 正在执行的事件不会被放回队列，避免与其重复执行。
+        """
+        lease = get_lease_seconds() if lease_seconds is None else lease_seconds
+        deadline = time.time() - lease
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute(
+                    "SELECT id, worker, started_at FROM events WHERE status = 'running'"
+                ).fetchall()
+                orphaned = [
+                    (event_id,)
+                    for event_id, worker, started_at in rows
+                    if _is_local_worker_dead(worker) or (started_at or 0) < deadline
+                ]
+                self.conn.executemany(
+                    "UPDATE events SET status = 'queued', started_at = NULL, worker = NULL "
+                    "WHERE id = ? AND status = 'running'",
+                    orphaned,
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return len(orphaned)
+
+    def counts(self) -> dict[str, int]:
+        """各状态的事件数"""
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM events GROUP BY status").fetchall()
+        return {status: int(count) for status, count in rows}
+
+    def get(self, event_id: int) -> dict[str, Any] | None:
+        with self._lock:
+            cursor = self.conn.execute("SELECT * FROM events WHERE id = ?", (event_id,))
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        record = dict(zip([column[0] for column in cursor.description], row, strict=True))
+        record["argv"] = json.loads(record["argv"])
+        return record
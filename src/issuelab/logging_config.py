@@ -1,12 +1,36 @@
-"""日志配置模块"""
+"""日志配置模块
 
+异步模式（ISSUELAB_LOG_ASYNC=1 或 setup_logging(async_mode=True)）下，根 logger 只挂一个
+QueueHandler，格式化与 stderr / 文件写入由后台 QueueListener 线程完成，不阻塞事件循环；
+进程退出时自动排空队列。
+"""
+
+import atexit
 import logging
+import os
 import sys
+from collections.abc import Callable
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from logging.handlers import QueueListener
+
+# logging.handlers 会连带导入 socket / pickle，只在开启异步模式时加载
+_queue_listener: "QueueListener | None" = None
+_atexit_registered = False
+
+
+def is_async_logging_enabled() -> bool:
+    """是否使用队列异步写日志（ISSUELAB_LOG_ASYNC，默认关闭）"""
+    return os.environ.get("ISSUELAB_LOG_ASYNC", "").lower() in {"1", "true", "yes", "on"}
 
 
 def setup_logging(
-    level: str = "INFO", log_file: Path | None = None, format_string: str | None = None
+    level: str = "INFO",
+    log_file: Path | None = None,
+    format_string: str | None = None,
+    async_mode: bool | None = None,
 ) -> logging.Logger:
     """配置日志系统
 
@@ -14,10 +38,12 @@ def setup_logging(
         level: 日志级别 (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: 日志文件路径（可选）
         format_string: 日志格式字符串（可选）
+        async_mode: 是否经队列异步写出（默认按 ISSUELAB_LOG_ASYNC）
 
     Returns:
         配置好的 logger
     """
+    global _atexit_registered, _queue_listener
     if format_string is None:
         format_string = "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s"
 
@@ -25,8 +51,10 @@ def setup_logging(
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, level.upper()))
 
-    # 清除现有 handlers
+    # 清除现有 handlers（先排空上一次配置的异步队列）
+    stop_async_logging()
     root_logger.handlers.clear()
+    handlers: list[logging.Handler] = []
 
     # 创建格式化器
     formatter = logging.Formatter(format_string)
@@ -35,7 +63,7 @@ def setup_logging(
     console_handler = logging.StreamHandler(sys.stderr)
     console_handler.setLevel(logging.DEBUG)  # 改为 DEBUG 级别以显示完整日志
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    handlers.append(console_handler)
 
     # 文件处理器（如果指定）
     if log_file:
@@ -43,12 +71,64 @@ def setup_logging(
         file_handler = logging.FileHandler(log_file, encoding="utf-8")
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    if is_async_logging_enabled() if async_mode is None else async_mode:
+        import queue
+        from logging.handlers import QueueHandler, QueueListener
+
+        log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        _queue_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _queue_listener.start()
+        root_logger.addHandler(QueueHandler(log_queue))
+        if not _atexit_registered:
+            # 晚于 logging 模块注册，先于 logging.shutdown 执行
+            atexit.register(stop_async_logging)
+            _atexit_registered = True
+    else:
+        for handler in handlers:
+            root_logger.addHandler(handler)
 
     # 返回 issuelab 命名空间的 logger
     return logging.getLogger("issuelab")
 
 
+def stop_async_logging() -> None:
+    """排空异步日志队列，并把后台线程持有的 handler 直接挂回根 logger（未开启异步模式时无操作）"""
+    global _queue_listener
+    if _queue_listener is None:
+        return
+    from logging.handlers import QueueHandler
+
+    listener, _queue_listener = _queue_listener, None
+    listener.stop()
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, QueueHandler):
+            root_logger.removeHandler(handler)
+    for handler in listener.handlers:
+        root_logger.addHandler(handler)
+
+
+class lazy:  # noqa: N801 - 作为日志参数使用，保持函数式写法
+    """延迟求值的日志参数：只有该条日志确实被输出时才调用 func 生成文本
+
+    用于昂贵的调试载荷（需配合 %s 占位符，而非 f-string）：
+
+        logger.debug("[%s] [ToolInput] %s", agent_name, lazy(json.dumps, tool_input, indent=2))
+    """
+
+    __slots__ = ("_args", "_func", "_kwargs")
+
+    def __init__(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+
+    def __str__(self) -> str:
+        return str(self._func(*self._args, **self._kwargs))
+
+
 def get_logger(name: str) -> logging.Logger:
     """获取指定名称的 logger
 
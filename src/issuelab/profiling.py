@@ -0,0 +1,523 @@
+"""内置性能剖析（--profile / ISSUELAB_PROFILE）
+
+开启后在命令结束时写出一份剖析报告（默认 .issuelab/profiles/<时间>-<命令>-<pid>/）：
+
+- cpu.prof：主线程 cProfile（线程 CPU 时间），可用 pstats / snakeviz 查看
+- wall.folded：墙钟采样的 collapsed-stack（线程栈 + 按 trace 泳道区分的 asyncio 任务栈），
+  可直接交给 flamegraph.pl / speedscope
+- report.json / report.txt：CPU 热点、采样热点、导入耗时、子进程与 HTTP 调用的次数和耗时
+
+    python -m issuelab --profile execute --issue 1 --agents moderator
+    ISSUELAB_PROFILE=1 python scripts/dispatch_to_users.py ...
+
+HTTP 统计基于 http.client（urllib、requests/urllib3），计到收到响应头为止。
+本模块只依赖标准库，未开启时不做任何 patch。
+"""
+
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, suppress
+from typing import Any
+
+_TOKEN_ATTR = "_issuelab_profile_token"
+_TOP_N = 25
+
+
+def is_profiling_enabled() -> bool:
+    """是否开启剖析（ISSUELAB_PROFILE，默认关闭）"""
+    return os.environ.get("ISSUELAB_PROFILE", "").lower() in {"1", "true", "yes", "on"}
+
+
+def get_profile_dir() -> str:
+    """报告目录（ISSUELAB_PROFILE_DIR，默认 .issuelab/profiles）"""
+    return os.environ.get("ISSUELAB_PROFILE_DIR") or os.path.join(os.getcwd(), ".issuelab", "profiles")
+
+
+def get_sample_interval() -> float:
+    """墙钟采样间隔秒数（ISSUELAB_PROFILE_INTERVAL_MS，默认 10ms，最小 1ms）"""
+    try:
+        value = float(os.environ.get("ISSUELAB_PROFILE_INTERVAL_MS", "10"))
+    except ValueError:
+        value = 10.0
+    return max(value, 1.0) / 1000
+
+
+def _short_path(path: str) -> str:
+    for marker in ("site-packages/", "src/", "scripts/"):
+        index = path.rfind(marker)
+        if index != -1:
+            return path[index + len(marker) :]
+    return os.path.basename(path)
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__") or _short_path(code.co_filename)
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class _CallRecorder:
+    """子进程 / HTTP 调用计数与耗时（按 kind、key 聚合）"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.stats: dict[str, dict[str, dict[str, float]]] = {}
+
+    def start(self, obj: Any, kind: str, key: str) -> None:
+        with self._lock:
+            entry = self.stats.setdefault(kind, {}).setdefault(
+                key, {"count": 0, "pending": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            )
+            entry["count"] += 1
+            entry["pending"] += 1
+        with suppress(AttributeError):
+            setattr(obj, _TOKEN_ATTR, (kind, key, time.perf_counter()))
+
+    def finish(self, obj: Any) -> None:
+        token = getattr(obj, "__dict__", {}).pop(_TOKEN_ATTR, None)
+        if token is None:
+            return
+        kind, key, started = token
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            entry = self.stats[kind][key]
+            entry["pending"] -= 1
+            entry["total_seconds"] += elapsed
+            entry["max_seconds"] = max(entry["max_seconds"], elapsed)
+
+
+class _Patches:
+    """记录并还原对标准库的 monkeypatch"""
+
+    def __init__(self) -> None:
+        self._saved: list[tuple[Any, str, Any]] = []
+
+    def replace(self, owner: Any, name: str, factory: Callable[[Any], Any]) -> None:
+        original = owner.__dict__.get(name)
+        if original is None:
+            return
+        self._saved.append((owner, name, original))
+        setattr(owner, name, factory(original))
+
+    def restore(self) -> None:
+        while self._saved:
+            owner, name, original = self._saved.pop()
+            setattr(owner, name, original)
+
+
+def _program_name(args: Any) -> str:
+    if isinstance(args, str | bytes | os.PathLike):
+        first = os.fsdecode(args).split(" ", 1)[0]
+    elif args:
+        first = os.fsdecode(next(iter(args)))
+    else:
+        first = "?"
+    return os.path.basename(first) or first
+
+
+def _patch_subprocess(patches: _Patches, recorder: _CallRecorder) -> None:
+    import subprocess
+
+    def wrap_init(original):
+        def init(self, args, *rest, **kwargs):
+            recorder.start(self, "subprocess", _program_name(args))
+            try:
+                original(self, args, *rest, **kwargs)
+            except BaseException:
+                recorder.finish(self)
+                raise
+
+        return init
+
+    def wrap_wait(original):
+        def wait(self, *args, **kwargs):
+            result = original(self, *args, **kwargs)
+            recorder.finish(self)
+            return result
+
+        return wait
+
+    def wrap_poll(original):
+        def poll(self, *args, **kwargs):
+            result = original(self, *args, **kwargs)
+            if result is not None:
+                recorder.finish(self)
+            return result
+
+        return poll
+
+    patches.replace(subprocess.Popen, "__init__", wrap_init)
+    patches.replace(subprocess.Popen, "wait", wrap_wait)
+    patches.replace(subprocess.Popen, "poll", wrap_poll)
+
+    # asyncio 子进程（claude CLI 经 anyio 启动）由 transport 回收，不走 Popen.wait
+    base_subprocess = sys.modules.get("asyncio.base_subprocess")
+    if base_subprocess is None:
+        import asyncio.base_subprocess as base_subprocess
+
+    def wrap_exited(original):
+        def _process_exited(self, returncode):
+            recorder.finish(self._proc)
+            return original(self, returncode)
+
+        return _process_exited
+
+    patches.replace(base_subprocess.BaseSubprocessTransport, "_process_exited", wrap_exited)
+
+
+def _patch_http(patches: _Patches, recorder: _CallRecorder) -> None:
+    import http.client
+
+    def wrap_putrequest(original):
+        def putrequest(self, method, url, *args, **kwargs):
+            recorder.start(self, "http", f"{method} {self.host}")
+            return original(self, method, url, *args, **kwargs)
+
+        return putrequest
+
+    def wrap_getresponse(original):
+        def getresponse(self, *args, **kwargs):
+            try:
+                return original(self, *args, **kwargs)
+            finally:
+                recorder.finish(self)
+
+        return getresponse
+
+    patches.replace(http.client.HTTPConnection, "putrequest", wrap_putrequest)
+    patches.replace(http.client.HTTPConnection, "getresponse", wrap_getresponse)
+
+
+class _ImportTimer:
+    """包装 builtins.__import__，统计每个模块的导入耗时（含子导入 / 自身）"""
+
+    def __init__(self) -> None:
+        self.inclusive: Counter[str] = Counter()
+        self.self_time: Counter[str] = Counter()
+        self.total = 0.0
+        self._local = threading.local()
+        self._original: Callable[..., Any] | None = None
+
+    def install(self) -> None:
+        original = self._original = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level == 0 and not fromlist and name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            key = _resolve_import_name(name, globals, level)
+            pending = [f"{key}.{item}" for item in fromlist or () if f"{key}.{item}" not in sys.modules]
+            stack = self._local.__dict__.setdefault("stack", [])
+            stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - started
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                else:
+                    self.total += elapsed
+                # from pkg import submodule：耗时记到真正加载的子模块上
+                loaded = [module for module in pending if module in sys.modules]
+                if len(loaded) == 1:
+                    key = loaded[0]
+                self.inclusive[key] += elapsed
+                self.self_time[key] += elapsed - children
+
+        builtins.__import__ = timed_import
+
+    def uninstall(self) -> None:
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+
+def _resolve_import_name(name: str, globals: Any, level: int) -> str:
+    if level == 0:
+        return name
+    package = (globals or {}).get("__package__") or ""
+    base = package.rsplit(".", level - 1)[0] if level > 1 else package
+    return f"{base}.{name}" if name else base
+
+
+class _Sampler(threading.Thread):
+    """墙钟采样：定时抓取其他线程的调用栈，以及事件循环中每个 asyncio 任务的协程栈"""
+
+    def __init__(self, interval: float) -> None:
+        super().__init__(name="issuelab-profiler", daemon=True)
+        self.interval = interval
+        self.samples = 0
+        self.thread_stacks: Counter[str] = Counter()
+        self.thread_leaves: Counter[str] = Counter()
+        self.task_stacks: Counter[str] = Counter()
+        self.lane_samples: Counter[str] = Counter()
+        self.lane_leaves: Counter[tuple[str, str]] = Counter()
+        self._stopped = threading.Event()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join(timeout=5)
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.sample()
+            except Exception:  # noqa: BLE001 - 采样失败不影响被剖析的命令
+                continue
+
+    def sample(self) -> None:
+        asyncio = sys.modules.get("asyncio")
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        loops = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                if asyncio is not None and frame.f_code.co_name == "run_forever":
+                    loop = frame.f_locals.get("self")
+                    if isinstance(loop, asyncio.AbstractEventLoop):
+                        loops.append(loop)
+                frame = frame.f_back
+            labels.reverse()
+            thread = f"thread:{names.get(ident, ident)}"
+            self.thread_stacks[";".join([thread, *labels])] += 1
+            self.thread_leaves[f"{thread} {labels[-1] if labels else '?'}"] += 1
+        for loop in loops:
+            self._sample_tasks(asyncio, loop)
+        self.samples += 1
+
+    def _sample_tasks(self, asyncio: Any, loop: Any) -> None:
+        try:
+            tasks = asyncio.all_tasks(loop)
+        except RuntimeError:
+            return
+        tracing = sys.modules.get("issuelab.tracing")
+        for task in tasks:
+            context = task.get_context() if hasattr(task, "get_context") else getattr(task, "_context", None)
+            lane = tracing.context_lane(context) if tracing is not None and context is not None else "main"
+            frames = task.get_stack()
+            labels = [_frame_label(frame) for frame in frames]
+            self.task_stacks[";".join([f"task:{lane}", *labels])] += 1
+            self.lane_samples[lane] += 1
+            # 挂起点带上行号，区分同一协程里的不同 await
+            leaf = f"{labels[-1]}:{frames[-1].f_lineno}" if frames else "?"
+            self.lane_leaves[(lane, leaf)] += 1
+
+
+def _rusage() -> dict[str, float]:
+    try:
+        import resource
+    except ImportError:
+        return {}
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # Linux 的 ru_maxrss 单位为 KB，macOS 为字节
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "children_cpu_seconds": children.ru_utime + children.ru_stime,
+        "peak_rss_mb": own.ru_maxrss * scale / 1024 / 1024,
+    }
+
+
+class ProfileSession:
+    """一次剖析：start() 安装 cProfile、采样线程与各类 hook，stop() 还原并写出报告目录"""
+
+    def __init__(self, name: str, directory: str | None = None, interval: float | None = None) -> None:
+        self.name = name
+        self.directory = directory or get_profile_dir()
+        self.interval = interval or get_sample_interval()
+        self.output_dir: str | None = None
+        self.calls = _CallRecorder()
+        self.imports = _ImportTimer()
+        self._patches = _Patches()
+        self._sampler: _Sampler | None = None
+        self._profile: Any = None
+        self._started = 0.0
+        self._cpu_started = 0.0
+        self._children_cpu_started = 0.0
+
+    def start(self) -> None:
+        import cProfile
+
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._children_cpu_started = _rusage().get("children_cpu_seconds", 0.0)
+        self.imports.install()
+        _patch_subprocess(self._patches, self.calls)
+        _patch_http(self._patches, self.calls)
+        self._sampler = _Sampler(self.interval)
+        self._sampler.start()
+        # 线程 CPU 时间：事件循环所在的主线程，不混入采样线程与 to_thread 工作线程的耗时
+        self._profile = cProfile.Profile(time.thread_time)
+        self._profile.enable()
+
+    def stop(self) -> str | None:
+        """停止剖析并写出报告，返回报告目录（写入失败时返回 None）"""
+        self._profile.disable()
+        wall = time.perf_counter() - self._started
+        cpu = time.process_time() - self._cpu_started
+        self._sampler.stop()
+        self._patches.restore()
+        self.imports.uninstall()
+
+        safe_name = "".join(ch if ch.isalnum() or ch in "-_" else "-" for ch in self.name) or "run"
+        output_dir = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_name}-{os.getpid()}")
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            self._profile.dump_stats(os.path.join(output_dir, "cpu.prof"))
+            report = self._build_report(wall, cpu)
+            with open(os.path.join(output_dir, "report.json"), "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            with open(os.path.join(output_dir, "report.txt"), "w", encoding="utf-8") as f:
+                f.write(format_report(report))
+            with open(os.path.join(output_dir, "wall.folded"), "w", encoding="utf-8") as f:
+                for stack, count in (self._sampler.thread_stacks + self._sampler.task_stacks).most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as exc:
+            print(f"[WARN] 剖析报告写入失败: {exc}", file=sys.stderr)
+            return None
+        self.output_dir = output_dir
+        return output_dir
+
+    def _build_report(self, wall: float, cpu: float) -> dict[str, Any]:
+        import pstats
+
+        sampler = self._sampler
+        samples = max(sampler.samples, 1)
+        rusage = _rusage()
+        functions = [
+            {
+                "function": f"{func} ({_short_path(filename)}:{line})",
+                "calls": calls,
+                "self_seconds": round(self_time, 6),
+                "cumulative_seconds": round(cumulative, 6),
+            }
+            for (filename, line, func), (_, calls, self_time, cumulative, _) in pstats.Stats(
+                self._profile
+            ).stats.items()
+        ]
+        lanes = []
+        for lane, count in sampler.lane_samples.most_common():
+            leaves = [(leaf, n) for (owner, leaf), n in sampler.lane_leaves.most_common() if owner == lane][:5]
+            lanes.append(
+                {
+                    "lane": lane,
+                    "avg_tasks": round(count / samples, 3),
+                    "top": [{"frame": leaf, "avg_tasks": round(n / samples, 3)} for leaf, n in leaves],
+                }
+            )
+        calls = {
+            kind: dict(sorted(entries.items(), key=lambda item: -item[1]["total_seconds"]))
+            for kind, entries in self.calls.stats.items()
+        }
+        return {
+            "name": self.name,
+            "pid": os.getpid(),
+            "argv": sys.argv,
+            "python": sys.version.split()[0],
+            "wall_seconds": round(wall, 6),
+            "cpu_seconds": round(cpu, 6),
+            "children_cpu_seconds": round(rusage.get("children_cpu_seconds", 0.0) - self._children_cpu_started, 6),
+            "peak_rss_mb": round(rusage.get("peak_rss_mb", 0.0), 1),
+            "sampling": {"interval_ms": round(self.interval * 1000, 3), "samples": sampler.samples},
+            "cpu": {
+                "by_self": sorted(functions, key=lambda item: -item["self_seconds"])[:_TOP_N],
+                "by_cumulative": sorted(functions, key=lambda item: -item["cumulative_seconds"])[:_TOP_N],
+            },
+            "wall": {
+                "threads": [
+                    {"frame": leaf, "share": round(count / samples, 4)}
+                    for leaf, count in sampler.thread_leaves.most_common(_TOP_N)
+                ],
+                "tasks": lanes,
+            },
+            "imports": {
+                "total_seconds": round(self.imports.total, 6),
+                "modules": [
+                    {
+                        "module": module,
+                        "inclusive_seconds": round(seconds, 6),
+                        "self_seconds": round(self.imports.self_time[module], 6),
+                    }
+                    for module, seconds in self.imports.inclusive.most_common(_TOP_N)
+                    if seconds >= 0.0001
+                ],
+            },
+            "subprocess": calls.get("subprocess", {}),
+            "http": calls.get("http", {}),
+        }
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """把 report.json 的内容格式化为便于阅读的文本"""
+    lines = [
+        f"issuelab profile: {report['name']} (pid {report['pid']})",
+        f"墙钟 {report['wall_seconds']:.2f}s  CPU {report['cpu_seconds']:.2f}s  "
+        f"子进程 CPU {report['children_cpu_seconds']:.2f}s  峰值 RSS {report['peak_rss_mb']:.1f}MB  "
+        f"采样 {report['sampling']['samples']} 次（间隔 {report['sampling']['interval_ms']:g}ms）",
+        "",
+        "== CPU 热点（主线程，自身 / 累计 / 调用次数）==",
+    ]
+    for item in report["cpu"]["by_self"]:
+        lines.append(
+            f"  {item['self_seconds']:8.3f}s {item['cumulative_seconds']:8.3f}s {item['calls']:>8}  {item['function']}"
+        )
+    lines += ["", "== 墙钟采样（各线程栈顶）=="]
+    for item in report["wall"]["threads"]:
+        lines.append(f"  {item['share']:6.1%}  {item['frame']}")
+    lines += ["", "== asyncio 任务（按 trace 泳道的平均存活任务数，及其主要挂起点）=="]
+    for lane in report["wall"]["tasks"]:
+        lines.append(f"  {lane['avg_tasks']:6.2f}  {lane['lane']}")
+        for item in lane["top"]:
+            lines.append(f"      {item['avg_tasks']:6.2f}  {item['frame']}")
+    lines += ["", f"== 导入耗时（共 {report['imports']['total_seconds'] * 1000:.1f}ms，含子导入 / 自身）=="]
+    for item in report["imports"]["modules"]:
+        lines.append(
+            f"  {item['inclusive_seconds'] * 1000:8.1f}ms {item['self_seconds'] * 1000:8.1f}ms  {item['module']}"
+        )
+    for kind, title in (("subprocess", "子进程"), ("http", "HTTP（到响应头）")):
+        lines += ["", f"== {title}：次数 / 总耗时 / 最长 / 未结束 =="]
+        for key, entry in report[kind].items():
+            lines.append(
+                f"  {entry['count']:>5}  {entry['total_seconds']:8.3f}s {entry['max_seconds']:8.3f}s "
+                f"{entry['pending']:>3}  {key}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def profile_session(name: str, enabled: bool | None = None) -> Iterator[ProfileSession | None]:
+    """在代码块内剖析；enabled 为 None 时按 ISSUELAB_PROFILE 决定。结束时把报告路径打印到 stderr"""
+    if not (is_profiling_enabled() if enabled is None else enabled):
+        yield None
+        return
+    session = ProfileSession(name)
+    session.start()
+    try:
+        yield session
+    finally:
+        output_dir = session.stop()
+        if output_dir:
+            print(f"[INFO] 剖析报告: {output_dir}", file=sys.stderr)
+
+
+def run_profiled(name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """脚本入口包装：带 --profile 参数或 ISSUELAB_PROFILE 开启时剖析 func 的整个运行
+
+    --profile 会先从 sys.argv 中移除，脚本自己的参数解析不受影响。
+    """
+    enabled = "--profile" in sys.argv[1:]
+    if enabled:
+        sys.argv = [sys.argv[0], *(arg for arg in sys.argv[1:] if arg != "--profile")]
+    with profile_session(name, enabled=enabled or None):
+        return func(*args, **kwargs)
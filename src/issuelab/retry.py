@@ -1,6 +1,5 @@
 """重试机制 - 处理网络错误和 API 限流"""
 
-import asyncio
 import logging
 from collections.abc import Callable
 from functools import wraps
@@ -41,6 +40,8 @@ async def retry_async(
     Raises:
         RetryError: 所有重试失败后抛出
     """
+    import asyncio  # 同步入口（gh 调用、分发脚本）不需要加载 asyncio
+
     delay = initial_delay
     last_exception = None
 
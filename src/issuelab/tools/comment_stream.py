@@ -0,0 +1,122 @@
+"""流式评论发布 - 长时间运行的 Agent 先发占位评论，再节流原位更新"""
+
+import asyncio
+import os
+import time
+
+from issuelab.logging_config import get_logger
+from issuelab.mention_policy import clean_mentions_in_text
+from issuelab.tools.github import MAX_COMMENT_LENGTH, create_comment, delete_comment, edit_comment, truncate_text
+
+logger = get_logger(__name__)
+
+_DEFAULT_INTERVAL_SECONDS = 10.0
+_DEFAULT_MIN_CHARS = 800
+
+
+def is_comment_streaming_enabled() -> bool:
+    """Whether to stream agent output into a progressively edited comment (opt-in)."""
+    return os.environ.get("ISSUELAB_STREAM_COMMENTS", "0").lower() in {"1", "true", "yes", "on"}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class StreamingCommentPublisher:
+    """单个 Agent 的流式评论发布器
+
+    - 首次收到文本回调时创建占位评论
+    - 之后按时间间隔或新增字符数节流，原位编辑为当前累计文本
+    - 中间版本会去除 @mentions，避免提前打扰；定稿由 post_comment 策略管线完成
+
+    所有 gh 调用都在线程中执行，且同一时刻最多一个编辑在途，不阻塞 Agent 消息循环。
+    """
+
+    def __init__(
+        self,
+        issue_number: int,
+        agent_name: str,
+        *,
+        repo: str | None = None,
+        interval_seconds: float | None = None,
+        min_chars: int | None = None,
+    ) -> None:
+        self.issue_number = issue_number
+        self.agent_name = agent_name
+        self.repo = repo
+        self.interval_seconds = (
+            interval_seconds
+            if interval_seconds is not None
+            else _env_float("ISSUELAB_STREAM_INTERVAL_SECONDS", _DEFAULT_INTERVAL_SECONDS)
+        )
+        self.min_chars = (
+            min_chars if min_chars is not None else int(_env_float("ISSUELAB_STREAM_MIN_CHARS", _DEFAULT_MIN_CHARS))
+        )
+        self.comment_id: int | None = None
+        self.edit_count = 0
+        self._started = False
+        self._flushed_text = ""
+        self._last_flush_at = 0.0
+        self._pending: asyncio.Task | None = None
+
+    def _render(self, text: str, *, in_progress: bool) -> str:
+        body = clean_mentions_in_text(text, replacement="{username}").strip()
+        status = "_（生成中，内容将持续更新…）_" if in_progress else ""
+        if not body:
+            return f"[Agent: {self.agent_name}]\n\n{status}".strip()
+        if not body.startswith("[Agent:"):
+            body = f"[Agent: {self.agent_name}]\n\n{body}"
+        return truncate_text(f"{body}\n\n{status}".strip(), MAX_COMMENT_LENGTH)
+
+    async def _start(self) -> None:
+        self._started = True
+        self.comment_id = await asyncio.to_thread(
+            create_comment, self.issue_number, self._render("", in_progress=True), self.repo
+        )
+        self._last_flush_at = time.monotonic()
+        if self.comment_id is None:
+            logger.warning(f"[{self.agent_name}] 占位评论创建失败，将在完成后一次性发布")
+        else:
+            logger.info(f"[{self.agent_name}] 已创建占位评论 (comment_id={self.comment_id})")
+
+    async def _flush(self, text: str) -> None:
+        if self.comment_id is None:
+            return
+        if await asyncio.to_thread(edit_comment, self.comment_id, self._render(text, in_progress=True), self.repo):
+            self.edit_count += 1
+
+    async def update(self, text: str) -> None:
+        """接收当前累计文本（重试时可能变短），按节流策略更新评论"""
+        if not self._started:
+            await self._start()
+        if self.comment_id is None or (self._pending is not None and not self._pending.done()):
+            return
+
+        elapsed = time.monotonic() - self._last_flush_at
+        grown = abs(len(text) - len(self._flushed_text))
+        if text == self._flushed_text or (elapsed < self.interval_seconds and grown < self.min_chars):
+            return
+
+        self._flushed_text = text
+        self._last_flush_at = time.monotonic()
+        self._pending = asyncio.create_task(self._flush(text))
+
+    async def close(self) -> None:
+        """等待在途编辑完成（定稿前调用）"""
+        if self._pending is not None:
+            try:
+                await self._pending
+            except Exception as exc:
+                logger.warning(f"[{self.agent_name}] 流式评论更新失败: {exc}")
+            self._pending = None
+
+    async def discard(self) -> None:
+        """删除占位评论（结果不可发布且不发布失败摘要时）"""
+        await self.close()
+        if self.comment_id is not None and await asyncio.to_thread(delete_comment, self.comment_id, self.repo):
+            logger.info(f"[{self.agent_name}] 已删除占位评论 (comment_id={self.comment_id})")
+            self.comment_id = None
@@ -64,20 +64,23 @@ def get_issue_info(issue_number: int, format_comments: bool = False, repo: str |
     comment_count = len(data.get("comments", []))
     data["comment_count"] = comment_count
 
-    # 格式化评论（如果需要）
+    # 格式化评论（如果需要）；原始列表保留在 raw_comments 中供上下文打包使用
     if format_comments:
-        comments_list = []
-        for comment in data.get("comments", []):
-            author = comment.get("author", {}).get("login", "unknown")
-            created_at = comment.get("createdAt", "")[:10]  # 只取日期部分
-            body = comment.get("body", "")
-            comments_list.append(f"- **[{author}]** ({created_at}):\n{body}")
-
-        data["comments"] = "\n\n".join(comments_list)
+        raw_comments = data.get("comments", [])
+        data["raw_comments"] = raw_comments
+        data["comments"] = "\n\n".join(format_issue_comment(comment) for comment in raw_comments)
 
     return data
 
 
+def format_issue_comment(comment: dict) -> str:
+    """将单条 gh 评论对象格式化为 LLM 输入文本"""
+    author = (comment.get("author") or {}).get("login", "unknown")
+    created_at = (comment.get("createdAt") or "")[:10]  # 只取日期部分
+    body = comment.get("body", "")
+    return f"- **[{author}]** ({created_at}):\n{body}"
+
+
 def write_issue_context_file(
     issue_number: int,
     title: str,
@@ -150,6 +153,7 @@ def post_comment(
     auto_truncate: bool = True,
     auto_clean: bool = True,
     repo: str | None = None,
+    comment_id: int | None = None,
 ) -> bool:
     """在 Issue 下发布评论（集中式 @ 管理）
 
@@ -157,6 +161,7 @@ def post_comment(
     1. 支持拼接 @ 区域
     2. 支持自动过滤 @mentions（默认开启，不改写正文）
     3. 支持跨仓库评论
+    4. 支持原位更新已有评论（流式占位评论定稿）
 
     Args:
         issue_number: Issue 编号
@@ -167,6 +172,7 @@ def post_comment(
         auto_clean: 是否自动过滤 @mentions（默认 True）
                    设为 False 可禁用 @ 过滤（绕过策略）
         repo: 仓库名称（格式：owner/repo），None 表示当前仓库
+        comment_id: 已有评论 ID；提供时编辑该评论而非新建
 
     Returns:
         是否成功发布
@@ -205,6 +211,16 @@ def post_comment(
     if auto_truncate:
         final_body = truncate_text(final_body, MAX_COMMENT_LENGTH)
 
+    if comment_id is not None:
+        if not edit_comment(comment_id, final_body, repo=repo):
+            logger.error(f"更新 Issue #{issue_number} 的评论 {comment_id} 失败")
+            return False
+        if agent_name:
+            logger.info(f"[{agent_name}] 评论已更新到 Issue #{issue_number} (comment_id={comment_id})")
+        else:
+            logger.info(f"评论已更新到 Issue #{issue_number} (comment_id={comment_id})")
+        return True
+
     # 使用临时文件避免命令行长度限制
     with tempfile.NamedTemporaryFile(mode="w", suffix=".md", delete=False) as f:
         f.write(final_body)
@@ -234,6 +250,61 @@ def post_comment(
     return True
 
 
+def _repo_api_prefix(repo: str | None) -> str:
+    # gh api 会将 {owner}/{repo} 占位符解析为当前仓库
+    return f"repos/{repo}" if repo else "repos/{owner}/{repo}"
+
+
+def _run_gh_api(method: str, path: str, payload: dict | None = None) -> subprocess.CompletedProcess:
+    """调用 gh api（请求体经临时文件传入，避免命令行长度限制）"""
+    env = Config.prepare_github_env()
+    cmd = ["gh", "api", "--method", method, path]
+    if payload is None:
+        return subprocess.run(cmd, capture_output=True, text=True, env=env)
+
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
+        json.dump(payload, f, ensure_ascii=False)
+        f.flush()
+        result = subprocess.run([*cmd, "--input", f.name], capture_output=True, text=True, env=env)
+        os.unlink(f.name)
+    return result
+
+
+def create_comment(issue_number: int, body: str, repo: str | None = None) -> int | None:
+    """直接创建评论并返回评论 ID（不经过 @ 策略，仅用于占位/进度评论）
+
+    Returns:
+        评论 ID，失败时返回 None
+    """
+    result = _run_gh_api("POST", f"{_repo_api_prefix(repo)}/issues/{issue_number}/comments", {"body": body})
+    if result.returncode != 0:
+        logger.error(f"创建 Issue #{issue_number} 评论失败: {result.stderr}")
+        return None
+    try:
+        return int(json.loads(result.stdout)["id"])
+    except (ValueError, KeyError, TypeError) as exc:
+        logger.error(f"解析评论 ID 失败: {exc}")
+        return None
+
+
+def edit_comment(comment_id: int, body: str, repo: str | None = None) -> bool:
+    """原位编辑评论正文（不经过 @ 策略）"""
+    result = _run_gh_api("PATCH", f"{_repo_api_prefix(repo)}/issues/comments/{comment_id}", {"body": body})
+    if result.returncode != 0:
+        logger.error(f"编辑评论 {comment_id} 失败: {result.stderr}")
+        return False
+    return True
+
+
+def delete_comment(comment_id: int, repo: str | None = None) -> bool:
+    """删除评论"""
+    result = _run_gh_api("DELETE", f"{_repo_api_prefix(repo)}/issues/comments/{comment_id}")
+    if result.returncode != 0:
+        logger.error(f"删除评论 {comment_id} 失败: {result.stderr}")
+        return False
+    return True
+
+
 def update_label(issue_number: int, label: str, action: Literal["add", "remove"] = "add") -> bool:
     """更新 Issue 标签
 
@@ -0,0 +1,248 @@
+"""本地链接可达性检查 - 代替模型用工具逐个访问来源链接
+
+- 有界并发（线程池中执行 requests，受信号量限制）
+- 单链接超时
+- 磁盘结果缓存（带 TTL，默认 .issuelab/link_cache.json）
+- 只访问公网 http(s) 地址：链接来自模型输出（可被 Issue 内容影响），逐跳检查重定向，
+  拒绝 localhost、内网、链路本地（如 169.254.169.254 元数据服务）等地址
+"""
+
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import time
+from dataclasses import dataclass
+from urllib.parse import urljoin, urlsplit
+
+import requests
+
+from issuelab.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_DEFAULT_CONCURRENCY = 8
+_DEFAULT_TIMEOUT_SECONDS = 8.0
+_DEFAULT_CACHE_TTL_SECONDS = 24 * 3600
+_MAX_LINKS = 50
+_USER_AGENT = "IssueLab-LinkChecker/1.0"
+# 部分站点不支持 HEAD，遇到这些状态码时改用 GET 重试
+_HEAD_FALLBACK_STATUSES = {403, 404, 405, 406, 429, 501}
+_MAX_REDIRECTS = 5
+
+
+@dataclass
+class LinkStatus:
+    """单个链接的检查结果
+
+    Attributes:
+        url: 原始链接
+        status: reachable（<400）/ broken（>=400）/ unreachable（超时、DNS、连接失败、非公网地址）
+        http_status: HTTP 状态码（unreachable 时为 None）
+        final_url: 跟随重定向后的地址
+        error: 失败原因
+        cached: 是否来自磁盘缓存
+    """
+
+    url: str
+    status: str
+    http_status: int | None = None
+    final_url: str = ""
+    error: str = ""
+    cached: bool = False
+
+
+def is_link_check_enabled() -> bool:
+    """是否在多阶段流程中启用本地链接检查（ISSUELAB_LINK_CHECK，默认开启）"""
+    return os.environ.get("ISSUELAB_LINK_CHECK", "1").lower() not in {"0", "false", "no", "off"}
+
+
+def is_private_link_check_allowed() -> bool:
+    """是否允许检查非公网地址（ISSUELAB_LINK_CHECK_ALLOW_PRIVATE，默认关闭，仅用于本地调试）"""
+    return os.environ.get("ISSUELAB_LINK_CHECK_ALLOW_PRIVATE", "0").lower() in {"1", "true", "yes", "on"}
+
+
+def _host_is_public(host: str) -> bool:
+    """主机名解析出的所有地址都是公网地址时返回 True（解析失败视为不可访问）"""
+    try:
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+    except (OSError, UnicodeError):
+        return False
+    addresses = {ipaddress.ip_address(info[4][0].split("%", 1)[0]) for info in infos}
+    return bool(addresses) and all(address.is_global and not address.is_multicast for address in addresses)
+
+
+def _blocked_reason(url: str) -> str:
+    """不允许访问的链接返回原因，允许时返回空串"""
+    parts = urlsplit(url)
+    if parts.scheme not in {"http", "https"}:
+        return f"blocked: scheme {parts.scheme or '-'}"
+    if not parts.hostname:
+        return "blocked: no host"
+    if not is_private_link_check_allowed() and not _host_is_public(parts.hostname):
+        return "blocked: non-public host"
+    return ""
+
+
+class _BlockedLinkError(Exception):
+    pass
+
+
+def _request(method: str, url: str, timeout: float, headers: dict[str, str]) -> requests.Response:
+    """手动跟随重定向，每一跳都先检查目标地址"""
+    current = url
+    for _ in range(_MAX_REDIRECTS + 1):
+        reason = _blocked_reason(current)
+        if reason:
+            raise _BlockedLinkError(reason)
+        response = requests.request(
+            method, current, allow_redirects=False, timeout=timeout, headers=headers, stream=True
+        )
+        if not response.is_redirect:
+            return response
+        current = urljoin(current, response.headers["location"])
+        response.close()
+    raise requests.TooManyRedirects(f"超过 {_MAX_REDIRECTS} 次重定向")
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _default_cache_path() -> str:
+    return os.path.join(os.getcwd(), ".issuelab", "link_cache.json")
+
+
+def _load_cache(path: str) -> dict[str, dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_cache(path: str, cache: dict[str, dict]) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        logger.warning(f"链接检查缓存写入失败: {exc}")
+
+
+def check_link(url: str, timeout: float = _DEFAULT_TIMEOUT_SECONDS) -> LinkStatus:
+    """同步检查单个链接：先 HEAD，必要时回退 GET（只读响应头）"""
+    headers = {"User-Agent": _USER_AGENT}
+    try:
+        response = _request("HEAD", url, timeout, headers)
+        if response.status_code in _HEAD_FALLBACK_STATUSES:
+            response.close()
+            response = _request("GET", url, timeout, headers)
+        response.close()
+    except _BlockedLinkError as exc:
+        return LinkStatus(url=url, status="unreachable", error=str(exc))
+    except requests.Timeout:
+        return LinkStatus(url=url, status="unreachable", error="timeout")
+    except requests.RequestException as exc:
+        return LinkStatus(url=url, status="unreachable", error=type(exc).__name__)
+
+    status = "reachable" if response.status_code < 400 else "broken"
+    return LinkStatus(url=url, status=status, http_status=response.status_code, final_url=response.url or url)
+
+
+async def check_links(
+    urls: list[str],
+    *,
+    concurrency: int | None = None,
+    timeout: float | None = None,
+    cache_path: str | None = None,
+    ttl_seconds: float | None = None,
+) -> list[LinkStatus]:
+    """并发检查链接（按输入顺序返回结果）
+
+    Args:
+        urls: 待检查链接（自动去重，最多检查前 50 个）
+        concurrency: 并发上限（默认 ISSUELAB_LINK_CHECK_CONCURRENCY 或 8）
+        timeout: 单链接超时秒数（默认 ISSUELAB_LINK_CHECK_TIMEOUT_SECONDS 或 8）
+        cache_path: 缓存文件路径（默认 .issuelab/link_cache.json）
+        ttl_seconds: 缓存有效期（默认 ISSUELAB_LINK_CACHE_TTL_SECONDS 或 24 小时，0 表示不使用缓存）
+    """
+    unique_urls = list(dict.fromkeys(u for u in urls if u))[:_MAX_LINKS]
+    if not unique_urls:
+        return []
+
+    limit = max(1, int(concurrency or _env_number("ISSUELAB_LINK_CHECK_CONCURRENCY", _DEFAULT_CONCURRENCY)))
+    per_link_timeout = timeout or _env_number("ISSUELAB_LINK_CHECK_TIMEOUT_SECONDS", _DEFAULT_TIMEOUT_SECONDS)
+    ttl = (
+        ttl_seconds
+        if ttl_seconds is not None
+        else _env_number("ISSUELAB_LINK_CACHE_TTL_SECONDS", _DEFAULT_CACHE_TTL_SECONDS)
+    )
+    path = cache_path or _default_cache_path()
+    cache = _load_cache(path) if ttl > 0 else {}
+    now = time.time()
+
+    results: dict[str, LinkStatus] = {}
+    pending: list[str] = []
+    for url in unique_urls:
+        entry = cache.get(url)
+        if entry and now - float(entry.get("checked_at", 0)) < ttl:
+            results[url] = LinkStatus(
+                url=url,
+                status=str(entry.get("status", "")),
+                http_status=entry.get("http_status"),
+                final_url=str(entry.get("final_url", "")),
+                cached=True,
+            )
+        else:
+            pending.append(url)
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _check(url: str) -> None:
+        async with semaphore:
+            results[url] = await asyncio.to_thread(check_link, url, per_link_timeout)
+
+    started = time.monotonic()
+    await asyncio.gather(*(_check(url) for url in pending))
+
+    if ttl > 0 and pending:
+        for url in pending:
+            status = results[url]
+            # 网络抖动导致的 unreachable 不缓存，下次重新检查
+            if status.status != "unreachable":
+                cache[url] = {
+                    "status": status.status,
+                    "http_status": status.http_status,
+                    "final_url": status.final_url,
+                    "checked_at": now,
+                }
+        _save_cache(path, cache)
+
+    logger.info(
+        "链接检查: 共 %s 个，缓存命中 %s 个，耗时 %.2fs",
+        len(unique_urls),
+        len(unique_urls) - len(pending),
+        time.monotonic() - started,
+    )
+    return [results[url] for url in unique_urls]
+
+
+def format_link_status_table(statuses: list[LinkStatus]) -> str:
+    """渲染为 Markdown 表格（供 Verifier/Judge 阶段引用）"""
+    if not statuses:
+        return ""
+    lines = ["| URL | 状态 | HTTP | 说明 |", "|-----|------|------|------|"]
+    for item in statuses:
+        note = item.error
+        if item.final_url and item.final_url != item.url:
+            note = f"重定向至 {item.final_url}"
+        lines.append(f"| {item.url} | {item.status} | {item.http_status or '-'} | {note or '-'} |")
+    return "\n".join(lines)
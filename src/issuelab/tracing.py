@@ -0,0 +1,326 @@
+"""结构化 span 追踪
+
+记录 agent 运行中各环节的耗时（options 构建、查询首条消息、每一轮、每次工具调用、重试尝试、
+多阶段各阶段、评论发布），每个进程写一个 JSONL 文件（默认 .issuelab/traces/），
+可导出为 Chrome trace / Perfetto 格式查看并行 agent 的时间线：
+
+    python scripts/export_trace.py .issuelab/traces -o trace.json
+
+span 的父子关系与所在泳道（lane，通常为 agent 名）通过 contextvar 传递，
+asyncio 子任务与 to_thread 会自动继承。本模块只依赖标准库。
+
+span 先缓存在内存中，在最外层 span 结束（一次运行结束）、缓存达到上限或进程退出时批量写入，
+避免在事件循环里逐个 span 打开文件；trace 目录按保留天数与文件数清理。
+"""
+
+import asyncio
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import Context, ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from issuelab.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_DEFAULT_LANE = "main"
+_DEFAULT_RETENTION_DAYS = 7.0
+_MAX_TRACE_FILES = 200
+_MAX_TRACE_FILE_BYTES = 32 * 1024 * 1024
+_MAX_BUFFERED_SPANS = 1000
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_trace_span", default=None)
+_current_lane: ContextVar[str] = ContextVar("current_trace_lane", default=_DEFAULT_LANE)
+
+
+def is_tracing_enabled() -> bool:
+    """是否记录 span（ISSUELAB_TRACE，默认开启）"""
+    return os.environ.get("ISSUELAB_TRACE", "1").lower() not in {"0", "false", "no", "off"}
+
+
+def context_lane(context: Context) -> str:
+    """指定 contextvars 上下文（如某个 asyncio 任务的上下文）所在的泳道"""
+    return context.get(_current_lane, _DEFAULT_LANE)
+
+
+def get_trace_dir() -> str:
+    """trace 目录（ISSUELAB_TRACE_DIR，默认 .issuelab/traces）"""
+    return os.environ.get("ISSUELAB_TRACE_DIR") or os.path.join(os.getcwd(), ".issuelab", "traces")
+
+
+def get_trace_retention_days() -> float:
+    """trace 文件保留天数（ISSUELAB_TRACE_RETENTION_DAYS，默认 7；<=0 表示不按时间清理）"""
+    try:
+        return float(os.environ.get("ISSUELAB_TRACE_RETENTION_DAYS", _DEFAULT_RETENTION_DAYS))
+    except (TypeError, ValueError):
+        return _DEFAULT_RETENTION_DAYS
+
+
+def prune_trace_dir(directory: str, *, now: float | None = None) -> int:
+    """删除超过保留天数的 trace 文件，并只保留最新的 200 个，返回删除数量"""
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith(".jsonl")]
+        files = sorted(
+            ((os.path.getmtime(os.path.join(directory, name)), os.path.join(directory, name)) for name in names),
+            reverse=True,
+        )
+    except OSError:
+        return 0
+    retention_days = get_trace_retention_days()
+    cutoff = (time.time() if now is None else now) - retention_days * 86400
+    removed = 0
+    for index, (mtime, path) in enumerate(files):
+        if index >= _MAX_TRACE_FILES or (retention_days > 0 and mtime < cutoff):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+class Tracer:
+    """单个进程的 span 写入器（缓存记录，flush 时批量追加为 JSON 行）"""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.trace_id = uuid.uuid4().hex
+        self._file_prefix = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self._file_index = 0
+        self.path = os.path.join(directory, f"{self._file_prefix}.jsonl")
+        self._lock = threading.Lock()
+        self._buffer: list[str] = []
+        self._failed = False
+        self._pruned = False
+
+    def write(self, record: dict[str, Any]) -> None:
+        if self._failed:
+            return
+        line = json.dumps({"trace_id": self.trace_id, **record}, ensure_ascii=False, default=str)
+        with self._lock:
+            self._buffer.append(line)
+            full = len(self._buffer) >= _MAX_BUFFERED_SPANS
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """把缓存的 span 写入文件；单个文件超过 32MB 时换新文件（常驻进程不会无限追加同一文件）"""
+        with self._lock:
+            if not self._buffer or self._failed:
+                return
+            lines, self._buffer = self._buffer, []
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                if not self._pruned:
+                    self._pruned = True
+                    prune_trace_dir(self.directory)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                    size = f.tell()
+                if size >= _MAX_TRACE_FILE_BYTES:
+                    self._file_index += 1
+                    self._pruned = False
+                    self.path = os.path.join(self.directory, f"{self._file_prefix}.{self._file_index}.jsonl")
+            except OSError as exc:
+                # 写入失败只告警一次，追踪不影响主流程
+                self._failed = True
+                logger.warning(f"trace 写入失败，本进程停止记录: {exc}")
+
+
+_tracer: Tracer | None = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer | None:
+    """当前进程的 Tracer；追踪关闭时返回 None"""
+    global _tracer
+    if not is_tracing_enabled():
+        return None
+    directory = get_trace_dir()
+    with _tracer_lock:
+        if _tracer is None or _tracer.directory != directory:
+            if _tracer is not None:
+                _tracer.flush()
+            _tracer = Tracer(directory)
+        return _tracer
+
+
+def flush_traces() -> None:
+    """写出当前进程缓存的 span（最外层 span 结束与进程退出时自动调用）"""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.flush()
+
+
+atexit.register(flush_traces)
+
+
+@dataclass
+class Span:
+    name: str
+    cat: str
+    lane: str
+    parent_id: str | None
+    attrs: dict[str, Any] = field(default_factory=dict)
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    start: float = field(default_factory=time.time)
+    status: str = "ok"
+    _started: float = field(default_factory=time.monotonic, repr=False)
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def to_record(self, duration: float) -> dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "cat": self.cat,
+            "lane": self.lane,
+            "pid": os.getpid(),
+            "start": round(self.start, 6),
+            "duration": round(max(0.0, duration), 6),
+            "status": self.status,
+            "attrs": {key: value for key, value in self.attrs.items() if value is not None},
+        }
+
+
+@contextmanager
+def span(name: str, *, cat: str = "orchestration", lane: str | None = None, **attrs: Any) -> Iterator[Span]:
+    """记录一个 span（同步/异步代码均可用；异常时 status 记为 error / cancelled 并继续抛出）
+
+    lane: 指定泳道（Chrome trace 中的一行）；不指定时继承外层
+    """
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        cat=cat,
+        lane=lane or _current_lane.get(),
+        parent_id=parent.span_id if parent else None,
+        attrs=dict(attrs),
+    )
+    span_token = _current_span.set(current)
+    lane_token = _current_lane.set(current.lane)
+    try:
+        yield current
+    except BaseException as exc:
+        current.status = "cancelled" if isinstance(exc, asyncio.CancelledError) else "error"
+        current.attrs.setdefault("error", f"{type(exc).__name__}: {exc}"[:200])
+        raise
+    finally:
+        _current_lane.reset(lane_token)
+        _current_span.reset(span_token)
+        tracer = get_tracer()
+        if tracer is not None:
+            tracer.write(current.to_record(time.monotonic() - current._started))
+            if parent is None:
+                tracer.flush()
+
+
+def record_span(
+    name: str,
+    *,
+    started_monotonic: float,
+    ended_monotonic: float | None = None,
+    cat: str = "orchestration",
+    status: str = "ok",
+    **attrs: Any,
+) -> None:
+    """补记一个已结束的 span（起止点不在同一代码块内时使用，如工具调用、模型轮次）
+
+    父 span 与泳道取调用处的上下文。
+    """
+    tracer = get_tracer()
+    if tracer is None:
+        return
+    end = time.monotonic() if ended_monotonic is None else ended_monotonic
+    parent = _current_span.get()
+    item = Span(
+        name=name,
+        cat=cat,
+        lane=_current_lane.get(),
+        parent_id=parent.span_id if parent else None,
+        attrs=dict(attrs),
+        start=time.time() - (time.monotonic() - started_monotonic),
+        status=status,
+    )
+    tracer.write(item.to_record(end - started_monotonic))
+
+
+def load_spans(paths: Iterable[str]) -> list[dict[str, Any]]:
+    """读取 JSONL span 文件（目录则读取其中全部 *.jsonl），跳过损坏行"""
+    flush_traces()
+    files: list[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".jsonl")))
+        else:
+            files.append(path)
+
+    spans: list[dict[str, Any]] = []
+    for file_path in files:
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and "start" in record and "duration" in record:
+                    spans.append(record)
+    return spans
+
+
+def to_chrome_trace(spans: list[dict[str, Any]]) -> dict[str, Any]:
+    """转换为 Chrome trace event 格式（chrome://tracing、ui.perfetto.dev 均可打开）
+
+    每个进程一个 pid，每个泳道（agent）一个 tid；时间戳以最早 span 为零点，单位微秒。
+    """
+    if not spans:
+        return {"traceEvents": [], "displayTimeUnit": "ms"}
+
+    origin = min(float(s["start"]) for s in spans)
+    tids: dict[tuple[int, str], int] = {}
+    events: list[dict[str, Any]] = []
+    for s in sorted(spans, key=lambda item: (float(item["start"]), -float(item["duration"]))):
+        pid = int(s.get("pid") or 0)
+        lane = str(s.get("lane") or _DEFAULT_LANE)
+        tid = tids.setdefault((pid, lane), len(tids) + 1)
+        args = dict(s.get("attrs") or {})
+        args.update({"status": s.get("status", "ok"), "span_id": s.get("span_id"), "parent_id": s.get("parent_id")})
+        events.append(
+            {
+                "name": s.get("name", ""),
+                "cat": s.get("cat", ""),
+                "ph": "X",
+                "ts": round((float(s["start"]) - origin) * 1_000_000),
+                "dur": max(1, round(float(s["duration"]) * 1_000_000)),
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            }
+        )
+
+    metadata: list[dict[str, Any]] = []
+    for pid in sorted({pid for pid, _ in tids}):
+        metadata.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": f"issuelab {pid}"}})
+    for (pid, lane), tid in tids.items():
+        metadata.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": lane}})
+    return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(paths: Iterable[str], output_path: str) -> int:
+    """导出 Chrome trace JSON，返回导出的 span 数量"""
+    spans = load_spans(paths)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(to_chrome_trace(spans), f, ensure_ascii=False)
+    return len(spans)
@@ -0,0 +1,245 @@
+"""常驻 worker（issuelab serve）
+
+冷启动的 `python -m issuelab ...` 每个事件都要重新付出解释器启动、SDK 导入、agent 注册表解析与
+options 构建的开销。worker 进程常驻，从本地事件队列（issuelab.event_queue）领取事件，在同一进程内
+按命令行相同的分派逻辑执行；discover_agents、create_agent_options 等模块级缓存在事件之间复用。
+
+事件在线程池中并发执行（每个事件各自 asyncio.run），触发评论经 contextvar 按事件隔离。
+可选的 webhook 接收端把 POST /events 写入同一队列，并立即唤醒 worker。
+"""
+
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from issuelab.config import trigger_comment_override
+from issuelab.event_queue import EventQueue, QueuedEvent
+from issuelab.logging_config import get_logger
+from issuelab.tracing import span
+
+logger = get_logger(__name__)
+
+RunEvent = Callable[[list[str]], Any]
+ValidateEvent = Callable[[list[str]], Any]
+
+_MAX_WEBHOOK_BODY_BYTES = 1024 * 1024
+
+
+def get_webhook_secret() -> str:
+    """webhook 签名密钥（ISSUELAB_WEBHOOK_SECRET，未设置时不校验签名）"""
+    return os.environ.get("ISSUELAB_WEBHOOK_SECRET", "")
+
+
+def _is_loopback_host(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def warm_up() -> None:
+    """预热：导入执行器与 SDK、解析 agent 注册表，并为每个 agent 构建（缓存）SDK options"""
+    started = time.monotonic()
+    import issuelab.commands.core  # noqa: F401  执行器 + claude_agent_sdk
+    import issuelab.commands.observer  # noqa: F401
+    import issuelab.commands.personal  # noqa: F401
+    from issuelab.agents.discovery import discover_agents
+    from issuelab.agents.options import create_agent_options
+
+    agents = discover_agents()
+    for name in agents:
+        try:
+            create_agent_options(agent_name=name)
+        except Exception as exc:  # noqa: BLE001 - 预热失败不影响启动，事件执行时会再次构建
+            logger.warning(f"[serve] 预热 {name} 的 options 失败: {exc}")
+    logger.info(f"[serve] 预热完成：{len(agents)} 个 agent，耗时 {time.monotonic() - started:.2f}s")
+
+
+class EventWorker:
+    """从队列领取事件并在线程池中执行，最多 concurrency 个事件同时运行"""
+
+    def __init__(
+        self, queue: EventQueue, run_event: RunEvent, *, concurrency: int = 2, poll_interval: float = 0.5
+    ) -> None:
+        self.queue = queue
+        self.run_event = run_event
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.processed = 0
+        self.failed = 0
+        self._counter_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def notify(self) -> None:
+        """有新事件或空出槽位时唤醒领取循环（不必等到下一次轮询）"""
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        """停止领取新事件；已在执行的事件会运行完毕"""
+        self._stopping.set()
+        self._wakeup.set()
+
+    def serve(self, *, once: bool = False) -> None:
+        """领取循环；once=True 时在队列为空且没有进行中的事件后返回"""
+        in_flight: set[Future] = set()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="issuelab-event") as pool:
+            while not self._stopping.is_set():
+                self._wakeup.clear()
+                in_flight = {future for future in in_flight if not future.done()}
+                while len(in_flight) < self.concurrency and not self._stopping.is_set():
+                    event = self.queue.claim()
+                    if event is None:
+                        break
+                    future = pool.submit(self._process, event)
+                    future.add_done_callback(lambda _: self._wakeup.set())
+                    in_flight.add(future)
+                if once and not in_flight:
+                    break
+                self._wakeup.wait(self.poll_interval)
+            if in_flight:
+                logger.info(f"[serve] 等待 {len(in_flight)} 个进行中的事件完成...")
+
+    def _process(self, event: QueuedEvent) -> None:
+        label = " ".join(event.argv[:3])
+        logger.info(f"[serve] 开始事件 #{event.id}: {label}（排队 {event.started_at - event.enqueued_at:.2f}s）")
+        # 未携带触发评论的事件不沿用 worker 进程环境里的 ISSUELAB_TRIGGER_COMMENT
+        token = trigger_comment_override.set(event.trigger_comment or "")
+        started = time.monotonic()
+        ok, error = False, None
+        try:
+            with span("serve.event", lane=f"event-{event.id}", event_id=event.id, command=event.argv[0]):
+                code = self.run_event(event.argv)
+            ok = code in (None, 0)
+            error = None if ok else f"exit code {code}"
+        except SystemExit as exc:
+            ok = exc.code in (None, 0)
+            error = None if ok else f"exit code {exc.code}"
+        except Exception as exc:  # noqa: BLE001 - 单个事件失败不影响 worker
+            logger.exception(f"[serve] 事件 #{event.id} 执行异常")
+            error = f"{type(exc).__name__}: {exc}"[:500]
+        finally:
+            trigger_comment_override.reset(token)
+
+        self.queue.finish(event.id, ok=ok, error=error)
+        with self._counter_lock:
+            self.processed += 1
+            self.failed += 0 if ok else 1
+        status = "完成" if ok else f"失败（{error}）"
+        logger.info(f"[serve] 事件 #{event.id} {status}，耗时 {time.monotonic() - started:.2f}s")
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    server: "_WebhookServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"[webhook] {self.address_string()} {format % args}")
+
+    def _reply(self, status: int, payload: dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") != "/healthz":
+            self._reply(404, {"error": "not found"})
+            return
+        self._reply(200, {"status": "ok", "events": self.server.receiver.queue.counts()})
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/events":
+            self._reply(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("content-length") or 0)
+        if length > _MAX_WEBHOOK_BODY_BYTES:
+            self._reply(413, {"error": "payload too large"})
+            return
+        body = self.rfile.read(length)
+        status, payload = self.server.receiver.accept(body, self.headers.get("x-hub-signature-256", ""))
+        self._reply(status, payload)
+
+
+class _WebhookServer(ThreadingHTTPServer):
+    daemon_threads = True
+    receiver: "WebhookReceiver"
+
+
+class WebhookReceiver:
+    """webhook 接收端：POST /events 写入队列，GET /healthz 返回各状态事件数
+
+    请求体为 JSON：{"argv": ["execute", "--issue", "12", "--agents", "moderator"], "trigger_comment": "..."}。
+    设置了密钥时校验 X-Hub-Signature-256（与 GitHub webhook 相同的 HMAC-SHA256 签名）；
+    未设置密钥时只允许监听本机回环地址（否则任何能访问该端口的人都可以触发 agent 运行），不满足时抛 ValueError。
+    """
+
+    def __init__(
+        self,
+        queue: EventQueue,
+        validate: ValidateEvent,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        secret: str | None = None,
+        on_enqueue: Callable[[], None] | None = None,
+    ) -> None:
+        self.queue = queue
+        self.validate = validate
+        self.secret = get_webhook_secret() if secret is None else secret
+        if not self.secret and not _is_loopback_host(host):
+            raise ValueError(f"webhook 监听非本机地址 {host} 时必须设置 ISSUELAB_WEBHOOK_SECRET")
+        self.on_enqueue = on_enqueue
+        self._server = _WebhookServer((host, port), _WebhookHandler)
+        self._server.receiver = self
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        if not self.secret:
+            logger.warning("[webhook] 未设置 ISSUELAB_WEBHOOK_SECRET，不校验请求签名（仅监听本机）")
+        self._thread = threading.Thread(target=self._server.serve_forever, name="issuelab-webhook", daemon=True)
+        self._thread.start()
+        logger.info(f"[webhook] 监听 {self.url}/events")
+
+    def stop(self) -> None:
+        # shutdown() 会等待 serve_forever 退出，未 start 时直接关闭 socket
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join(timeout=5)
+        self._server.server_close()
+
+    def accept(self, body: bytes, signature: str) -> tuple[int, dict[str, Any]]:
+        """校验并入队，返回 (HTTP 状态码, 响应内容)"""
+        if self.secret:
+            expected = "sha256=" + hmac.new(self.secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+            if not hmac.compare_digest(expected, signature):
+                return 401, {"error": "invalid signature"}
+        try:
+            payload = json.loads(body or b"{}")
+            argv = payload.get("argv") if isinstance(payload, dict) else None
+            if not isinstance(argv, list) or not all(isinstance(item, str) for item in argv):
+                raise ValueError("argv 必须是字符串数组")
+            self.validate(argv)
+            trigger_comment = payload.get("trigger_comment")
+            event_id = self.queue.enqueue(argv, trigger_comment=str(trigger_comment) if trigger_comment else None)
+        except ValueError as exc:
+            return 400, {"error": str(exc)}
+        if self.on_enqueue is not None:
+            self.on_enqueue()
+        return 202, {"id": event_id}
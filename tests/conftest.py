@@ -0,0 +1,23 @@
+"""Shared pytest fixtures."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolate_runtime_side_effects(monkeypatch, tmp_path):
+    """Keep tests offline and hermetic.
+
+    - Multistage runs check source links over HTTP by default; tests opt in explicitly.
+    - Agent runs append duration samples to a local stats store; keep it per-test.
+    - Single-flight lock/result files, span traces, tool metrics, usage records, query recordings,
+      profile reports and the serve event queue live under .issuelab/; keep them per-test.
+    """
+    monkeypatch.setenv("ISSUELAB_LINK_CHECK", "0")
+    monkeypatch.setenv("ISSUELAB_RUN_STATS_FILE", str(tmp_path / "run_stats.json"))
+    monkeypatch.setenv("ISSUELAB_SINGLEFLIGHT_DIR", str(tmp_path / "singleflight"))
+    monkeypatch.setenv("ISSUELAB_TRACE_DIR", str(tmp_path / "traces"))
+    monkeypatch.setenv("ISSUELAB_TOOL_METRICS_FILE", str(tmp_path / "tool_metrics.prom"))
+    monkeypatch.setenv("ISSUELAB_USAGE_FILE", str(tmp_path / "usage.jsonl"))
+    monkeypatch.setenv("ISSUELAB_REPLAY_DIR", str(tmp_path / "recordings"))
+    monkeypatch.setenv("ISSUELAB_PROFILE_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setenv("ISSUELAB_QUEUE_DB", str(tmp_path / "queue.db"))
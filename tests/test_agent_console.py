@@ -0,0 +1,77 @@
+"""Tests for per-agent buffered terminal output."""
+
+import io
+
+import pytest
+
+
+@pytest.fixture
+def console_state(monkeypatch):
+    from issuelab.agents import console
+
+    monkeypatch.setattr(console, "_last_label", None)
+    monkeypatch.setattr(console, "_line_open", False)
+    return console
+
+
+def test_parallel_agents_flush_as_labeled_blocks(console_state):
+    stream = io.StringIO()
+    alice = console_state.AgentConsole("alice", stream=stream)
+    bob = console_state.AgentConsole("bob", stream=stream)
+
+    alice.write("Hel")
+    bob.write("Other ")
+    alice.write("lo")
+    assert stream.getvalue() == ""
+
+    alice.flush()
+    bob.write("agent\n")
+    bob.flush()
+    alice.write(" again")
+    alice.flush()
+
+    assert stream.getvalue() == ("──── [alice] ────\nHello\n──── [bob] ────\nOther agent\n──── [alice] ────\n again")
+
+
+def test_output_modes_and_buffer_limit(console_state, monkeypatch):
+    stream = io.StringIO()
+    agent = console_state.AgentConsole("alice", stream=stream, max_buffer_chars=4)
+
+    agent.write("abcd")
+    assert stream.getvalue().endswith("abcd")
+
+    monkeypatch.setenv("ISSUELAB_AGENT_OUTPUT", "stream")
+    agent.write("e")
+    assert stream.getvalue().endswith("abcde")
+
+    monkeypatch.setenv("ISSUELAB_AGENT_OUTPUT", "off")
+    agent.write("ignored")
+    agent.flush()
+    assert "ignored" not in stream.getvalue()
+
+
+def test_run_consoles_are_isolated_and_flushed_on_error(console_state, capsys):
+    with console_state.agent_console("alice") as first:
+        with console_state.agent_console("alice") as second:
+            assert console_state.current_agent_console() is second
+            first.write("one")
+            second.write("two")
+            assert first.label == "alice"
+            assert second.label == "alice#2"
+        assert console_state.current_agent_console() is first
+        assert capsys.readouterr().err == "──── [alice#2] ────\ntwo"
+
+    with pytest.raises(RuntimeError), console_state.agent_console("bob") as console:
+        console.write("partial")
+        raise RuntimeError("boom")
+
+    assert capsys.readouterr().err == "\n──── [alice] ────\none\n──── [bob] ────\npartial"
+    assert console_state.current_agent_console() is None
+    assert console_state._consoles == []
+
+
+def test_flush_all_writes_unfinished_runs(console_state, capsys):
+    with console_state.agent_console("alice") as console:
+        console.write("pending")
+        console_state.flush_all()
+        assert capsys.readouterr().err == "──── [alice] ────\npending"
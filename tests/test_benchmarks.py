@@ -0,0 +1,132 @@
+"""Tests for the offline benchmark harness (fake servers and gh shim)."""
+
+import json
+import os
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+SHIM_DIR = Path(__file__).resolve().parent.parent / "benchmarks" / "bin"
+
+
+@pytest.fixture
+def fake_github(monkeypatch):
+    from benchmarks.fake_github import FakeGitHubServer
+
+    with FakeGitHubServer() as server:
+        monkeypatch.setenv("ISSUELAB_BENCH_GITHUB_URL", server.url)
+        monkeypatch.setenv("GITHUB_API_URL", server.url)
+        monkeypatch.setenv("GITHUB_REPOSITORY", "bench/IssueLab")
+        monkeypatch.setenv("PATH", f"{SHIM_DIR}{os.pathsep}{os.environ.get('PATH', '')}")
+        yield server
+
+
+def test_gh_shim_serves_issue_commands(fake_github):
+    from issuelab.personal_scan import check_already_commented
+    from issuelab.tools.github import edit_comment, get_issue_info, post_comment, update_label
+
+    info = get_issue_info(7, format_comments=True)
+    assert info["title"] == "Benchmark issue #7"
+    assert info["comment_count"] == 3
+    assert "bench-user-0" in info["comments"]
+
+    assert post_comment(7, "hello") is True
+    assert check_already_commented(7, "bench/IssueLab", "issuelab-bench[bot]") is True
+    assert check_already_commented(7, "bench/IssueLab", "nobody") is False
+    assert update_label(7, "state:done") is True
+
+    comment_id = fake_github.comments("bench/IssueLab", 7)[-1]["id"]
+    assert edit_comment(comment_id, "edited") is True
+    assert fake_github.comments("bench/IssueLab", 7)[-1]["body"] == "edited"
+
+
+def test_fake_github_rate_limit_fails_gh_calls(monkeypatch):
+    import subprocess
+
+    from benchmarks.fake_github import FakeGitHubServer
+    from benchmarks.fake_server import Limits
+
+    with FakeGitHubServer(limits=Limits(rate_limit=2)) as server:
+        monkeypatch.setenv("ISSUELAB_BENCH_GITHUB_URL", server.url)
+        gh = [str(SHIM_DIR / "gh"), "issue", "view", "--json", "title"]
+        assert subprocess.run([*gh[:3], "1", *gh[3:]], capture_output=True, text=True).returncode == 0
+
+        limited = subprocess.run([*gh[:3], "2", *gh[3:]], capture_output=True, text=True)
+
+        assert limited.returncode == 1
+        assert "HTTP 403: API rate limit exceeded" in limited.stderr
+        assert server.snapshot()["rate_limited"] == 1
+
+
+def test_dispatch_mentions_uses_github_api_url(fake_github, tmp_path):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    from issuelab.cli.dispatch import dispatch_mentions
+
+    for i, mode in enumerate(("repository_dispatch", "workflow_dispatch")):
+        user_dir = tmp_path / f"user{i}"
+        user_dir.mkdir()
+        (user_dir / "agent.yml").write_text(
+            f"owner: user{i}\nrepository: user{i}/IssueLab\nenabled: true\ndispatch_mode: {mode}\n", encoding="utf-8"
+        )
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+
+    result = dispatch_mentions(
+        mentions=["user0", "user1"],
+        agents_dir=tmp_path,
+        source_repo="bench/IssueLab",
+        issue_number=3,
+        app_id="1",
+        app_private_key=key.decode(),
+    )
+
+    assert result["success_count"] == 2
+    assert sorted((item["repo"], item["kind"]) for item in fake_github.dispatches) == [
+        ("user0/IssueLab", "repository_dispatch"),
+        ("user1/IssueLab", "workflow_dispatch"),
+    ]
+
+
+def _post(url: str, payload: dict):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode(), method="POST", headers={"content-type": "application/json"}
+    )
+    return urllib.request.urlopen(request, timeout=10)
+
+
+def test_fake_anthropic_streams_sse_and_enforces_concurrency():
+    from benchmarks.fake_anthropic import FakeAnthropicServer, StreamProfile
+    from benchmarks.fake_server import Limits
+
+    profile = StreamProfile(first_token_latency=0.0, chunk_delay=0.0, chunks=3, text="abcdef")
+    with FakeAnthropicServer(profile=profile) as server:
+        with _post(f"{server.url}/v1/messages?beta=true", {"model": "m", "stream": True}) as response:
+            lines = response.read().decode().splitlines()
+        events = [line.split(": ", 1)[1] for line in lines if line.startswith("event: ")]
+        deltas = [json.loads(line[6:])["delta"] for line in lines if '"content_block_delta"' in line]
+        assert events[0] == "message_start" and events[-1] == "message_stop"
+        assert "".join(delta["text"] for delta in deltas) == "abcdef"
+
+    with FakeAnthropicServer(profile=profile, limits=Limits(max_concurrency=1)) as server:
+        server._limiter.acquire()  # 占满唯一的并发槽位
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            _post(f"{server.url}/v1/messages", {"model": "m"})
+        assert excinfo.value.code == 429
+        assert excinfo.value.headers["retry-after"] == "1"
+
+
+def test_compare_to_baseline_flags_regressions():
+    from benchmarks.run import compare_to_baseline
+
+    baseline = [{"scenario": "agents", "agents": 1, "issues": 4, "issues_per_min": 20.0, "p50_seconds": 2.0}]
+    rows = [{"scenario": "agents", "agents": 1, "issues": 4, "issues_per_min": 15.0, "p50_seconds": 2.1}]
+
+    regressions = compare_to_baseline(rows, baseline, tolerance=0.2)
+
+    assert len(regressions) == 1
+    assert "issues_per_min" in regressions[0]
@@ -0,0 +1,71 @@
+"""Tests for the wave budget ledger."""
+
+import anyio
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_wave_budget_cancels_running_siblings_and_skips_downstream(monkeypatch):
+    from issuelab.agents import executor as ex
+
+    monkeypatch.setenv("ISSUELAB_WAVE_BUDGET_USD", "1.0")
+    started: list[str] = []
+
+    async def fake_query(prompt: str, agent_name: str):
+        started.append(agent_name)
+        ledger = ex.current_budget_ledger.get()
+        if agent_name == "moderator":
+            await anyio.sleep(0.01)
+            ledger.charge(agent_name, 1.5)
+            return {"ok": True, "response": "[Agent: moderator] ok", "cost_usd": 1.5}
+        ledger.charge(agent_name, 0.2)
+        await anyio.sleep(5)
+        return {"ok": True, "response": "never", "cost_usd": 0.2}
+
+    async def fake_run_single_agent(prompt: str, agent_name: str, *, stage_name: str | None = None, on_text=None):
+        ledger = ex.current_budget_ledger.get()
+        if ledger is not None and ledger.exceeded:
+            return ledger.failure_result(agent_name)
+        return await fake_query(prompt, agent_name)
+
+    monkeypatch.setattr(ex, "run_single_agent", fake_run_single_agent)
+
+    with anyio.fail_after(3):
+        results = await ex.run_agents_pipeline(
+            1, {"moderator": [], "reviewer_a": [], "summarizer": ["moderator", "reviewer_a"]}, "ctx"
+        )
+
+    assert results["moderator"]["ok"] is True
+    assert results["reviewer_a"]["error_type"] == "budget"
+    assert results["reviewer_a"]["cost_usd"] == pytest.approx(0.2)
+    assert results["summarizer"]["error_type"] == "budget"
+    assert "summarizer" not in started
+
+
+def test_budget_ledger_is_unlimited_by_default(monkeypatch):
+    from issuelab.agents.budget import BudgetLedger, get_wave_budget_usd
+
+    monkeypatch.delenv("ISSUELAB_WAVE_BUDGET_USD", raising=False)
+    assert get_wave_budget_usd() is None
+    ledger = BudgetLedger(get_wave_budget_usd())
+    ledger.charge("a", 100.0)
+    assert ledger.exceeded is False
+    assert ledger.spent_by_agent == {"a": 100.0}
+
+
+@pytest.mark.asyncio
+async def test_run_single_agent_short_circuits_when_budget_exhausted():
+    from issuelab.agents.budget import BudgetLedger, current_budget_ledger
+    from issuelab.agents.executor import run_single_agent
+
+    ledger = BudgetLedger(0.5)
+    ledger.charge("other", 1.0)
+    token = current_budget_ledger.set(ledger)
+    try:
+        result = await run_single_agent("prompt", "test_agent", stage_name="Analyst")
+    finally:
+        current_budget_ledger.reset(token)
+
+    assert result["ok"] is False
+    assert result["error_type"] == "budget"
+    assert result["stage"] == "Analyst"
@@ -87,3 +87,61 @@ def test_personal_reply_minimal_path_without_config_parse(monkeypatch):
     # personal-reply should not parse agent.yml content.
     assert calls["safe_load"] == 0
     assert calls["run"] == 1
+
+
+def test_core_handle_review_uses_pipeline_dependencies(monkeypatch):
+    from issuelab.commands import core
+
+    called = {}
+
+    def fake_runner(issue, agents, context, comment_count, *, post=False, dependencies=None, **kwargs):
+        called["agents"] = agents
+        called["dependencies"] = dependencies
+        return {}
+
+    monkeypatch.delenv("ISSUELAB_REVIEW_PIPELINE", raising=False)
+    monkeypatch.setattr(core, "run_agents_command", fake_runner)
+    core.handle_review(Namespace(issue=1, post=False), "ctx", 0)
+
+    assert called["agents"] == ["moderator", "reviewer_a", "reviewer_b", "summarizer"]
+    assert called["dependencies"]["summarizer"] == ["moderator", "reviewer_a", "reviewer_b"]
+
+    monkeypatch.setenv("ISSUELAB_REVIEW_PIPELINE", "0")
+    core.handle_review(Namespace(issue=1, post=False), "ctx", 0)
+    assert called["dependencies"] is None
+
+
+def test_common_run_agents_command_posts_results_as_completed(monkeypatch):
+    import asyncio
+
+    from issuelab.commands import common
+
+    events: list[str] = []
+
+    async def fake_run_agents_parallel(
+        issue, agents, context, comment_count, available_agents=None, trigger_comment=None, on_result=None, on_text=None
+    ):
+        fast = {"ok": True, "response": "[Agent: fast] ok"}
+        await on_result("fast", fast)
+        # 让发布队列有机会在慢 agent 完成前处理快 agent 的结果
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if "post:fast" in events:
+                break
+        events.append("slow-finished")
+        slow = {"ok": True, "response": "[Agent: slow] ok"}
+        await on_result("slow", slow)
+        return {"fast": fast, "slow": slow}
+
+    def fake_post(issue, body, agent_name=None, **kwargs):
+        events.append(f"post:{agent_name}")
+        return True
+
+    monkeypatch.delenv("ISSUELAB_POST_AS_COMPLETED", raising=False)
+    monkeypatch.setattr(common, "run_agents_parallel", fake_run_agents_parallel)
+    monkeypatch.setattr(common, "post_comment", fake_post)
+
+    results = common.run_agents_command(1, ["fast", "slow"], "ctx", 0, post=True)
+
+    assert set(results) == {"fast", "slow"}
+    assert events == ["post:fast", "slow-finished", "post:slow"]
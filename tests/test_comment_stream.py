@@ -0,0 +1,108 @@
+"""Tests for streaming comment publishing."""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_streaming_publisher_creates_placeholder_and_throttles_edits(monkeypatch):
+    from issuelab.tools import comment_stream
+
+    created: list[str] = []
+    edits: list[str] = []
+
+    def fake_create(issue_number, body, repo=None):
+        created.append(body)
+        return 42
+
+    def fake_edit(comment_id, body, repo=None):
+        edits.append(body)
+        return True
+
+    monkeypatch.setattr(comment_stream, "create_comment", fake_create)
+    monkeypatch.setattr(comment_stream, "edit_comment", fake_edit)
+
+    publisher = comment_stream.StreamingCommentPublisher(1, "gqy20", interval_seconds=3600, min_chars=10)
+    await publisher.update("")
+    await publisher.update("short")
+    await publisher.close()
+    await publisher.update("a much longer chunk of text @alice")
+    await publisher.close()
+
+    assert publisher.comment_id == 42
+    assert len(created) == 1 and "[Agent: gqy20]" in created[0]
+    # 未达到字符阈值的更新被节流，只发生一次编辑；中间版本不保留 @mentions
+    assert len(edits) == 1
+    assert "much longer chunk" in edits[0]
+    assert "@alice" not in edits[0]
+
+
+@pytest.mark.asyncio
+async def test_streaming_publisher_discard_deletes_placeholder(monkeypatch):
+    from issuelab.tools import comment_stream
+
+    deleted: list[int] = []
+    monkeypatch.setattr(comment_stream, "create_comment", lambda *a, **k: 7)
+    monkeypatch.setattr(
+        comment_stream, "delete_comment", lambda comment_id, repo=None: deleted.append(comment_id) or True
+    )
+
+    publisher = comment_stream.StreamingCommentPublisher(1, "moderator")
+    await publisher.update("")
+    await publisher.discard()
+
+    assert deleted == [7]
+    assert publisher.comment_id is None
+
+
+def test_post_comment_with_comment_id_edits_in_place(monkeypatch):
+    from issuelab.tools import github
+
+    captured = {}
+
+    def fake_run(cmd, capture_output, text, env):
+        captured["cmd"] = cmd
+        input_path = cmd[cmd.index("--input") + 1]
+        with open(input_path, encoding="utf-8") as f:
+            captured["payload"] = json.load(f)
+        return MagicMock(returncode=0, stdout="{}")
+
+    monkeypatch.setattr("issuelab.tools.github.subprocess.run", fake_run)
+
+    assert github.post_comment(3, "最终结论", comment_id=99, repo="owner/repo") is True
+    assert captured["cmd"][:5] == ["gh", "api", "--method", "PATCH", "repos/owner/repo/issues/comments/99"]
+    assert captured["payload"]["body"] == "最终结论"
+
+
+@pytest.mark.asyncio
+async def test_run_single_agent_streams_accumulated_text():
+    from unittest.mock import patch
+
+    from claude_agent_sdk import AssistantMessage, ResultMessage
+    from claude_agent_sdk.types import TextBlock
+
+    from issuelab.agents.executor import run_single_agent
+
+    async def mock_query(*args, **kwargs):
+        for text in ["Hello", "World"]:
+            msg = MagicMock(spec=AssistantMessage)
+            msg.content = [TextBlock(text=text)]
+            yield msg
+        result = MagicMock(spec=ResultMessage)
+        result.total_cost_usd = 0.0
+        result.num_turns = 1
+        result.session_id = "s"
+        result.usage = {}
+        yield result
+
+    seen: list[str] = []
+
+    async def on_text(text: str) -> None:
+        seen.append(text)
+
+    with patch("issuelab.agents.executor.query", mock_query):
+        await run_single_agent("prompt", "test_agent", on_text=on_text)
+
+    assert seen == ["", "Hello", "Hello\nWorld"]
@@ -0,0 +1,85 @@
+"""Tests for token-budgeted issue context packing."""
+
+
+def _comment(author: str, body: str, day: int = 1) -> dict:
+    return {"author": {"login": author}, "createdAt": f"2026-01-{day:02d}T00:00:00Z", "body": body}
+
+
+def test_pack_issue_comments_keeps_everything_under_budget():
+    from issuelab.context_builder import pack_issue_comments
+    from issuelab.tools.github import format_issue_comment
+
+    comments = [_comment("alice", "first"), _comment("bob", "second")]
+    packed = pack_issue_comments("title", "body", comments, token_budget=10_000)
+
+    assert packed.omitted == 0
+    assert packed.text == "\n\n".join(format_issue_comment(c) for c in comments)
+
+
+def test_pack_issue_comments_respects_budget_and_keeps_trigger():
+    from issuelab.context_builder import estimate_tokens, pack_issue_comments
+
+    filler = "unrelated discussion about lunch plans " * 40
+    comments = [_comment(f"user{i}", filler, day=i + 1) for i in range(30)]
+    comments[3] = _comment("carol", "The tokenizer benchmark regressed on long inputs " * 5, day=4)
+    comments[10] = _comment("dave", "@gqy20 please check the tokenizer benchmark", day=11)
+
+    packed = pack_issue_comments(
+        "Tokenizer benchmark regression",
+        "body",
+        comments,
+        trigger_comment="@gqy20 please check the tokenizer benchmark",
+        token_budget=1500,
+    )
+
+    assert packed.estimated_tokens <= 1500
+    assert (
+        estimate_tokens("Tokenizer benchmark regression") + estimate_tokens("body") + estimate_tokens(packed.text)
+        == packed.estimated_tokens
+    )
+    assert 10 in packed.kept_indices  # trigger comment
+    assert 3 in packed.kept_indices  # lexically relevant
+    assert packed.omitted > 0
+    assert "已折叠" in packed.text
+
+
+def test_bm25_prefers_matching_document():
+    from issuelab.context_builder import bm25_scores
+
+    scores = bm25_scores("上下文 预算", ["今天天气不错", "上下文预算需要控制", "随便聊聊"])
+    assert scores.index(max(scores)) == 1
+
+
+def test_comments_for_context_falls_back_to_formatted_text():
+    from issuelab.context_builder import comments_for_context
+
+    assert comments_for_context({"comments": "- **[a]** (x):\nhi"}) == "- **[a]** (x):\nhi"
+
+
+def test_build_issue_context_reference_inlines_small_context(tmp_path):
+    from issuelab.context_builder import INLINED_CONTEXT_MARKER, build_issue_context_reference
+
+    issue_file = tmp_path / "issue_1.md"
+    issue_file.write_text("# Issue #1: 标题\n\n正文内容", encoding="utf-8")
+
+    context, inlined = build_issue_context_reference(str(issue_file), max_chars=1000)
+
+    assert inlined is True
+    assert context.startswith(INLINED_CONTEXT_MARKER)
+    assert "正文内容" in context
+    assert "请使用 Read 工具读取该文件后再进行分析" not in context
+
+
+def test_build_issue_context_reference_falls_back_to_file_for_large_or_missing(tmp_path, monkeypatch):
+    from issuelab.context_builder import build_issue_context_reference, read_inlinable_context
+
+    issue_file = tmp_path / "issue_2.md"
+    issue_file.write_text("x" * 200, encoding="utf-8")
+
+    context, inlined = build_issue_context_reference(str(issue_file), max_chars=100)
+    assert inlined is False
+    assert str(issue_file) in context and "Read 工具" in context
+
+    monkeypatch.setenv("ISSUELAB_INLINE_CONTEXT_MAX_CHARS", "0")
+    assert build_issue_context_reference(str(issue_file))[1] is False
+    assert read_inlinable_context(str(tmp_path / "missing.md"), max_chars=1000) is None
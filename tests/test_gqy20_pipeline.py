@@ -251,3 +251,191 @@ confidence: "medium"
     judge_call = next(item for item in calls if "当前阶段：Judge" in str(item["prompt"]))
     assert judge_call["stage_name"] is None
     assert "最终输出必须是 Markdown" in str(judge_call["prompt"])
+
+
+def test_build_stage_digest_extracts_claims_verdicts_and_urls():
+    from issuelab.agents.stage_digest import build_stage_digest
+
+    text = """分析如下
+```yaml
+summary: "核验完成"
+verified_sources:
+  - url: "https://example.com/a"
+    status: "verified"
+    supports:
+      - "结论 A"
+verification_gaps:
+  - "缺少 2024 年数据"
+confidence: "medium"
+```"""
+    digest = build_stage_digest(text)
+
+    assert digest is not None
+    assert digest["summary"] == "核验完成"
+    assert digest["verdicts"] == ["https://example.com/a: verified（结论 A）"]
+    assert digest["open_questions"] == ["缺少 2024 年数据"]
+    assert digest["urls"] == ["https://example.com/a"]
+    assert build_stage_digest("no yaml here") is None
+
+
+def test_format_stage_handoff_compresses_and_references_full_output(tmp_path, monkeypatch):
+    from issuelab.agents.stage_digest import format_stage_handoff
+
+    monkeypatch.chdir(tmp_path)
+    long_source = "x" * 2000
+    text = f"""Researcher 的详细推理过程：{"y" * 2000}
+```yaml
+summary: "r"
+evidence:
+  - claim: "key claim"
+    source: "{long_source}"
+    url: "https://example.com/e"
+    confidence: "high"
+open_questions: []
+```"""
+    monkeypatch.setenv("ISSUELAB_STAGE_DIGEST", "1")
+    handoff = format_stage_handoff(7, "Researcher", text)
+
+    full_path = tmp_path / ".issuelab" / "stages" / "issue_7" / "researcher.md"
+    assert full_path.read_text(encoding="utf-8") == text
+    assert str(full_path) in handoff
+    assert "key claim <https://example.com/e> [high]" in handoff
+    assert len(handoff) < len(text)
+
+    monkeypatch.setenv("ISSUELAB_STAGE_DIGEST", "0")
+    assert format_stage_handoff(7, "Researcher", text) == f"### Researcher 输出\n{text}"
+
+
+@pytest.mark.asyncio
+async def test_gqy20_multistage_skips_middle_stages_for_confident_research(tmp_path, monkeypatch):
+    from issuelab.agents import executor as ex
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("ISSUELAB_GQY20_ADAPTIVE", raising=False)
+    stage_names: list[str] = []
+
+    async def fake_run_single_agent(prompt: str, agent_name: str, *, stage_name: str | None = None):
+        stage_names.append(stage_name or "Judge")
+        if stage_name == "Researcher":
+            response = """```yaml
+summary: "r"
+evidence:
+  - claim: "c1"
+    url: "https://example.com/1"
+  - claim: "c2"
+    url: "https://example.com/2"
+open_questions: []
+confidence: "high"
+```"""
+        else:
+            response = "[Agent: gqy20]\n\n## Sources\n- https://example.com/1"
+        return {"ok": True, "response": response, "cost_usd": 0.01, "num_turns": 1}
+
+    monkeypatch.setattr(ex, "run_single_agent", fake_run_single_agent)
+    result = await ex._run_gqy20_multistage("agent prompt", 1, "short issue")
+
+    assert result["ok"] is True
+    assert stage_names == ["Researcher", "Judge"]
+    assert set(result["skipped_stages"]) == {"Analyst", "Critic", "Verifier"}
+    assert result["stages"]["Critic"].startswith("[skipped]")
+
+
+def test_plan_gqy20_stage_depth_policy(monkeypatch):
+    from issuelab.agents.executor import _plan_gqy20_stage_depth
+
+    def research(confidence: str, urls: int, questions: int = 0) -> str:
+        evidence = "".join(f'\n  - claim: "c{i}"\n    url: "https://example.com/{i}"' for i in range(urls))
+        open_questions = "".join(f'\n  - "q{i}"' for i in range(questions)) or " []"
+        return f'```yaml\nevidence:{evidence}\nopen_questions:{open_questions}\nconfidence: "{confidence}"\n```'
+
+    monkeypatch.delenv("ISSUELAB_GQY20_ADAPTIVE", raising=False)
+    assert _plan_gqy20_stage_depth(research("high", 2), "ctx")[0] == ["Analyst", "Critic", "Verifier"]
+    assert _plan_gqy20_stage_depth(research("high", 2), "x" * 10000)[0] == ["Critic"]
+    assert _plan_gqy20_stage_depth(research("high", 3, questions=3), "ctx")[0] == ["Critic"]
+    assert _plan_gqy20_stage_depth(research("medium", 5), "ctx")[0] == []
+
+    monkeypatch.setenv("ISSUELAB_GQY20_ADAPTIVE", "0")
+    assert _plan_gqy20_stage_depth(research("high", 2), "ctx") == ([], "")
+
+
+def test_plan_gqy20_stage_depth_malformed_yaml_does_not_skip(monkeypatch):
+    from issuelab.agents.executor import _plan_gqy20_stage_depth
+
+    monkeypatch.delenv("ISSUELAB_GQY20_ADAPTIVE", raising=False)
+    evidence = 'evidence:\n  - url: "https://example.com/1"\n  - url: "https://example.com/2"\n  - "plain string"'
+    for open_questions in ("2", '"a"', "{q: 1}"):
+        text = f'```yaml\n{evidence}\nopen_questions: {open_questions}\nconfidence: "high"\n```'
+        assert _plan_gqy20_stage_depth(text, "ctx") == ([], "")
+    assert _plan_gqy20_stage_depth('```yaml\nevidence: 3\nconfidence: "high"\n```', "ctx") == ([], "")
+    assert _plan_gqy20_stage_depth("```yaml\n- just\n- a list\n```", "ctx") == ([], "")
+
+
+@pytest.mark.asyncio
+async def test_gqy20_multistage_tiers_models_per_stage(tmp_path, monkeypatch):
+    from issuelab.agents import executor as ex
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ANTHROPIC_MODEL", "strong-model")
+    monkeypatch.setenv("ANTHROPIC_FAST_MODEL", "fast-model")
+    monkeypatch.setenv("ISSUELAB_GQY20_ADAPTIVE", "0")
+    models: dict[str, str | None] = {}
+
+    async def fake_run_single_agent(prompt: str, agent_name: str, *, stage_name: str | None = None, model=None):
+        name = stage_name or "Judge"
+        models[name] = model
+        if name == "Researcher":
+            response = '```yaml\nevidence:\n  - claim: "c"\n    url: "https://example.com/1"\n```'
+        else:
+            response = "[Agent: gqy20]\n\n## Sources\n- https://example.com/1"
+        return {
+            "ok": True,
+            "response": response,
+            "cost_usd": 0.01,
+            "num_turns": 2,
+            "input_tokens": 100,
+            "output_tokens": 20,
+            "total_tokens": 120,
+            "cache_read_input_tokens": 50,
+            "cache_creation_input_tokens": 10,
+            "model": model or "strong-model",
+        }
+
+    monkeypatch.setattr(ex, "run_single_agent", fake_run_single_agent)
+    result = await ex._run_gqy20_multistage("agent prompt", 1, "ctx")
+
+    assert models == {
+        "Researcher": "fast-model",
+        "Analyst": None,
+        "Critic": "fast-model",
+        "Verifier": None,
+        "Judge": None,
+    }
+    assert result["stage_usage"]["Researcher"]["model"] == "fast-model"
+    assert result["stage_usage"]["Judge"] == {
+        "model": "strong-model",
+        "runs": 1,
+        "cost_usd": 0.01,
+        "num_turns": 2,
+        "input_tokens": 100,
+        "output_tokens": 20,
+        "total_tokens": 120,
+        "cache_read_input_tokens": 50,
+        "cache_creation_input_tokens": 10,
+    }
+    # 各阶段用量之和与运行总量一致
+    for key in ("num_turns", "total_tokens", "cache_read_input_tokens", "cache_creation_input_tokens"):
+        assert sum(usage[key] for usage in result["stage_usage"].values()) == result[key]
+
+
+def test_get_stage_run_overrides_reads_agent_stage_config(monkeypatch):
+    from issuelab.agents import options
+
+    monkeypatch.delenv("ANTHROPIC_FAST_MODEL", raising=False)
+    monkeypatch.setattr(
+        options,
+        "get_agent_config",
+        lambda *args, **kwargs: {"stage_overrides": {"Judge": {"model": "judge-model", "max_turns": "12"}}},
+    )
+
+    assert options.get_stage_run_overrides("gqy20", "Judge") == {"model": "judge-model", "max_turns": 12}
+    assert options.get_stage_run_overrides("gqy20", "Researcher") == {}
@@ -0,0 +1,112 @@
+"""Tests for hedged agent attempts on stalled streams."""
+
+from unittest.mock import MagicMock, patch
+
+import anyio
+import pytest
+
+
+def _result_message(cost: float) -> MagicMock:
+    from claude_agent_sdk import ResultMessage
+
+    result = MagicMock(spec=ResultMessage)
+    result.total_cost_usd = cost
+    result.num_turns = 1
+    result.session_id = "s"
+    result.usage = {"output_tokens": 3}
+    return result
+
+
+def _text_message(text: str) -> MagicMock:
+    from claude_agent_sdk import AssistantMessage
+    from claude_agent_sdk.types import TextBlock
+
+    msg = MagicMock(spec=AssistantMessage)
+    msg.content = [TextBlock(text=text)]
+    return msg
+
+
+@pytest.mark.asyncio
+async def test_stalled_primary_is_hedged_and_hedge_wins(monkeypatch):
+    from issuelab.agents.executor import run_single_agent
+
+    monkeypatch.setenv("ISSUELAB_HEDGE_STALL_SECONDS", "0.2")
+    calls = {"count": 0}
+
+    async def mock_query(*args, **kwargs):
+        calls["count"] += 1
+        if calls["count"] == 1:
+            await anyio.sleep(30)  # 主尝试卡住，没有任何流式消息
+        yield _text_message("hedged answer")
+        yield _result_message(0.02)
+
+    with patch("issuelab.agents.executor.query", mock_query):
+        with anyio.fail_after(5):
+            info = await run_single_agent("prompt", "test_agent")
+
+    assert info["ok"] is True
+    assert info["response"] == "hedged answer"
+    assert info["text_blocks"] == ["hedged answer"]
+    assert info["hedge"]["winner"] == "hedge"
+    # 主尝试被取消、没有 ResultMessage：额外成本按 prompt 估算，而不是记为 0
+    assert info["hedge"]["extra_cost_estimated"] is True
+    assert info["hedge"]["extra_cost_usd"] > 0
+    assert info["cost_usd"] == pytest.approx(0.02 + info["hedge"]["extra_cost_usd"])
+    assert calls["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_hedge_loser_cost_is_estimated_and_charged(monkeypatch):
+    from issuelab.agents.budget import BudgetLedger, current_budget_ledger
+    from issuelab.agents.executor import run_single_agent
+
+    monkeypatch.setenv("ISSUELAB_HEDGE_STALL_SECONDS", "0.2")
+    calls = {"count": 0}
+
+    async def mock_query(*args, **kwargs):
+        calls["count"] += 1
+        if calls["count"] == 1:
+            msg = _text_message("partial")
+            msg.usage = {"input_tokens": 2000, "output_tokens": 100}
+            msg.message_id = "m1"
+            yield msg
+            await anyio.sleep(30)  # 输出一段后卡住
+        yield _text_message("hedged answer")
+        yield _result_message(0.02)
+
+    ledger = BudgetLedger(cap_usd=10.0)
+    token = current_budget_ledger.set(ledger)
+    try:
+        with patch("issuelab.agents.executor.query", mock_query):
+            with anyio.fail_after(5):
+                info = await run_single_agent("prompt", "test_agent")
+    finally:
+        current_budget_ledger.reset(token)
+
+    extra = (2000 * 3 + 100 * 15) / 1_000_000
+    assert info["hedge"]["extra_cost_usd"] == pytest.approx(extra)
+    assert info["hedge"]["extra_output_tokens"] == 100
+    assert info["cost_estimated"] is True
+    assert "_streamed_usage" not in info
+    assert ledger.spent_by_agent["test_agent"] == pytest.approx(0.02 + extra)
+
+
+@pytest.mark.asyncio
+async def test_hedging_is_off_by_default(monkeypatch):
+    from issuelab.agents.executor import run_single_agent
+
+    monkeypatch.delenv("ISSUELAB_HEDGE_STALL_SECONDS", raising=False)
+    calls = {"count": 0}
+
+    async def mock_query(*args, **kwargs):
+        calls["count"] += 1
+        await anyio.sleep(0.3)
+        yield _text_message("answer")
+        yield _result_message(0.01)
+
+    with patch("issuelab.agents.executor.query", mock_query):
+        info = await run_single_agent("prompt", "test_agent")
+
+    assert info["response"] == "answer"
+    assert "hedge" not in info
+    assert calls["count"] == 1
@@ -0,0 +1,65 @@
+"""Import-time budget for entry points that run on every issue event.
+
+list-agents、mention 解析与分发脚本在 Actions 中每个事件都会冷启动一次，
+不应加载执行器 / SDK 等重依赖。预算按 `-X importtime` 统计的 issuelab 导入累计耗时计算，
+慢机器上可用 ISSUELAB_IMPORT_BUDGET_SCALE 放宽。
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+HEAVY_MODULES = ("claude_agent_sdk", "anyio", "mcp", "requests", "jwt", "cryptography")
+
+_IMPORT_LINE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \| (\S.*)$")
+
+
+def _run_entry_point(code: str) -> tuple[set[str], float]:
+    """在新解释器中执行 code，返回 (已加载的顶层包, issuelab 导入累计毫秒)"""
+    script = f"{code}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"
+    env = {**os.environ, "PYTHONPATH": str(SRC_DIR)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script], capture_output=True, text=True, env=env, check=True
+    )
+    modules = json.loads(result.stdout.strip().splitlines()[-1])
+    cumulative_us = 0
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        # 只累计由 issuelab 触发的顶层导入（不含解释器自身启动）
+        if match and match.group(2).startswith("issuelab"):
+            cumulative_us += int(match.group(1))
+    return {name.split(".")[0] for name in modules}, cumulative_us / 1000
+
+
+def _budget_ms(value: float) -> float:
+    return value * float(os.environ.get("ISSUELAB_IMPORT_BUDGET_SCALE", "1"))
+
+
+@pytest.mark.parametrize(
+    ("code", "budget_ms"),
+    [
+        pytest.param(
+            "import runpy, sys\nsys.argv = ['issuelab', 'list-agents']\nrunpy.run_module('issuelab', run_name='__main__')",
+            250,
+            id="list-agents",
+        ),
+        pytest.param(
+            "from issuelab.cli.mentions import parse_github_mentions\nparse_github_mentions('@alice hi @bob')",
+            60,
+            id="mentions",
+        ),
+        pytest.param("import issuelab.cli.dispatch", 200, id="dispatch"),
+    ],
+)
+def test_lightweight_entry_points_stay_within_import_budget(code, budget_ms):
+    loaded, import_ms = _run_entry_point(code)
+
+    assert not loaded & set(HEAVY_MODULES), f"加载了重依赖: {sorted(loaded & set(HEAVY_MODULES))}"
+    assert import_ms <= _budget_ms(budget_ms), f"导入耗时 {import_ms:.0f}ms 超出预算 {budget_ms}ms"
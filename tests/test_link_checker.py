@@ -0,0 +1,117 @@
+"""Tests for the local concurrent link checker."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+@pytest.fixture
+def link_server(monkeypatch):
+    # 测试服务器监听 127.0.0.1，默认会被非公网地址检查拦截
+    monkeypatch.setenv("ISSUELAB_LINK_CHECK_ALLOW_PRIVATE", "1")
+    hits: list[str] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def _respond(self) -> None:
+            hits.append(f"{self.command} {self.path}")
+            if self.path == "/moved":
+                self.send_response(301)
+                self.send_header("Location", "/ok")
+            elif self.path == "/to-loopback":
+                self.send_response(302)
+                self.send_header("Location", f"http://127.0.0.1:{self.server.server_address[1]}/ok")
+            elif self.path == "/no-head" and self.command == "HEAD":
+                self.send_response(405)
+            else:
+                self.send_response(200 if self.path in {"/ok", "/no-head"} else 404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        do_HEAD = _respond  # noqa: N815
+        do_GET = _respond  # noqa: N815
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", hits
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_check_links_classifies_and_caches(link_server, tmp_path):
+    from issuelab.tools.link_checker import check_links
+
+    base, hits = link_server
+    urls = [f"{base}/ok", f"{base}/missing", f"{base}/moved", f"{base}/no-head", f"{base}/ok", "http://127.0.0.1:9/x"]
+    cache_path = str(tmp_path / "cache.json")
+
+    statuses = await check_links(urls, concurrency=2, timeout=2, cache_path=cache_path, ttl_seconds=60)
+
+    by_url = {item.url: item for item in statuses}
+    assert len(statuses) == 5
+    assert by_url[f"{base}/ok"].status == "reachable"
+    assert by_url[f"{base}/missing"].status == "broken"
+    assert by_url[f"{base}/missing"].http_status == 404
+    assert by_url[f"{base}/moved"].final_url == f"{base}/ok"
+    assert by_url[f"{base}/no-head"].status == "reachable"
+    assert by_url["http://127.0.0.1:9/x"].status == "unreachable"
+
+    hit_count = len(hits)
+    cached = await check_links(urls[:4], cache_path=cache_path, ttl_seconds=60)
+    assert all(item.cached for item in cached)
+    assert len(hits) == hit_count
+
+
+def test_check_link_blocks_non_public_targets_and_redirects(link_server, monkeypatch):
+    from issuelab.tools import link_checker
+
+    base, hits = link_server
+    monkeypatch.setenv("ISSUELAB_LINK_CHECK_ALLOW_PRIVATE", "0")
+    for url in (f"{base}/ok", "http://169.254.169.254/latest/meta-data/", "http://[::1]/", "file:///etc/passwd"):
+        result = link_checker.check_link(url, timeout=2)
+        assert result.status == "unreachable" and result.error.startswith("blocked"), url
+    assert hits == []
+
+    # 公网地址重定向到内网时，在跟随重定向前拦截
+    monkeypatch.setattr(link_checker, "_host_is_public", lambda host: host == "localhost")
+    port = base.rsplit(":", 1)[1]
+    result = link_checker.check_link(f"http://localhost:{port}/to-loopback", timeout=2)
+    assert result.error == "blocked: non-public host"
+    assert all(hit.endswith("/to-loopback") for hit in hits)
+
+
+@pytest.mark.asyncio
+async def test_multistage_feeds_link_table_to_verifier(link_server, tmp_path, monkeypatch):
+    from issuelab.agents import executor as ex
+
+    base, _ = link_server
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ISSUELAB_LINK_CHECK", "1")
+    monkeypatch.setenv("ISSUELAB_GQY20_ADAPTIVE", "0")
+    prompts: dict[str, str] = {}
+
+    async def fake_run_single_agent(prompt: str, agent_name: str, *, stage_name: str | None = None):
+        name = stage_name or "Judge"
+        prompts[name] = prompt
+        if name == "Researcher":
+            response = (
+                f'```yaml\nevidence:\n  - claim: "c"\n    url: "{base}/ok"\n  - claim: "d"\n    url: "{base}/gone"\n```'
+            )
+        else:
+            response = f"[Agent: gqy20]\n\n## Sources\n- {base}/ok"
+        return {"ok": True, "response": response, "cost_usd": 0.0}
+
+    monkeypatch.setattr(ex, "run_single_agent", fake_run_single_agent)
+    result = await ex._run_gqy20_multistage("agent prompt", 1, "ctx")
+
+    assert "链接可达性检查" in prompts["Verifier"]
+    assert f"| {base}/gone | broken | 404 |" in prompts["Judge"]
+    assert "无需再用工具逐个访问链接" in prompts["Verifier"]
+    assert {item["status"] for item in result["link_checks"]} == {"reachable", "broken"}
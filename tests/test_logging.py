@@ -64,3 +64,41 @@ def test_multiple_setup_calls():
     # 级别应该被更新
     root_logger = logging.getLogger()
     assert root_logger.level == logging.DEBUG
+
+
+def test_async_logging_writes_through_queue():
+    """测试异步模式：日志经队列由后台线程写出，stop 后排空并恢复直接写入"""
+    from logging.handlers import QueueHandler
+
+    from issuelab.logging_config import stop_async_logging
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = Path(tmpdir) / "async.log"
+        logger = setup_logging(level="INFO", log_file=log_file, async_mode=True)
+        root_logger = logging.getLogger()
+        assert [type(handler) for handler in root_logger.handlers] == [QueueHandler]
+
+        logger.info("Queued message")
+        stop_async_logging()
+
+        assert "Queued message" in log_file.read_text()
+        assert not any(isinstance(handler, QueueHandler) for handler in root_logger.handlers)
+        setup_logging(level="INFO")
+
+
+def test_lazy_payload_only_built_when_emitted():
+    """测试 lazy 参数：日志级别未开启时不求值"""
+    from issuelab.logging_config import lazy
+
+    calls = []
+
+    def build_payload():
+        calls.append(1)
+        return "payload"
+
+    logger = setup_logging(level="INFO")
+    logger.debug("%s", lazy(build_payload))
+    assert calls == []
+
+    logger.info("%s", lazy(build_payload))
+    assert calls == [1]
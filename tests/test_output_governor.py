@@ -0,0 +1,99 @@
+"""Tests for the streaming output length governor."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _mock_query_factory(
+    prompts: list[str], produced: list[int], blocks: int = 10, size: int = 3000, usage: dict | None = None
+):
+    from claude_agent_sdk import AssistantMessage, ResultMessage
+    from claude_agent_sdk.types import TextBlock
+
+    async def mock_query(*args, **kwargs):
+        prompts.append(kwargs["prompt"])
+        for i in range(blocks):
+            produced.append(i)
+            msg = MagicMock(spec=AssistantMessage)
+            msg.content = [TextBlock(text=str(i) * size)]
+            msg.usage = usage
+            msg.message_id = f"msg_{i}"
+            yield msg
+        result = MagicMock(spec=ResultMessage)
+        result.total_cost_usd = 0.05
+        result.num_turns = blocks
+        result.session_id = "s"
+        result.usage = {}
+        yield result
+
+    return mock_query
+
+
+@pytest.mark.asyncio
+async def test_governor_announces_limit_and_stops_long_output(monkeypatch):
+    from issuelab.agents.executor import run_single_agent
+
+    monkeypatch.delenv("ISSUELAB_OUTPUT_GOVERNOR", raising=False)
+    prompts: list[str] = []
+    produced: list[int] = []
+
+    with patch("issuelab.agents.executor.query", _mock_query_factory(prompts, produced)):
+        info = await run_single_agent("prompt", "test_agent")
+
+    assert "输出长度上限：约 10000 字符" in prompts[0]
+    # 10000 × 1.2 = 12000：第 5 个 3000 字符块（累计 15000）后中止
+    assert len(produced) == 5
+    assert info["output_truncated"] is True
+    assert info["ok"] is True
+    # 收不到 ResultMessage：按已输出文本估算成本（15000 字符 ≈ 3750 输出 token × $15/MTok）
+    assert info["cost_estimated"] is True
+    assert info["output_tokens"] == 3750
+    assert info["cost_usd"] == pytest.approx(3750 * 15 / 1_000_000)
+    assert info["num_turns"] == 5
+
+
+@pytest.mark.asyncio
+async def test_governor_truncation_charges_estimated_cost_to_ledger_and_usage(monkeypatch):
+    from issuelab.agents.budget import BudgetLedger, current_budget_ledger
+    from issuelab.agents.executor import run_single_agent
+    from issuelab.agents.usage import get_usage_path, parse_usage_records
+
+    monkeypatch.delenv("ISSUELAB_OUTPUT_GOVERNOR", raising=False)
+    ledger = BudgetLedger(cap_usd=10.0)
+    token = current_budget_ledger.set(ledger)
+    usage = {"input_tokens": 1000, "output_tokens": 800, "cache_read_input_tokens": 10000}
+    try:
+        with patch("issuelab.agents.executor.query", _mock_query_factory([], [], usage=usage)):
+            info = await run_single_agent("prompt", "test_agent")
+    finally:
+        current_budget_ledger.reset(token)
+
+    # 5 条消息的流式用量累计：输入 5000 + 缓存读取 50000 × 0.1，输出 4000
+    expected = ((5000 + 5000) * 3 + 4000 * 15) / 1_000_000
+    assert info["cost_usd"] == pytest.approx(expected)
+    assert ledger.spent_by_agent["test_agent"] == pytest.approx(expected)
+    with open(get_usage_path(), encoding="utf-8") as f:
+        (record,) = parse_usage_records(f.read())
+    assert record["cost_estimated"] is True
+    assert record["cost_usd"] == pytest.approx(expected)
+
+
+@pytest.mark.asyncio
+async def test_governor_skips_intermediate_stages_and_can_be_disabled(monkeypatch):
+    from issuelab.agents.executor import run_single_agent
+
+    prompts: list[str] = []
+    produced: list[int] = []
+    with patch("issuelab.agents.executor.query", _mock_query_factory(prompts, produced)):
+        staged = await run_single_agent("prompt", "test_agent", stage_name="Researcher")
+    assert len(produced) == 10
+    assert "output_truncated" not in staged
+
+    monkeypatch.setenv("ISSUELAB_OUTPUT_GOVERNOR", "0")
+    prompts.clear()
+    produced.clear()
+    with patch("issuelab.agents.executor.query", _mock_query_factory(prompts, produced)):
+        await run_single_agent("prompt", "test_agent")
+    assert len(produced) == 10
+    assert "输出长度上限" not in prompts[0]
@@ -0,0 +1,75 @@
+"""Tests for the built-in --profile / ISSUELAB_PROFILE mode."""
+
+import asyncio
+import builtins
+import json
+import os
+import subprocess
+import sys
+
+
+def _only_report(tmp_path) -> tuple:
+    (report_dir,) = (tmp_path / "profiles").iterdir()
+    return report_dir, json.loads((report_dir / "report.json").read_text(encoding="utf-8"))
+
+
+def test_profile_session_records_imports_subprocesses_and_tasks(tmp_path, monkeypatch):
+    from issuelab.profiling import profile_session
+    from issuelab.tracing import span
+
+    (tmp_path / "profiled_fixture_module.py").write_text("VALUE = 1\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv("ISSUELAB_PROFILE_INTERVAL_MS", "2")
+    original_import = builtins.__import__
+    original_popen_init = subprocess.Popen.__init__
+
+    async def agent(name: str) -> None:
+        with span("agent.run", lane=name):
+            process = await asyncio.create_subprocess_exec(sys.executable, "-c", "import time; time.sleep(0.1)")
+            await process.wait()
+
+    with profile_session("unit", enabled=True):
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        import profiled_fixture_module  # noqa: F401
+
+        async def run_agents() -> None:
+            await asyncio.gather(agent("alice"), agent("bob"))
+
+        asyncio.run(run_agents())
+
+    assert builtins.__import__ is original_import
+    assert subprocess.Popen.__init__ is original_popen_init
+    report_dir, report = _only_report(tmp_path)
+    assert report_dir.name.endswith(f"-unit-{report['pid']}")
+    assert {"cpu.prof", "wall.folded", "report.txt"} <= {path.name for path in report_dir.iterdir()}
+
+    python = report["subprocess"][os.path.basename(sys.executable)]
+    assert python["count"] == 3 and python["pending"] == 0
+    assert python["max_seconds"] >= 0.1
+    assert "profiled_fixture_module" in {item["module"] for item in report["imports"]["modules"]}
+    assert report["sampling"]["samples"] > 0
+    if hasattr(asyncio.Task, "get_context"):
+        assert {"alice", "bob"} <= {lane["lane"] for lane in report["wall"]["tasks"]}
+
+
+def test_run_profiled_strips_flag_and_respects_env(tmp_path, monkeypatch):
+    from issuelab.profiling import run_profiled
+
+    monkeypatch.setattr(sys, "argv", ["script.py", "--json"])
+    assert run_profiled("script", lambda: sys.argv[1:]) == ["--json"]
+    assert not (tmp_path / "profiles").exists()
+
+    monkeypatch.setattr(sys, "argv", ["script.py", "--profile", "--json"])
+    assert run_profiled("script", lambda: sys.argv[1:]) == ["--json"]
+    _only_report(tmp_path)
+
+
+def test_main_profile_flag_profiles_the_subcommand(tmp_path, monkeypatch):
+    from issuelab.__main__ import main
+
+    monkeypatch.setattr(sys, "argv", ["issuelab", "--profile", "list-agents"])
+    main()
+
+    report_dir, report = _only_report(tmp_path)
+    assert report["name"] == "issuelab-list-agents"
+    assert "== CPU 热点" in (report_dir / "report.txt").read_text(encoding="utf-8")
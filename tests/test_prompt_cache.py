@@ -0,0 +1,83 @@
+"""Tests for cache-friendly prompt layout and cache token accounting."""
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_run_single_agent_records_cache_tokens():
+    from claude_agent_sdk import AssistantMessage, ResultMessage
+    from claude_agent_sdk.types import TextBlock
+
+    from issuelab.agents.executor import run_single_agent
+
+    async def mock_query(*args, **kwargs):
+        msg = MagicMock(spec=AssistantMessage)
+        msg.content = [TextBlock(text="ok")]
+        yield msg
+        result = MagicMock(spec=ResultMessage)
+        result.total_cost_usd = 0.01
+        result.num_turns = 1
+        result.session_id = "s"
+        result.usage = {
+            "input_tokens": 10,
+            "output_tokens": 5,
+            "cache_read_input_tokens": 900,
+            "cache_creation_input_tokens": 90,
+        }
+        yield result
+
+    with patch("issuelab.agents.executor.query", mock_query):
+        info = await run_single_agent("prompt", "test_agent")
+
+    assert info["cache_read_input_tokens"] == 900
+    assert info["cache_creation_input_tokens"] == 90
+    assert info["total_tokens"] == 15
+
+
+@pytest.mark.asyncio
+async def test_parallel_agents_share_prompt_prefix(monkeypatch):
+    from issuelab.agents import executor as ex
+
+    prompts: dict[str, str] = {}
+
+    async def fake_run_single_agent(prompt: str, agent_name: str, *, stage_name: str | None = None, on_text=None):
+        prompts[agent_name] = prompt
+        return {"ok": True, "response": f"[Agent: {agent_name}] ok", "cost_usd": 0.0}
+
+    monkeypatch.setattr(ex, "run_single_agent", fake_run_single_agent)
+    with patch.dict(os.environ, {"ISSUELAB_GQY20_MULTISTAGE": "0"}):
+        await ex.run_agents_parallel(1, ["moderator", "reviewer_a"], "ISSUE-CONTEXT")
+
+    shared = os.path.commonprefix([prompts["moderator"], prompts["reviewer_a"]])
+    assert "ISSUE-CONTEXT" in shared
+    assert "## 你的角色" in shared
+
+
+@pytest.mark.asyncio
+async def test_gqy20_stage_prompts_grow_append_only(monkeypatch):
+    from issuelab.agents import executor as ex
+
+    prompts: list[str] = []
+
+    async def fake_run_single_agent(prompt: str, agent_name: str, *, stage_name: str | None = None):
+        prompts.append(prompt)
+        if "当前阶段：Researcher" in prompt:
+            response = 'evidence\n```yaml\nevidence:\n  - claim: "c"\n    url: "https://example.com/r"\n```'
+        elif "当前阶段：Judge" in prompt:
+            response = "[Agent: gqy20]\n\n## Sources\n- https://example.com/final"
+        else:
+            response = f"stage-{len(prompts)}"
+        return {"ok": True, "response": response, "cost_usd": 0.0, "cache_read_input_tokens": 100}
+
+    monkeypatch.setattr(ex, "run_single_agent", fake_run_single_agent)
+    result = await ex._run_gqy20_multistage("agent prompt", 1, "ISSUE-CONTEXT")
+
+    assert result["ok"] is True
+    assert result["cache_read_input_tokens"] == 100 * len(prompts)
+    shared_parts = [prompt.split("\n---\n\n当前阶段：")[0] for prompt in prompts]
+    for earlier, later in zip(shared_parts, shared_parts[1:], strict=False):
+        assert later.startswith(earlier)
+    assert all("ISSUE-CONTEXT" in part for part in shared_parts)
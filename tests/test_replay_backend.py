@@ -0,0 +1,87 @@
+"""Tests for the record / replay query backend."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+
+def _sdk_stream(delay: float = 0.0):
+    from claude_agent_sdk import AssistantMessage, ResultMessage, UserMessage
+    from claude_agent_sdk.types import TextBlock, ToolResultBlock, ToolUseBlock
+
+    async def mock_query(*args, **kwargs):
+        import asyncio
+
+        yield AssistantMessage(content=[ToolUseBlock(id="t1", name="Read", input={"file_path": "a.md"})], model="m")
+        await asyncio.sleep(delay)
+        yield UserMessage(content=[ToolResultBlock(tool_use_id="t1", content="file text", is_error=False)])
+        yield AssistantMessage(content=[TextBlock(text="recorded answer")], model="m")
+        yield ResultMessage(
+            subtype="success",
+            duration_ms=10,
+            duration_api_ms=8,
+            is_error=False,
+            num_turns=2,
+            session_id="sess-1",
+            total_cost_usd=0.07,
+            usage={"input_tokens": 120, "output_tokens": 30},
+        )
+
+    return mock_query
+
+
+async def _unexpected_query(*args, **kwargs):
+    raise AssertionError("replay must not call the live SDK")
+    yield  # pragma: no cover
+
+
+@pytest.mark.asyncio
+async def test_recorded_run_replays_offline_with_same_result(monkeypatch):
+    from issuelab.agents.executor import run_single_agent
+
+    monkeypatch.setenv("ISSUELAB_QUERY_BACKEND", "record")
+    with patch("issuelab.agents.executor.query", _sdk_stream(delay=0.2)):
+        recorded = await run_single_agent("prompt", "test_agent")
+
+    monkeypatch.setenv("ISSUELAB_QUERY_BACKEND", "replay")
+    monkeypatch.setenv("ISSUELAB_REPLAY_DELAY_SCALE", "0")
+    with patch("issuelab.agents.executor.query", _unexpected_query):
+        started = time.monotonic()
+        replayed = await run_single_agent("prompt", "test_agent")
+        fast = time.monotonic() - started
+
+        monkeypatch.setenv("ISSUELAB_REPLAY_DELAY_SCALE", "1")
+        started = time.monotonic()
+        await run_single_agent("prompt", "test_agent")
+        original = time.monotonic() - started
+
+    for key in ("response", "cost_usd", "num_turns", "tool_calls", "input_tokens", "output_tokens", "session_id"):
+        assert replayed[key] == recorded[key]
+    assert replayed["response"] == "recorded answer"
+    assert replayed["tool_metrics"][0]["tool"] == "Read"
+    # 录制中有 0.2s 的消息间隔：原速回放保留它，缩放为 0 时跳过
+    assert original - fast >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_replay_falls_back_to_latest_recording_unless_strict(monkeypatch):
+    from issuelab.agents.executor import run_single_agent
+
+    monkeypatch.setenv("ISSUELAB_QUERY_BACKEND", "record")
+    with patch("issuelab.agents.executor.query", _sdk_stream()):
+        await run_single_agent("old prompt", "test_agent", stage_name="Researcher")
+
+    monkeypatch.setenv("ISSUELAB_QUERY_BACKEND", "replay")
+    monkeypatch.setenv("ISSUELAB_REPLAY_DELAY_SCALE", "0")
+    with patch("issuelab.agents.executor.query", _unexpected_query):
+        fallback = await run_single_agent("new prompt", "test_agent", stage_name="Researcher")
+        assert fallback["response"] == "recorded answer"
+
+        monkeypatch.setenv("ISSUELAB_REPLAY_STRICT", "1")
+        started = time.monotonic()
+        missing = await run_single_agent("new prompt", "test_agent", stage_name="Researcher")
+
+    assert missing["ok"] is False
+    assert missing["error_type"] == "replay_missing"
+    assert time.monotonic() - started < 1  # 不进入重试退避
@@ -0,0 +1,54 @@
+"""Tests for dependency-aware agent pipelines."""
+
+import anyio
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_pipeline_injects_upstream_outputs_into_dependent_agent(monkeypatch):
+    from issuelab.agents import executor as ex
+
+    order: list[str] = []
+    prompts: dict[str, str] = {}
+
+    async def fake_run_single_agent(prompt: str, agent_name: str, *, stage_name: str | None = None, on_text=None):
+        order.append(f"start:{agent_name}")
+        prompts[agent_name] = prompt
+        if agent_name != "summarizer":
+            await anyio.sleep(0.01)
+        order.append(f"end:{agent_name}")
+        if agent_name == "reviewer_b":
+            return {"ok": False, "error_type": "timeout", "response": "[系统护栏] timeout", "cost_usd": 0.0}
+        return {"ok": True, "response": f"[Agent: {agent_name}] verdict", "cost_usd": 0.01}
+
+    monkeypatch.setattr(ex, "run_single_agent", fake_run_single_agent)
+
+    results = await ex.run_agents_pipeline(
+        1,
+        {
+            "moderator": [],
+            "reviewer_a": [],
+            "reviewer_b": [],
+            "summarizer": ["moderator", "reviewer_a", "reviewer_b"],
+        },
+        "ctx",
+    )
+
+    assert set(results) == {"moderator", "reviewer_a", "reviewer_b", "summarizer"}
+    summarizer_start = order.index("start:summarizer")
+    for upstream in ("moderator", "reviewer_a", "reviewer_b"):
+        assert order.index(f"end:{upstream}") < summarizer_start
+    assert "## 上游 Agent 输出" in prompts["summarizer"]
+    assert "[Agent: moderator] verdict" in prompts["summarizer"]
+    assert "执行失败：timeout" in prompts["summarizer"]
+    assert "## 上游 Agent 输出" not in prompts["moderator"]
+
+
+def test_validate_agent_dependencies_drops_unknown_and_rejects_cycles():
+    from issuelab.agents.executor import _validate_agent_dependencies
+
+    normalized = _validate_agent_dependencies(["a", "b"], {"b": ["a", "missing", "a"]})
+    assert normalized == {"a": [], "b": ["a"]}
+
+    with pytest.raises(ValueError):
+        _validate_agent_dependencies(["a", "b"], {"a": ["b"], "b": ["a"]})
@@ -0,0 +1,145 @@
+"""Tests for the run duration store and adaptive timeouts."""
+
+import os
+import subprocess
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _record(path: str, count: int, duration: float, attempt: float, first_message: float = 1.0) -> None:
+    from issuelab.agents.run_stats import record_run
+
+    for _ in range(count):
+        record_run(
+            "agent",
+            duration_seconds=duration,
+            attempt_seconds=attempt,
+            first_message_seconds=first_message,
+            ok=True,
+            path=path,
+        )
+
+
+def test_adaptive_timeouts_use_history_within_static_bounds(tmp_path, monkeypatch):
+    from issuelab.agents.run_stats import adaptive_timeouts, load_samples
+
+    monkeypatch.delenv("ISSUELAB_ADAPTIVE_TIMEOUTS", raising=False)
+    path = str(tmp_path / "stats.json")
+
+    _record(path, 5, duration=20, attempt=20)
+    assert adaptive_timeouts("agent", 600, 90, path=path) == (600, 90)  # 样本不足
+
+    _record(path, 10, duration=20, attempt=20)
+    assert len(load_samples("agent", path)) == 15
+    # p99 20s × 1.5 = 30s，受 0.25x 下限约束：overall >= 150，attempt >= 23
+    assert adaptive_timeouts("agent", 600, 90, path=path) == (150, 30)
+
+    _record(path, 200, duration=400, attempt=250)
+    # 长尾上调，但不超过静态配置
+    assert adaptive_timeouts("agent", 600, 90, path=path) == (600, 90)
+    assert adaptive_timeouts("agent", None, None, path=path) == (None, None)
+
+    monkeypatch.setenv("ISSUELAB_ADAPTIVE_TIMEOUTS", "0")
+    assert adaptive_timeouts("agent", 600, 90, path=path) == (600, 90)
+
+
+def test_timed_out_runs_do_not_ratchet_and_frequent_timeouts_restore_static(tmp_path, monkeypatch):
+    from issuelab.agents.run_stats import adaptive_timeouts, record_run
+
+    def record_timeout(overall: int) -> None:
+        record_run(
+            "agent",
+            duration_seconds=overall,
+            attempt_seconds=None,
+            first_message_seconds=None,
+            ok=False,
+            error_type="timeout",
+            path=path,
+        )
+
+    monkeypatch.delenv("ISSUELAB_ADAPTIVE_TIMEOUTS", raising=False)
+    path = str(tmp_path / "stats.json")
+    _record(path, 20, duration=20, attempt=20)
+    assert adaptive_timeouts("agent", 600, 90, path=path) == (150, 30)
+
+    # 超时耗时 >= 当时的超时：计入分位数会让下一次超时再放大 1.5 倍；偶发一次超时不改变结果
+    record_timeout(150)
+    assert adaptive_timeouts("agent", 600, 90, path=path) == (150, 30)
+
+    # 负载变慢、超时频繁（最近 20 次中 >= 10%）：退回静态配置，慢运行才能完成并进入样本
+    record_timeout(150)
+    assert adaptive_timeouts("agent", 600, 90, path=path) == (600, 90)
+    _record(path, 20, duration=300, attempt=60)
+    assert adaptive_timeouts("agent", 600, 90, path=path) == (450, 90)
+
+
+def test_stage_samples_are_kept_apart(tmp_path, monkeypatch):
+    from issuelab.agents.run_stats import adaptive_timeouts, load_samples, record_run
+
+    monkeypatch.delenv("ISSUELAB_ADAPTIVE_TIMEOUTS", raising=False)
+    path = str(tmp_path / "stats.json")
+    for stage_name, duration in (("Observer", 20), ("Judge", 200)):
+        for _ in range(10):
+            record_run(
+                "gqy20",
+                duration_seconds=duration,
+                attempt_seconds=duration,
+                first_message_seconds=1.0,
+                ok=True,
+                stage_name=stage_name,
+                path=path,
+            )
+
+    assert load_samples("gqy20", path) == []
+    assert adaptive_timeouts("gqy20", 600, 90, stage_name="Observer", path=path) == (150, 30)
+    assert adaptive_timeouts("gqy20", 600, 400, stage_name="Judge", path=path) == (300, 300)
+
+
+def test_concurrent_processes_do_not_lose_samples(tmp_path):
+    import issuelab
+    from issuelab.agents.run_stats import load_samples
+
+    path = str(tmp_path / "stats.json")
+    code = (
+        "import sys\n"
+        "from issuelab.agents.run_stats import record_run\n"
+        "for _ in range(25):\n"
+        "    record_run('agent', duration_seconds=1, attempt_seconds=1, first_message_seconds=1, ok=True, path=sys.argv[1])\n"
+    )
+    src_dir = os.path.dirname(os.path.dirname(issuelab.__file__))
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [src_dir, os.environ.get("PYTHONPATH")]))}
+    procs = [subprocess.Popen([sys.executable, "-c", code, path], env=env) for _ in range(4)]
+    assert [proc.wait(timeout=60) for proc in procs] == [0, 0, 0, 0]
+
+    assert len(load_samples("agent", path)) == 100
+
+
+@pytest.mark.asyncio
+async def test_run_single_agent_records_duration_and_first_message(tmp_path, monkeypatch):
+    from claude_agent_sdk import AssistantMessage, ResultMessage
+    from claude_agent_sdk.types import TextBlock
+
+    from issuelab.agents.executor import run_single_agent
+    from issuelab.agents.run_stats import load_samples
+
+    async def mock_query(*args, **kwargs):
+        msg = MagicMock(spec=AssistantMessage)
+        msg.content = [TextBlock(text="ok")]
+        yield msg
+        result = MagicMock(spec=ResultMessage)
+        result.total_cost_usd = 0.0
+        result.num_turns = 1
+        result.session_id = "s"
+        result.usage = {}
+        yield result
+
+    with patch("issuelab.agents.executor.query", mock_query):
+        await run_single_agent("prompt", "test_agent")
+
+    samples = load_samples("test_agent")
+    assert len(samples) == 1
+    assert samples[0]["ok"] is True
+    assert samples[0]["first_message"] is not None
+    assert samples[0]["attempt"] <= samples[0]["duration"]
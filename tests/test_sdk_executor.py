@@ -529,7 +529,7 @@ class TestStreamingOutput:
     """测试流式输出功能"""
 
     @pytest.mark.asyncio
-    async def test_text_block_outputs_to_console_and_log(self):
+    async def test_text_block_outputs_to_console_and_log(self, capsys):
         """TextBlock 应该输出到终端和日志"""
         from claude_agent_sdk import AssistantMessage, ResultMessage
         from claude_agent_sdk.types import TextBlock
@@ -552,13 +552,56 @@ class TestStreamingOutput:
             result.session_id = "test-session"
             yield result
 
-        with patch("issuelab.agents.executor.query", mock_query), patch("builtins.print") as mock_print:
+        with patch("issuelab.agents.executor.query", mock_query):
             await run_single_agent("test prompt", "test_agent")
-            # 验证 print 被调用（流式输出）
-            assert mock_print.call_count >= len(text_responses)
+        # 验证文本输出到 stderr（同一轮内的文本合并为一块）
+        assert "Hello World" in capsys.readouterr().err
+
+    @pytest.mark.asyncio
+    async def test_concurrent_runs_of_same_agent_do_not_share_console(self, capsys, monkeypatch):
+        """同一 agent 并发运行各用各的终端缓冲；SDK stderr 立即写出到所属运行的块"""
+        import asyncio
+        import re
+
+        from claude_agent_sdk import AssistantMessage, ResultMessage
+        from claude_agent_sdk.types import TextBlock
+
+        from issuelab.agents import console
+        from issuelab.agents.executor import run_single_agent
+
+        monkeypatch.setattr(console, "_last_label", None)
+        monkeypatch.setattr(console, "_line_open", False)
+
+        async def mock_query(*args, **kwargs):
+            tag = kwargs["prompt"].split()[0]
+            kwargs["options"].stderr(f"sdk-{tag}\n")
+            await asyncio.sleep(0.05)
+            msg = MagicMock(spec=AssistantMessage)
+            msg.content = [TextBlock(text=f"text-{tag}")]
+            yield msg
+            result = MagicMock(spec=ResultMessage)
+            result.total_cost_usd = 0.0
+            result.num_turns = 1
+            result.session_id = "s"
+            yield result
+
+        with patch("issuelab.agents.executor.query", mock_query):
+            await asyncio.gather(run_single_agent("a prompt", "test_agent"), run_single_agent("b prompt", "test_agent"))
+
+        err = capsys.readouterr().err
+        blocks: dict[str, str] = {}
+        for label, body in re.findall(r"──── \[([^\]]+)\] ────\n(.*?)(?=\n?──── \[|\Z)", err, re.S):
+            blocks[label] = blocks.get(label, "") + body
+        assert set(blocks) == {"test_agent", "test_agent#2"}
+        # SDK stderr 在收到首条消息前就已写出，且与流式文本落在同一运行的块里
+        assert err.index("sdk-a") < err.index("text-a") and err.index("sdk-b") < err.index("text-a")
+        for body in blocks.values():
+            tag = "a" if "sdk-a" in body else "b"
+            other = "b" if tag == "a" else "a"
+            assert f"text-{tag}" in body and f"-{other}" not in body
 
     @pytest.mark.asyncio
-    async def test_tool_use_block_outputs_to_console_and_log(self):
+    async def test_tool_use_block_outputs_to_console_and_log(self, capsys):
         """ToolUseBlock 应该输出到终端和日志"""
         from claude_agent_sdk import AssistantMessage, ResultMessage
         from claude_agent_sdk.types import ToolUseBlock
@@ -581,10 +624,10 @@ class TestStreamingOutput:
             result.session_id = "test-session"
             yield result
 
-        with patch("issuelab.agents.executor.query", mock_query), patch("builtins.print") as mock_print:
+        with patch("issuelab.agents.executor.query", mock_query):
             await run_single_agent("test prompt", "test_agent")
-            # 验证工具名被输出
-            assert any("Read" in str(call) for call in mock_print.call_args_list)
+        # 验证工具名被输出
+        assert "[Read]" in capsys.readouterr().err
 
     @pytest.mark.asyncio
     async def test_thinking_block_is_skipped(self):
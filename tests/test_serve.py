@@ -0,0 +1,180 @@
+"""Tests for the serve worker, its SQLite event queue and webhook receiver."""
+
+import hashlib
+import hmac
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+
+def test_event_queue_claims_in_order_and_tracks_status(tmp_path):
+    from issuelab.event_queue import EventQueue
+
+    with EventQueue(str(tmp_path / "queue.db")) as queue:
+        first = queue.enqueue(["execute", "--issue", "1", "--agents", "moderator"], trigger_comment="@moderator hi")
+        second = queue.enqueue(["observe", "--issue", "2"])
+        with pytest.raises(ValueError):
+            queue.enqueue(["list-agents"])
+
+        claimed = queue.claim()
+        assert claimed.id == first and claimed.trigger_comment == "@moderator hi"
+        assert queue.claim().id == second
+        assert queue.claim() is None
+
+        queue.finish(first, ok=True)
+        assert queue.counts() == {"done": 1, "running": 1}
+        assert queue.requeue_running(queue.worker_id) == 1
+        assert queue.get(second)["status"] == "queued"
+
+
+def test_recover_only_requeues_events_of_dead_workers(tmp_path):
+    import socket
+    import subprocess
+
+    from issuelab.event_queue import EventQueue
+
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    host = socket.gethostname()
+    with EventQueue(str(tmp_path / "queue.db")) as queue:
+        owners = {
+            queue.worker_id: time.time(),  # 存活的本机 worker
+            f"{host}:{dead.pid}": time.time(),  # 已退出的本机 worker
+            "other-host:1": time.time(),  # 其他主机，租约未过期
+            "other-host:2": time.time() - 7200,  # 其他主机，租约已过期
+        }
+        ids = {}
+        for worker, started_at in owners.items():
+            event_id = queue.enqueue(["observe", "--issue", "1"])
+            queue.claim()
+            queue.conn.execute(
+                "UPDATE events SET worker = ?, started_at = ? WHERE id = ?", (worker, started_at, event_id)
+            )
+            ids[worker] = event_id
+
+        assert queue.recover_orphaned(lease_seconds=3600) == 2
+        status = {worker: queue.get(event_id)["status"] for worker, event_id in ids.items()}
+        assert status == {
+            queue.worker_id: "running",
+            f"{host}:{dead.pid}": "queued",
+            "other-host:1": "running",
+            "other-host:2": "queued",
+        }
+
+
+def test_worker_runs_events_concurrently_with_per_event_trigger_comment(tmp_path, monkeypatch):
+    from issuelab.config import Config
+    from issuelab.event_queue import EventQueue
+    from issuelab.worker import EventWorker
+
+    monkeypatch.setenv("ISSUELAB_TRIGGER_COMMENT", "from the worker environment")
+    seen: dict[str, str] = {}
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def run_event(argv: list[str]) -> int:
+        nonlocal active, max_active
+        with lock:
+            active += 1
+            max_active = max(max_active, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+            seen[argv[2]] = Config.get_trigger_comment()
+        if argv[2] == "3":
+            raise RuntimeError("boom")
+        return 0
+
+    queue = EventQueue(str(tmp_path / "queue.db"))
+    ids = {
+        issue: queue.enqueue(["execute", "--issue", issue, "--agents", "moderator"], trigger_comment=comment)
+        for issue, comment in (("1", "@moderator one"), ("2", "@moderator two"), ("3", None))
+    }
+    worker = EventWorker(queue, run_event, concurrency=2, poll_interval=0.01)
+    worker.serve(once=True)
+
+    assert seen == {"1": "@moderator one", "2": "@moderator two", "3": ""}
+    assert max_active == 2
+    assert (worker.processed, worker.failed) == (3, 1)
+    assert queue.get(ids["3"])["status"] == "failed"
+    assert "boom" in queue.get(ids["3"])["error"]
+    queue.close()
+
+
+def test_enqueue_command_validates_event_argv(tmp_path, monkeypatch, capsys):
+    from issuelab.__main__ import main
+    from issuelab.event_queue import EventQueue
+
+    queue_path = str(tmp_path / "events.db")
+    event = ["execute", "--issue", "1", "--agents", "moderator"]
+    monkeypatch.setattr(sys, "argv", ["issuelab", "enqueue", "--queue", queue_path, "--trigger-comment", "hi", *event])
+    assert main() == 0
+
+    monkeypatch.setattr(sys, "argv", ["issuelab", "enqueue", "--queue", queue_path, "execute", "--agents", "x"])
+    assert main() == 1
+    assert "[ERROR]" in capsys.readouterr().out
+
+    with EventQueue(queue_path) as queue:
+        assert queue.counts() == {"queued": 1}
+        assert queue.get(1)["argv"] == event
+        assert queue.get(1)["trigger_comment"] == "hi"
+
+
+def test_webhook_enqueues_signed_events_and_rejects_bad_signatures(tmp_path):
+    from issuelab.__main__ import parse_event_argv
+    from issuelab.event_queue import EventQueue
+    from issuelab.worker import WebhookReceiver
+
+    notified = threading.Event()
+    queue = EventQueue(str(tmp_path / "queue.db"))
+    receiver = WebhookReceiver(queue, parse_event_argv, port=0, secret="s3cret", on_enqueue=notified.set)
+    receiver.start()
+
+    def post(payload: dict, secret: str) -> tuple[int, dict]:
+        body = json.dumps(payload).encode("utf-8")
+        signature = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+        request = urllib.request.Request(
+            f"{receiver.url}/events", data=body, headers={"X-Hub-Signature-256": signature}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as exc:
+            return exc.code, json.loads(exc.read())
+
+    try:
+        event = {"argv": ["review", "--issue", "7"], "trigger_comment": "@review"}
+        status, payload = post(event, "s3cret")
+        assert status == 202 and notified.is_set()
+        assert queue.get(payload["id"])["argv"] == ["review", "--issue", "7"]
+
+        assert post(event, "wrong")[0] == 401
+        assert post({"argv": ["review"]}, "s3cret")[0] == 400
+        assert queue.counts() == {"queued": 1}
+    finally:
+        receiver.stop()
+        queue.close()
+
+
+def test_webhook_requires_secret_for_non_loopback_hosts(tmp_path, monkeypatch, capsys):
+    from issuelab.__main__ import main, parse_event_argv
+    from issuelab.event_queue import EventQueue
+    from issuelab.worker import WebhookReceiver
+
+    monkeypatch.delenv("ISSUELAB_WEBHOOK_SECRET", raising=False)
+    with EventQueue(str(tmp_path / "queue.db")) as queue:
+        with pytest.raises(ValueError):
+            WebhookReceiver(queue, parse_event_argv, host="0.0.0.0", port=0)
+        WebhookReceiver(queue, parse_event_argv, host="0.0.0.0", port=0, secret="s3cret").stop()
+        WebhookReceiver(queue, parse_event_argv, host="127.0.0.1", port=0).stop()
+
+    argv = ["issuelab", "serve", "--once", "--no-warm", "--webhook-host", "0.0.0.0", "--webhook-port", "0"]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert main() == 1
+    assert "ISSUELAB_WEBHOOK_SECRET" in capsys.readouterr().out
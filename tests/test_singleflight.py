@@ -0,0 +1,127 @@
+"""Tests for single-flight coalescing of identical agent runs."""
+
+import asyncio
+import fcntl
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_runs_share_one_query(monkeypatch):
+    from claude_agent_sdk import AssistantMessage, ResultMessage
+    from claude_agent_sdk.types import TextBlock
+
+    from issuelab.agents.executor import run_single_agent
+
+    calls = {"count": 0}
+
+    async def mock_query(*args, **kwargs):
+        calls["count"] += 1
+        await asyncio.sleep(0.1)
+        msg = MagicMock(spec=AssistantMessage)
+        msg.content = [TextBlock(text="answer")]
+        yield msg
+        result = MagicMock(spec=ResultMessage)
+        result.total_cost_usd = 0.04
+        result.num_turns = 1
+        result.session_id = "s"
+        result.usage = {}
+        yield result
+
+    with patch("issuelab.agents.executor.query", mock_query):
+        first, second, other = await asyncio.gather(
+            run_single_agent("same prompt", "test_agent"),
+            run_single_agent("same prompt", "test_agent"),
+            run_single_agent("different prompt", "test_agent"),
+        )
+
+    assert calls["count"] == 2
+    assert first["response"] == second["response"] == "answer"
+    assert "singleflight_reused" not in first
+    assert second["singleflight_reused"] == "process"
+    assert second["cost_usd"] == 0.0
+    assert second["reused_cost_usd"] == pytest.approx(0.04)
+    assert "singleflight_reused" not in other
+
+
+@pytest.mark.asyncio
+async def test_waiter_reuses_result_written_by_other_process(tmp_path):
+    from issuelab.agents.singleflight import request_key, run_once
+
+    key = request_key("agent", "prompt")
+    directory = tmp_path / "singleflight"
+    directory.mkdir()
+    calls = {"count": 0}
+
+    async def func() -> dict:
+        calls["count"] += 1
+        return {"ok": True, "response": "local", "cost_usd": 0.1}
+
+    # 模拟另一个进程持有锁：flock 按打开的文件描述区分，同进程内也会互斥
+    holder = os.open(directory / f"{key}.lock", os.O_CREAT | os.O_RDWR)
+    fcntl.flock(holder, fcntl.LOCK_EX)
+    task = asyncio.create_task(run_once(key, func, label="agent"))
+    await asyncio.sleep(0.3)
+    assert not task.done()
+
+    (directory / f"{key}.json").write_text(json.dumps({"ok": True, "response": "remote", "cost_usd": 0.2}))
+    fcntl.flock(holder, fcntl.LOCK_UN)
+    os.close(holder)
+
+    result = await asyncio.wait_for(task, 5)
+    assert calls["count"] == 0
+    assert result["response"] == "remote"
+    assert result["singleflight_reused"] == "file"
+    assert result["cost_usd"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_result_from_earlier_run_is_not_reused(monkeypatch):
+    from issuelab.agents.singleflight import request_key, run_once
+
+    key = request_key("agent", "prompt")
+    responses = iter(["first", "second"])
+
+    async def func() -> dict:
+        return {"ok": True, "response": next(responses)}
+
+    assert (await run_once(key, func))["response"] == "first"
+    again = await run_once(key, func)
+    assert again["response"] == "second"
+    assert "singleflight_reused" not in again
+
+    monkeypatch.setenv("ISSUELAB_SINGLEFLIGHT", "0")
+    from issuelab.agents.singleflight import is_singleflight_enabled
+
+    assert is_singleflight_enabled() is False
+
+
+def test_identical_runs_in_different_threads_share_one_call():
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    from issuelab.agents.singleflight import request_key, run_once
+
+    key = request_key("agent", "threaded prompt")
+    calls = {"count": 0}
+    barrier = threading.Barrier(2)
+
+    async def func() -> dict:
+        calls["count"] += 1
+        await asyncio.sleep(0.2)
+        return {"ok": True, "response": "shared", "cost_usd": 0.1}
+
+    def event() -> dict:
+        # serve worker 中每个事件在自己的线程里 asyncio.run
+        barrier.wait()
+        return asyncio.run(run_once(key, func, label="agent"))
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(lambda _: event(), range(2)))
+
+    assert calls["count"] == 1
+    assert [result["response"] for result in results] == ["shared", "shared"]
+    assert sorted(str(result.get("singleflight_reused")) for result in results) == ["None", "process"]
@@ -0,0 +1,81 @@
+"""Tests for per-tool latency / error histograms."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def test_split_tool_name_maps_mcp_servers():
+    from issuelab.agents.tool_metrics import split_tool_name
+
+    assert split_tool_name("mcp__github__search_issues") == ("github", "search_issues")
+    assert split_tool_name("mcp__arxiv__get__paper") == ("arxiv", "get__paper")
+    assert split_tool_name("Read") == ("builtin", "Read")
+    assert split_tool_name("mcp__broken") == ("builtin", "mcp__broken")
+
+
+def test_summary_and_openmetrics_output():
+    from issuelab.agents.tool_metrics import ToolMetrics
+
+    metrics = ToolMetrics()
+    metrics.observe("moderator", "mcp__github__search", 0.2, is_error=False, result_chars=500)
+    metrics.observe("moderator", "mcp__github__search", 3.0, is_error=True, result_chars=50)
+    metrics.observe("moderator", "Read", 0.05, is_error=False, result_chars=2000)
+
+    summary = metrics.summary()
+    assert [(row["server"], row["tool"]) for row in summary] == [("github", "search"), ("builtin", "Read")]
+    assert summary[0]["calls"] == 2
+    assert summary[0]["error_rate"] == 0.5
+    assert summary[0]["latency_max_seconds"] == 3.0
+
+    text = metrics.to_openmetrics()
+    labels = 'agent="moderator",server="github",tool="search"'
+    assert f'issuelab_tool_latency_seconds_bucket{{{labels},le="0.25"}} 1' in text
+    assert f'issuelab_tool_latency_seconds_bucket{{{labels},le="5"}} 2' in text
+    assert f'issuelab_tool_latency_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f"issuelab_tool_latency_seconds_sum{{{labels}}} 3.2" in text
+    assert f"issuelab_tool_errors_total{{{labels}}} 1" in text
+    assert text.endswith("# EOF\n")
+
+
+@pytest.mark.asyncio
+async def test_run_result_includes_tool_metrics_and_writes_file(tmp_path):
+    from claude_agent_sdk import AssistantMessage, ResultMessage, UserMessage
+    from claude_agent_sdk.types import TextBlock, ToolResultBlock, ToolUseBlock
+
+    from issuelab.agents.executor import run_single_agent
+
+    async def mock_query(*args, **kwargs):
+        tool_msg = MagicMock(spec=AssistantMessage)
+        tool_msg.content = [
+            ToolUseBlock(id="t1", name="mcp__arxiv__search", input={}),
+            ToolUseBlock(id="t2", name="mcp__arxiv__search", input={}),
+        ]
+        yield tool_msg
+        yield UserMessage(
+            content=[
+                ToolResultBlock(tool_use_id="t1", content=[{"type": "text", "text": "x" * 40}], is_error=False),
+                ToolResultBlock(tool_use_id="t2", content="rate limited", is_error=True),
+            ]
+        )
+        text_msg = MagicMock(spec=AssistantMessage)
+        text_msg.content = [TextBlock(text="done")]
+        yield text_msg
+        result = MagicMock(spec=ResultMessage)
+        result.total_cost_usd = 0.01
+        result.num_turns = 2
+        result.session_id = "s"
+        result.usage = {}
+        yield result
+
+    with patch("issuelab.agents.executor.query", mock_query):
+        info = await run_single_agent("prompt", "test_agent")
+
+    [row] = info["tool_metrics"]
+    assert (row["agent"], row["server"], row["tool"]) == ("test_agent", "arxiv", "search")
+    assert row["calls"] == 2
+    assert row["errors"] == 1
+    assert row["result_chars_total"] == 52
+
+    text = (tmp_path / "tool_metrics.prom").read_text()
+    assert 'issuelab_tool_errors_total{agent="test_agent",server="arxiv",tool="search"}' in text
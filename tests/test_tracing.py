@@ -0,0 +1,136 @@
+"""Tests for span tracing and the Chrome trace exporter."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def test_spans_nest_and_inherit_lane(tmp_path):
+    from issuelab.tracing import load_spans, record_span, span
+
+    with span("wave", lane="orchestrator") as wave:
+        with span("agent.run", cat="agent", lane="moderator") as run:
+            with span("options.build"):
+                pass
+            record_span("turn", started_monotonic=run._started, cat="model", turn=1)
+        with pytest.raises(ValueError), span("post_comment"):
+            raise ValueError("boom")
+
+    spans = {s["name"]: s for s in load_spans([str(tmp_path / "traces")])}
+    assert spans["agent.run"]["parent_id"] == wave.span_id
+    assert spans["options.build"]["lane"] == "moderator"
+    assert spans["options.build"]["parent_id"] == run.span_id
+    assert spans["turn"]["parent_id"] == run.span_id
+    assert spans["turn"]["attrs"] == {"turn": 1}
+    assert spans["post_comment"]["lane"] == "orchestrator"
+    assert spans["post_comment"]["status"] == "error"
+    assert spans["wave"]["status"] == "ok"
+
+
+def test_spans_are_buffered_until_the_outermost_span_ends(tmp_path):
+    from issuelab.tracing import span
+
+    traces = tmp_path / "traces"
+    with span("wave"):
+        for index in range(20):
+            with span("turn", turn=index):
+                pass
+        assert not traces.exists()
+    (trace_file,) = traces.iterdir()
+    assert len(trace_file.read_text(encoding="utf-8").splitlines()) == 21
+
+
+def test_trace_dir_retention_removes_old_files(tmp_path, monkeypatch):
+    import os
+    import time
+
+    from issuelab.tracing import prune_trace_dir
+
+    monkeypatch.setenv("ISSUELAB_TRACE_RETENTION_DAYS", "7")
+    old = tmp_path / "old.jsonl"
+    recent = tmp_path / "recent.jsonl"
+    old.write_text("{}\n")
+    recent.write_text("{}\n")
+    eight_days_ago = time.time() - 8 * 86400
+    os.utime(old, (eight_days_ago, eight_days_ago))
+
+    assert prune_trace_dir(str(tmp_path)) == 1
+    assert [path.name for path in tmp_path.iterdir()] == ["recent.jsonl"]
+
+
+def test_tracing_can_be_disabled(tmp_path, monkeypatch):
+    from issuelab.tracing import span
+
+    monkeypatch.setenv("ISSUELAB_TRACE", "0")
+    with span("wave"):
+        pass
+    assert not (tmp_path / "traces").exists()
+
+
+def test_chrome_trace_export_assigns_one_thread_per_lane(tmp_path):
+    from issuelab.cli.trace_export import main
+
+    spans = [
+        {"name": "agent.run", "cat": "agent", "lane": "a", "pid": 7, "start": 100.0, "duration": 2.0, "attrs": {}},
+        {"name": "agent.run", "cat": "agent", "lane": "b", "pid": 7, "start": 100.5, "duration": 1.0, "attrs": {}},
+        {"name": "tool:Read", "cat": "tool", "lane": "a", "pid": 7, "start": 101.0, "duration": 0.25, "attrs": {}},
+    ]
+    source = tmp_path / "run.jsonl"
+    source.write_text("\n".join(json.dumps(s) for s in spans) + "\nnot json\n")
+    output = tmp_path / "trace.json"
+
+    assert main([str(source), "-o", str(output)]) == 0
+
+    events = json.loads(output.read_text())["traceEvents"]
+    threads = {e["args"]["name"]: e["tid"] for e in events if e["name"] == "thread_name"}
+    complete = [e for e in events if e["ph"] == "X"]
+    assert set(threads) == {"a", "b"}
+    assert [(e["name"], e["ts"], e["dur"]) for e in complete] == [
+        ("agent.run", 0, 2_000_000),
+        ("agent.run", 500_000, 1_000_000),
+        ("tool:Read", 1_000_000, 250_000),
+    ]
+    assert complete[2]["tid"] == threads["a"]
+
+
+@pytest.mark.asyncio
+async def test_agent_run_records_turn_and_tool_spans(tmp_path):
+    from claude_agent_sdk import AssistantMessage, ResultMessage, UserMessage
+    from claude_agent_sdk.types import TextBlock, ToolResultBlock, ToolUseBlock
+
+    from issuelab.agents.executor import run_single_agent
+    from issuelab.tracing import load_spans
+
+    async def mock_query(*args, **kwargs):
+        tool_msg = MagicMock(spec=AssistantMessage)
+        tool_msg.content = [ToolUseBlock(id="t1", name="Read", input={"file_path": "x"})]
+        yield tool_msg
+        yield UserMessage(content=[ToolResultBlock(tool_use_id="t1", content="ok", is_error=False)])
+        text_msg = MagicMock(spec=AssistantMessage)
+        text_msg.content = [TextBlock(text="done")]
+        yield text_msg
+        result = MagicMock(spec=ResultMessage)
+        result.total_cost_usd = 0.01
+        result.num_turns = 2
+        result.session_id = "s"
+        result.usage = {}
+        yield result
+
+    with patch("issuelab.agents.executor.query", mock_query):
+        info = await run_single_agent("prompt", "test_agent")
+    assert info["ok"] is True
+
+    spans = load_spans([str(tmp_path / "traces")])
+    by_name: dict[str, list[dict]] = {}
+    for s in spans:
+        by_name.setdefault(s["name"], []).append(s)
+
+    run = by_name["agent.run"][0]
+    assert run["lane"] == "test_agent"
+    assert run["attrs"]["cost_usd"] == 0.01
+    assert len(by_name["turn"]) == 2
+    assert by_name["tool:Read"][0]["attrs"]["tool_use_id"] == "t1"
+    assert {s["lane"] for s in spans} == {"test_agent"}
+    for name in ("options.build", "query.first_message", "attempt"):
+        assert name in by_name
@@ -0,0 +1,74 @@
+"""Tests for structured per-run usage records."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_each_run_appends_a_usage_record(tmp_path):
+    from claude_agent_sdk import AssistantMessage, ResultMessage
+    from claude_agent_sdk.types import TextBlock, ToolUseBlock
+
+    from issuelab.agents.executor import run_single_agent
+    from issuelab.agents.usage import current_usage_issue, parse_usage_records
+
+    async def mock_query(*args, **kwargs):
+        msg = MagicMock(spec=AssistantMessage)
+        msg.content = [ToolUseBlock(id="t1", name="Read", input={}), TextBlock(text="done")]
+        yield msg
+        result = MagicMock(spec=ResultMessage)
+        result.total_cost_usd = 0.03
+        result.num_turns = 2
+        result.session_id = "s"
+        result.usage = {"input_tokens": 100, "output_tokens": 20}
+        yield result
+
+    token = current_usage_issue.set(42)
+    try:
+        with patch("issuelab.agents.executor.query", mock_query):
+            await run_single_agent("prompt", "test_agent")
+            await run_single_agent("prompt", "test_agent", stage_name="Researcher")
+    finally:
+        current_usage_issue.reset(token)
+
+    records = parse_usage_records((tmp_path / "usage.jsonl").read_text())
+    assert [(r["agent"], r["issue"], r["stage"]) for r in records] == [
+        ("test_agent", 42, None),
+        ("test_agent", 42, "Researcher"),
+    ]
+    first = records[0]
+    assert first["ok"] is True
+    assert first["cost_usd"] == 0.03
+    assert first["tools"] == {"Read": 1}
+    assert first["total_tokens"] == 120
+    assert first["duration_seconds"] >= 0
+    assert records[0]["record_id"] != records[1]["record_id"]
+
+
+def test_aggregate_counts_repeated_runs_and_dedupes_by_record_id():
+    from issuelab.agents.usage import aggregate_usage_records, parse_usage_records
+
+    lines = [
+        {"record_id": "a", "agent": "moderator", "cost_usd": 0.1, "num_turns": 2, "tool_calls": 1, "total_tokens": 10},
+        {"record_id": "b", "agent": "moderator", "cost_usd": 0.2, "num_turns": 3, "tool_calls": 0, "total_tokens": 5},
+        {"record_id": "a", "agent": "moderator", "cost_usd": 0.1, "num_turns": 2, "tool_calls": 1, "total_tokens": 10},
+    ]
+    text = "\n".join(json.dumps(line) for line in lines) + "\ngarbage\n"
+
+    stats = aggregate_usage_records(parse_usage_records(text))
+
+    assert stats["runs_found"] == 2
+    assert stats["agents"]["moderator"]["runs"] == 2
+    assert stats["cost_usd"] == pytest.approx(0.3)
+    assert stats["total_turns"] == 5
+    assert stats["total_tokens"] == 15
+
+
+def test_usage_path_follows_log_file(monkeypatch, tmp_path):
+    from issuelab.agents.usage import get_usage_path
+
+    monkeypatch.delenv("ISSUELAB_USAGE_FILE", raising=False)
+    monkeypatch.setenv("LOG_FILE", str(tmp_path / "logs" / "moderator_1.log"))
+    assert get_usage_path() == str(tmp_path / "logs" / "usage.jsonl")
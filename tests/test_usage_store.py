@@ -0,0 +1,96 @@
+"""Tests for the incremental SQLite usage store."""
+
+import pytest
+
+
+def _record(record_id: str, **fields) -> dict:
+    return {"record_id": record_id, "agent": "moderator", "at": 1_000_000.0, "ok": True, **fields}
+
+
+def test_ingest_is_incremental_and_dedupes(tmp_path):
+    from issuelab.agents.usage_store import UsageStore
+
+    db = str(tmp_path / "usage.db")
+    with UsageStore(db) as store:
+        assert store.ingest_run("101", [_record("a"), _record("b")], workflow="orchestrator") == 2
+        assert store.ingest_run("102", [_record("b"), _record("c")]) == 1
+
+    with UsageStore(db) as store:
+        assert store.ingested_run_ids() == {"101", "102"}
+        assert sum(row["runs"] for row in store.failure_rate()) == 3
+
+
+def test_records_without_time_use_run_start_in_windowed_queries(tmp_path):
+    import sqlite3
+    from datetime import datetime
+
+    from issuelab.agents.usage_store import UsageStore
+
+    started = datetime.fromisoformat("2026-10-01T12:00:00+00:00").timestamp()
+    # 日志正则兜底统计：每个 agent 一条汇总，没有 at
+    fallback = {"record_id": "7:moderator:log", "agent": "moderator", "cost_usd": 0.3, "num_turns": 2}
+    db = str(tmp_path / "usage.db")
+    with UsageStore(db) as store:
+        store.ingest_run("7", [fallback], started_at="2026-10-01T12:00:00Z", source="log")
+        [failures] = store.failure_rate(started - 86400)
+        assert failures["runs"] == 1
+        assert store.failure_rate(started + 1) == []
+
+    # 旧版本导入、at 为空的记录在打开仓库时补齐
+    with sqlite3.connect(db) as conn:
+        conn.execute("UPDATE usage SET at = NULL")
+    with UsageStore(db) as store:
+        assert store.failure_rate(started - 86400)[0]["runs"] == 1
+
+
+def test_queries_respect_time_window(tmp_path):
+    from issuelab.agents.usage_store import UsageStore
+
+    day = 86400.0
+    records = [
+        _record("old", at=1 * day, duration_seconds=500.0, issue=1, cost_usd=5.0),
+        *[
+            _record(f"r{i}", at=10 * day + i, duration_seconds=float(i), issue=2, cost_usd=0.1, num_turns=2)
+            for i in range(1, 101)
+        ],
+        _record(
+            "fail", at=10 * day, ok=False, error_type="timeout", issue=3, cost_usd=0.5, total_tokens=300, num_turns=3
+        ),
+    ]
+    with UsageStore(str(tmp_path / "usage.db")) as store:
+        store.ingest_run("1", records)
+        since = 5 * day
+
+        [durations] = store.duration_percentiles(since)
+        assert (durations["runs"], durations["p50_seconds"], durations["p95_seconds"], durations["p99_seconds"]) == (
+            100,
+            50.0,
+            95.0,
+            99.0,
+        )
+        assert store.duration_percentiles()[0]["p99_seconds"] == 100.0
+        assert store.duration_percentiles()[0]["runs"] == 101
+
+        by_issue = {row["issue"]: row for row in store.cost_per_issue(since)}
+        assert set(by_issue) == {2, 3}
+        assert by_issue[2]["cost_usd"] == pytest.approx(10.0)
+
+        [tokens] = store.tokens_per_turn(since)
+        assert tokens["turns"] == 203
+        assert tokens["tokens_per_turn"] == pytest.approx(round(300 / 203, 1))
+
+        [failures] = store.failure_rate(since, until=11 * day)
+        assert failures["failures"] == 1
+        assert failures["error_types"] == {"timeout": 1}
+        assert failures["failure_rate"] == pytest.approx(round(1 / 101, 4))
+
+
+def test_parse_time_bound():
+    from issuelab.agents.usage_store import parse_time_bound
+
+    assert parse_time_bound("7d", now=1_000_000.0) == 1_000_000.0 - 7 * 86400
+    assert parse_time_bound("12h", now=100_000.0) == 100_000.0 - 12 * 3600
+    assert parse_time_bound(None) is None
+    assert parse_time_bound("2026-10-01") is not None
+    with pytest.raises(ValueError):
+        parse_time_bound("last week")